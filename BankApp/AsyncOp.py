@@ -0,0 +1,141 @@
+from BankApp.asyncStorage import AsyncDatabaseManager
+from BankApp.BankOp import BankOperation
+from BankApp.BankUser import UserOperations
+from BankApp.Transaction import TransactionOperations
+
+
+class AsyncBankOperation:
+    """Awaitable BankOperation for ASGI views.
+
+    Each method runs its blocking counterpart through an AsyncDatabaseManager:
+    writes on the single writer thread, lookups on the reader threads.
+    """
+
+    _operations_class = BankOperation
+
+    def __init__(self, db_manager="bank.db"):
+        if not isinstance(db_manager, AsyncDatabaseManager):
+            db_manager = AsyncDatabaseManager(db_manager)
+        self.db_manager = db_manager
+        self.operations = self._operations_class(db_manager.db_manager)
+
+    async def create_admin(self, username, password, admin_name):
+        return await self.db_manager.run_write(self.operations.create_admin, username, password, admin_name)
+
+    async def update_admin(self, admin_id, username, password, admin_name):
+        return await self.db_manager.run_write(self.operations.update_admin, admin_id, username, password, admin_name)
+
+    async def delete_admin(self, admin_id):
+        return await self.db_manager.run_write(self.operations.delete_admin, admin_id)
+
+    async def get_admin(self, admin_id):
+        return await self.db_manager.run_read(self.operations.get_admin, admin_id)
+
+    async def get_admins(self):
+        return await self.db_manager.run_read(self.operations.get_admins)
+
+    async def create_bank(self, Bank_name, address, location, branch, ifsc, contact, email, account_types, admin_id):
+        return await self.db_manager.run_write(
+            self.operations.create_bank, Bank_name, address, location, branch, ifsc, contact, email, account_types, admin_id)
+
+    async def update_bank(self, bank_registration_number, Bank_name, address, location, branch, ifsc, contact, email, account_types, admin_id):
+        return await self.db_manager.run_write(
+            self.operations.update_bank, bank_registration_number, Bank_name, address, location, branch, ifsc,
+            contact, email, account_types, admin_id)
+
+    async def delete_bank(self, bank_registration_number):
+        return await self.db_manager.run_write(self.operations.delete_bank, bank_registration_number)
+
+    async def get_banks(self):
+        return await self.db_manager.run_read(self.operations.get_banks)
+
+    async def get_bank_by_id(self, bank_registration_number):
+        return await self.db_manager.run_read(self.operations.get_bank_by_id, bank_registration_number)
+
+    async def create_staff(self, staff_name, staff_email, staff_contact, bank_registration_number):
+        return await self.db_manager.run_write(
+            self.operations.create_staff, staff_name, staff_email, staff_contact, bank_registration_number)
+
+    async def update_staff(self, staff_id, staff_name, staff_email, staff_contact):
+        return await self.db_manager.run_write(self.operations.update_staff, staff_id, staff_name, staff_email, staff_contact)
+
+    async def delete_staff(self, staff_id):
+        return await self.db_manager.run_write(self.operations.delete_staff, staff_id)
+
+    async def get_staffs(self, bank_registration_number):
+        return await self.db_manager.run_read(self.operations.get_staffs, bank_registration_number)
+
+    async def get_staff_by_id(self, staff_id):
+        return await self.db_manager.run_read(self.operations.get_staff_by_id, staff_id)
+
+
+class AsyncUserOperations(AsyncBankOperation):
+    """Awaitable UserOperations.
+
+    Registration, login and password resets spend most of their time in
+    bcrypt, so they run on the reader threads rather than queueing behind
+    writes on the writer thread; their own writes still use the write pool.
+    """
+
+    _operations_class = UserOperations
+
+    async def register_user(self, username, password, first_name, last_name, bank_name, email):
+        return await self.db_manager.run_read(
+            self.operations.register_user, username, password, first_name, last_name, bank_name, email)
+
+    async def update_user(self, user_account_number, username, first_name, last_name, email, account_type):
+        return await self.db_manager.run_write(
+            self.operations.update_user, user_account_number, username, first_name, last_name, email, account_type)
+
+    async def delete_user(self, user_account_number):
+        return await self.db_manager.run_write(self.operations.delete_user, user_account_number)
+
+    async def login(self, username, password):
+        return await self.db_manager.run_read(self.operations.login, username, password)
+
+    async def logout(self, username):
+        return self.operations.logout(username)
+
+    async def reset_password(self, username, new_password, old_password):
+        return await self.db_manager.run_read(self.operations.reset_password, username, new_password, old_password)
+
+    async def get_user_by_username(self, username):
+        return await self.db_manager.run_read(self.operations.get_user_by_username, username)
+
+    async def get_user_by_id(self, user_id):
+        return await self.db_manager.run_read(self.operations.get_user_by_id, user_id)
+
+    async def change_user_status(self, user_id, status, admin_id):
+        return await self.db_manager.run_write(self.operations.change_user_status, user_id, status, admin_id)
+
+
+class AsyncTransactionOperations(AsyncUserOperations):
+    """Awaitable TransactionOperations."""
+
+    _operations_class = TransactionOperations
+
+    async def transfer_money(self, sender_id, receiver_account_number, receiver_bank_name, amount, description):
+        return await self.db_manager.run_write(
+            self.operations.transfer_money, sender_id, receiver_account_number, receiver_bank_name, amount, description)
+
+    async def transfer_many(self, transfers, chunk_size=500):
+        # Materialize the batch here so a lazy iterable is not consumed on the writer thread
+        return await self.db_manager.run_write(self.operations.transfer_many, list(transfers), chunk_size)
+
+    async def deposit_money(self, user_id, amount):
+        return await self.db_manager.run_write(self.operations.deposit_money, user_id, amount)
+
+    async def withdraw_money(self, user_id, amount):
+        return await self.db_manager.run_write(self.operations.withdraw_money, user_id, amount)
+
+    async def checkpoint_balances(self):
+        return await self.db_manager.run_write(self.operations.checkpoint_balances)
+
+    async def get_statement(self, account_number, start, end):
+        return await self.db_manager.run_read(self.operations.get_statement, account_number, start, end)
+
+    async def get_balance_as_of(self, account_number, when):
+        return await self.db_manager.run_read(self.operations.get_balance_as_of, account_number, when)
+
+    async def get_account_entries(self, account_number, limit=50):
+        return await self.db_manager.run_read(self.operations.get_account_entries, account_number, limit)
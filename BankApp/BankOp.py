@@ -1,16 +1,25 @@
 import uuid
 from BankApp.fileStorage import DatabaseManager
+from BankApp.instrumentation import timed_operation
 
 
 class BankOperation(DatabaseManager):
-    def __init__(self):
-        super().__init__("bank.db")
+    def __init__(self, db_manager="bank.db"):
+        # Accept either a database path or an existing manager whose pool should be shared
+        if isinstance(db_manager, DatabaseManager):
+            self._attach(db_manager)
+        else:
+            super().__init__(db_manager)
+            db_manager = self
+        self.db_manager = db_manager
 
     def create_admin(self, username, password, admin_name):
-        admin_id = str(uuid.uuid4().hex)[:8]
+        # INTEGER PRIMARY KEY columns only accept integers, so keep the 8 hex digits as a number
+        admin_id = int(uuid.uuid4().hex[:8], 16)
         statement = "INSERT INTO admin (admin_id, username, password, admin_name, created_at) VALUES (?, ?, ?, ?, DATETIME('now'))"
         params = (admin_id, username, password, admin_name)
         self._execute_prepared_statement(statement, params)
+        return admin_id
 
     def update_admin(self, admin_id, username, password, admin_name):
         statement = "UPDATE admin SET username = ?, password = ?, admin_name = ? WHERE admin_id = ?"
@@ -25,14 +34,15 @@ class BankOperation(DatabaseManager):
     def get_admin(self, admin_id):
         statement = "SELECT * FROM admin WHERE admin_id = ?"
         params = (admin_id,)
-        return self._prepare_statement(statement).execute(params).fetchone()
+        return self._read_one(statement, params)
     
     def get_admins(self):
         statement = "SELECT * FROM admin"
-        return self._prepare_statement(statement).execute().fetchall()
+        return self._read_all(statement)
 
+    @timed_operation
     def create_bank(self, Bank_name, address, location, branch, ifsc, contact, email, account_types, admin_id):
-        bank_registration_number = str(uuid.uuid4().hex)[:8]
+        bank_registration_number = int(uuid.uuid4().hex[:8], 16)
         # Specify the column names for clarity and to avoid future errors if the table structure changes
         statement = """
         INSERT INTO banks (
@@ -63,36 +73,47 @@ class BankOperation(DatabaseManager):
             admin_id
         )
         self._execute_prepared_statement(statement, params)
+        self.bank_directory.invalidate(Bank_name)
+        return bank_registration_number
 
+    @timed_operation
     def update_bank(self, bank_registration_number, Bank_name, address, location, branch, ifsc, contact, email, account_types, admin_id):
-        statement = "UPDATE banks SET Bank_name = ?, address = ?, location = ?, branch = ?, ifsc = ?, contact = ?, email = ?, account_types = ?, admin_id = ? WHERE registration_number = ?"
+        # Ids from forms arrive as strings; the directory holds the integers SQLite returns
+        bank_registration_number = int(bank_registration_number)
+        statement = "UPDATE banks SET Bank_name = ?, address = ?, location = ?, branch = ?, ifsc = ?, contact = ?, email = ?, account_types = ?, admin_id = ?, modified_at = DATETIME('now') WHERE bank_registration_number = ?"
         params = (Bank_name, address, location, branch, ifsc, contact,
                   email, account_types, admin_id, bank_registration_number)
         self._execute_prepared_statement(statement, params)
+        # Drops the old name as well as the new one
+        self.bank_directory.invalidate(Bank_name, bank_registration_number)
 
+    @timed_operation
     def delete_bank(self, bank_registration_number):
-        statement = "DELETE FROM banks WHERE registration_number = ?"
+        bank_registration_number = int(bank_registration_number)
+        statement = "DELETE FROM banks WHERE bank_registration_number = ?"
         params = (bank_registration_number,)
         self._execute_prepared_statement(statement, params)
+        self.bank_directory.invalidate(bank_id=bank_registration_number)
 
     def get_banks(self):
         statement = "SELECT * FROM banks"
-        return self._prepare_statement(statement).execute().fetchall()
+        return self._read_all(statement)
 
     def get_bank_by_id(self, bank_registration_number):
-        statement = "SELECT * FROM banks WHERE registration_number = ?"
+        statement = "SELECT * FROM banks WHERE bank_registration_number = ?"
         params = (bank_registration_number,)
-        return self._prepare_statement(statement).execute(params).fetchone()
+        return self._read_one(statement, params)
 
     def create_staff(self, staff_name, staff_email, staff_contact, bank_registration_number):
-        staff_id = str(uuid.uuid4().hex)[:8]
-        statement = "INSERT INTO BankStaff VALUES (?, ?, ?, ?, ?, DATETIME('now'))"
+        staff_id = int(uuid.uuid4().hex[:8], 16)
+        statement = "INSERT INTO BankStaff (staff_id, staff_name, email, phone, bank_id, created_at) VALUES (?, ?, ?, ?, ?, DATETIME('now'))"
         params = (staff_id, staff_name, staff_email,
                   staff_contact, bank_registration_number)
         self._execute_prepared_statement(statement, params)
+        return staff_id
 
     def update_staff(self, staff_id, staff_name, staff_email, staff_contact):
-        statement = "UPDATE BankStaff SET staff_name = ?, staff_email = ?, staff_contact = ? WHERE staff_id = ?"
+        statement = "UPDATE BankStaff SET staff_name = ?, email = ?, phone = ?, modified_at = DATETIME('now') WHERE staff_id = ?"
         params = (staff_name, staff_email, staff_contact, staff_id)
         self._execute_prepared_statement(statement, params)
 
@@ -102,11 +123,11 @@ class BankOperation(DatabaseManager):
         self._execute_prepared_statement(statement, params)
 
     def get_staffs(self, bank_registration_number):
-        statement = "SELECT * FROM BankStaff WHERE bank_registration_number = ?"
+        statement = "SELECT * FROM BankStaff WHERE bank_id = ?"
         params = (bank_registration_number,)
-        return self._prepare_statement(statement).execute(params).fetchall()
+        return self._read_all(statement, params)
 
     def get_staff_by_id(self, staff_id):
         statement = "SELECT * FROM BankStaff WHERE staff_id = ?"
         params = (staff_id,)
-        return self._prepare_statement(statement).execute(params).fetchone()
+        return self._read_one(statement, params)
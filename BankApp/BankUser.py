@@ -1,8 +1,9 @@
 from datetime import datetime
 import enum
-import uuid
+import sqlite3
 from BankApp.BankOp import BankOperation
-import bcrypt
+from BankApp.instrumentation import timed_operation
+from BankApp.passwordHasher import HasherBusyError, default_hasher
 
 
 class AccountStatus(enum.Enum):
@@ -18,39 +19,53 @@ class AccountType(enum.Enum):
     RECURRING_DEPOSIT = 4
 
 class UserOperations(BankOperation):
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, password_hasher=None):
         super().__init__(db_manager)
+        # bcrypt runs on this hasher's worker pool, never while a pooled connection is checked out
+        self.password_hasher = password_hasher or default_hasher()
 
-    def register_user(self, username, password, first_name, last_name, bank_name, email):
-        with self.db_manager.pool.item() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT 1 FROM users WHERE username = ?", (username,))
-                if cursor.fetchone() is not None:
-                    return "Username already exists in this bank."
-                user_account_number = uuid.uuid4().hex[:8]
+    def _hash_password(self, password):
+        if not self.instrumentation.enabled:
+            return self.password_hasher.hash(password)
+        return self.instrumentation.time("bcrypt_seconds", self.password_hasher.hash, password, labels={"op": "hash"})
 
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    def _verify_password(self, password, hashed):
+        if not self.instrumentation.enabled:
+            return self.password_hasher.verify(password, hashed)
+        return self.instrumentation.time("bcrypt_seconds", self.password_hasher.verify, password, hashed,
+                                         labels={"op": "verify"})
 
-                # Retrieve the bank_registration_number based on the bank_name
-                cursor.execute("SELECT bank_registration_number FROM banks WHERE bank_name = ?", (bank_name,))
-                bank_registration_number = cursor.fetchone()
+    @timed_operation
+    def register_user(self, username, password, first_name, last_name, bank_name, email):
+        # Cheap checks first, so rejected registrations never pay for bcrypt
+        if self._read_one("SELECT 1 FROM users WHERE username = ?", (username,)) is not None:
+            return "Username already exists in this bank."
 
-                if bank_registration_number is None:
-                    return "Bank not found."
+        # Retrieve the bank_registration_number based on the bank_name
+        bank_registration_number = self._bank_registration_number(bank_name)
+        if bank_registration_number is None:
+            return "Bank not found."
 
-                account_type_value = AccountType.SAVING.value
-                account_status_value = AccountStatus.ACTIVE.value
-                created_at = datetime.datetime.now().strftime('%Y-%m-%d - %H:%M:%S')
-                updated_at = datetime.datetime.now().strftime('%Y-%m-%d - %H:%M:%S')
+        hashed_password = self._hash_password(password)
 
-                cursor.execute(
-                    """
-                    INSERT INTO users (username, password, first_name, last_name, bank_id, email, account_type, status, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (username, hashed_password, first_name, last_name, bank_registration_number[0], email, account_type_value, account_status_value, created_at, updated_at)
-                )
-                conn.commit()
+        account_type_value = AccountType.SAVING.name.lower()
+        account_status_value = AccountStatus.ACTIVE.name.lower()
+        created_at = datetime.now().strftime('%Y-%m-%d - %H:%M:%S')
+        updated_at = created_at
+
+        with self.db_manager.pool.item() as conn:
+            with conn.cursor() as cursor:
+                try:
+                    cursor.execute(
+                        """
+                        INSERT INTO users (username, password, first_name, last_name, bank_id, email, account_type, status, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (username, hashed_password, first_name, last_name, bank_registration_number, email, account_type_value, account_status_value, created_at, updated_at)
+                    )
+                except sqlite3.IntegrityError:
+                    # Someone registered the same username while we were hashing
+                    return "Username already exists in this bank."
         return "User registration successful!"
     
     def update_user(self, user_account_number, username, first_name, last_name, email, account_type):
@@ -90,51 +105,70 @@ class UserOperations(BankOperation):
         return "User deleted successfully."
     
     def __del__(self):
-        self.db_manager.close()
+        # Only close the pool if this instance opened it
+        if getattr(self, "db_manager", None) is self:
+            self.db_manager.close()
     
+    @timed_operation
     def login(self, username, password):
         try:
-            with self.db_manager.pool.item() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT password, bank_id, account_type, status FROM users WHERE username = ?", (username,))
-                    user_data = cursor.fetchone()
-    
-                    if user_data is None:
-                        return None
-    
-                    hashed_password = user_data['password'].encode('utf-8')
-                    if not bcrypt.checkpw(password.encode('utf-8'), hashed_password):
-                        return None
-    
-                    # Remove the password from user_data before returning
-                    del user_data['password']
-                    return user_data
+            # Fetch the hash and give the connection back before verifying it
+            user_data = self._read_one(
+                "SELECT user_account_number, password, bank_id, account_type, status FROM users WHERE username = ?", (username,))
+
+            if user_data is None:
+                return None
+
+            stored_password = user_data['password']
+            if not self._verify_password(password, stored_password):
+                return None
+
+            if self.password_hasher.needs_rehash(stored_password):
+                self._rehash_password(username, password, stored_password)
+
+            # Remove the password from user_data before returning
+            user_data = dict(user_data)
+            del user_data['password']
+            return user_data
+        except HasherBusyError:
+            # Let the caller shed load instead of reporting bad credentials
+            raise
         except Exception as e:
             # Log the exception or handle it as needed
             return None
+
+    def _rehash_password(self, username, password, stored_password):
+        """Upgrade a hash made with an old cost, unless the password changed meanwhile."""
+        new_hash = self._hash_password(password)
+        self._execute_prepared_statement(
+            "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+            (new_hash, username, stored_password)
+        )
         
     def logout(self, username):
         return "User logged out successfully."
     
+    @timed_operation
     def reset_password(self, username, new_password, old_password):
+        # Retrieve the current hashed password for the username
+        user_record = self._read_one("SELECT password FROM users WHERE username = ?", (username,))
+        if user_record is None:
+            return "User not found."
+
+        # Check if the provided old password matches the stored hashed password
+        if not self._verify_password(old_password, user_record['password']):
+            return "Old password is incorrect."
+
         # Hash the new password
-        hashed_new_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-    
-        with self.db_manager.pool.item() as conn:
-            with conn.cursor() as cursor:
-                # Retrieve the current hashed password for the username
-                cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
-                user_record = cursor.fetchone()
-                if user_record is None:
-                    return "User not found."
-    
-                # Check if the provided old password matches the stored hashed password
-                if not bcrypt.checkpw(old_password.encode('utf-8'), user_record['password'].encode('utf-8')):
-                    return "Old password is incorrect."
-   
-                # Update the database with the new hashed password
-                cursor.execute("UPDATE users SET password = ? WHERE username = ?", (hashed_new_password, username))
-                conn.commit()
+        hashed_new_password = self._hash_password(new_password)
+
+        # Only replace the hash we verified against, in case of a concurrent reset
+        updated = self._execute_prepared_statement(
+            "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+            (hashed_new_password, username, user_record['password'])
+        )
+        if updated != 1:
+            return "Password was changed concurrently, please try again."
         return "Password reset successful!"
 
     
@@ -142,13 +176,13 @@ class UserOperations(BankOperation):
         # Prepare the SQL statement and parameters
         statement = "SELECT * FROM users WHERE username = ?"
         params = (username,)
-        return self._prepare_statement(statement).execute(params).fetchone()
+        return self._read_one(statement, params)
 
     def get_user_by_id(self, user_id):
         # Prepare the SQL statement and parameters
-        statement = "SELECT * FROM users WHERE user_id = ?"
+        statement = "SELECT * FROM users WHERE user_account_number = ?"
         params = (user_id,)
-        return self._prepare_statement(statement).execute(params).fetchone()
+        return self._read_one(statement, params)
     
     def change_user_status(self, user_id, status, admin_id):
         try:
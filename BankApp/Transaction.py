@@ -1,29 +1,95 @@
 #!/usr/bin/env python3
 
-import uuid
+from decimal import Decimal, InvalidOperation
 from BankApp.BankUser import UserOperations
+from BankApp.instrumentation import timed_operation
 from datetime import datetime, timezone
 
+# Balances and amounts are stored as integer cents
+MINOR_UNITS = 100
+
+
+def to_minor_units(amount):
+    """Convert a positive currency amount to integer minor units."""
+    try:
+        minor = Decimal(str(amount)) * MINOR_UNITS
+    except InvalidOperation:
+        raise ValueError("Invalid amount")
+    if not minor.is_finite():
+        raise ValueError("Invalid amount")
+    if minor != minor.to_integral_value():
+        raise ValueError("Amount can't have more than two decimal places")
+    if minor <= 0:
+        raise ValueError("Amount must be positive")
+    return int(minor)
+
+
+def from_minor_units(amount_minor):
+    """Convert integer minor units back to a Decimal currency amount."""
+    return Decimal(amount_minor) / MINOR_UNITS
+
+
+def _as_timestamp(value):
+    """Return ``value`` as an ISO 8601 UTC string comparable with journal timestamps.
+
+    Journal timestamps always carry microseconds, so they all have the same
+    length and compare correctly as strings. ISO strings are normalized the
+    same way; other strings are passed through.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+    return value
+
+
+def _utc_now():
+    """The current time as a journal timestamp."""
+    return _as_timestamp(datetime.now(timezone.utc))
+
+
+def _batched(items, size):
+    """Yield successive lists of at most ``size`` items."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 class TransactionOperations(UserOperations):
+    JOURNAL_INSERT = "INSERT INTO journal (debit_account, credit_account, amount_minor, kind, description, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+    CHECKPOINT_INSERT = "INSERT OR REPLACE INTO balance_checkpoints (account, entry_id, created_at, balance_minor) VALUES (?, ?, ?, ?)"
+    # Journal entries per account between automatic balance checkpoints
+    CHECKPOINT_INTERVAL = 100
 
-    def __init__(self, db_manager):
-        self.db_manager = db_manager
+    def __init__(self, db_manager, password_hasher=None):
+        super().__init__(db_manager, password_hasher)
 
+    @timed_operation
     def transfer_money(self, sender_id, receiver_account_number, receiver_bank_name, amount, description):
+        amount_minor = to_minor_units(amount)
         with self.db_manager.pool.item() as conn:
             with conn.cursor() as cursor:
                 try:
-                    # Begin a transaction
-                    conn.begin()
+                    # Take the write lock up front so no other writer can slip in between our reads and updates
+                    conn.begin("IMMEDIATE")
 
                     # Retrieve sender details
                     sender = self._get_user_details(cursor, sender_id)
 
                     # Validate sender
-                    self._validate_sender(sender, amount)
-
-                    if sender_id == receiver_account_number:
+                    self._validate_sender(sender, amount_minor)
+
+                    # Account numbers may arrive as strings (e.g. from the CLI)
+                    try:
+                        receiver_account_number = int(receiver_account_number)
+                    except (TypeError, ValueError):
+                        raise ValueError("Receiver not found")
+                    if int(sender['user_account_number']) == receiver_account_number:
                         raise ValueError("You can't transfer money to yourself")
 
                     # Retrieve receiver details using bank name and account number
@@ -33,18 +99,7 @@ class TransactionOperations(UserOperations):
                     # Validate receiver
                     self._validate_receiver(receiver)
 
-                    # Perform the transfer
-                    new_sender_balance = sender['balance'] - amount
-                    new_receiver_balance = receiver['balance'] + amount
-
-                    # Update balances
-                    self._update_sender_balance(cursor, sender, new_sender_balance)
-                    self._update_receiver_balance(
-                        cursor, receiver, new_receiver_balance)
-
-                    # Insert transaction history
-                    self._insert_transaction_history(
-                        cursor, sender, receiver, amount, description)
+                    self._post_transfer(cursor, sender, receiver, amount_minor, description)
 
                     # Commit the transaction
                     conn.commit()
@@ -54,19 +109,175 @@ class TransactionOperations(UserOperations):
                     conn.rollback()
                     raise e
 
-    def _get_user_details(self, cursor, user_identifier):
-        """Retrieve user details."""
-        cursor.execute(
-            "SELECT * FROM users WHERE username = ? OR user_account_number = ?",
-            (user_identifier, user_identifier)
-        )
-        return cursor.fetchone()
+    @timed_operation
+    def transfer_many(self, transfers, chunk_size=500):
+        """Apply a batch of transfers, committing once per ``chunk_size`` items.
+
+        Each item is a dict with the transfer_money argument names, or a tuple
+        in the same order. Returns one result dict per item, in input order,
+        with ``status`` set to ``"ok"`` or ``"error"`` (plus an ``error`` message),
+        so one bad row does not abort the rest of the batch.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        results = []
+        chunk = []
+        for index, item in enumerate(transfers):
+            try:
+                chunk.append(self._normalize_transfer(index, item))
+                results.append({"index": index, "status": "ok"})
+            except (ValueError, TypeError, KeyError) as e:
+                results.append({"index": index, "status": "error", "error": str(e)})
+            if len(chunk) >= chunk_size:
+                self._apply_transfer_chunk(chunk, results)
+                chunk = []
+        if chunk:
+            self._apply_transfer_chunk(chunk, results)
+        return results
+
+    def _normalize_transfer(self, index, item):
+        """Validate one batch item and convert it to a transfer dict."""
+        if isinstance(item, dict):
+            transfer = {key: item[key] for key in ("sender_id", "receiver_account_number", "receiver_bank_name", "amount")}
+            transfer["description"] = item.get("description", "")
+        else:
+            sender_id, receiver_account_number, receiver_bank_name, amount, description = item
+            transfer = {
+                "sender_id": sender_id,
+                "receiver_account_number": receiver_account_number,
+                "receiver_bank_name": receiver_bank_name,
+                "amount": amount,
+                "description": description,
+            }
+        if str(transfer["sender_id"]) == str(transfer["receiver_account_number"]):
+            raise ValueError("You can't transfer money to yourself")
+        transfer["amount_minor"] = to_minor_units(transfer["amount"])
+        transfer["index"] = index
+        return transfer
+
+    def _apply_transfer_chunk(self, chunk, results):
+        """Apply one chunk of validated transfers in a single write transaction."""
+        with self.db_manager.pool.item() as conn:
+            with conn.cursor() as cursor:
+                try:
+                    conn.begin("IMMEDIATE")
+                    senders = self._fetch_accounts_by_identifier(cursor, {t["sender_id"] for t in chunk})
+                    receivers = self._fetch_receivers(
+                        cursor, {(t["receiver_bank_name"], t["receiver_account_number"]) for t in chunk})
+
+                    # We hold the write lock, so balances read here stay exact until commit;
+                    # replay the chunk in input order against running balances.
+                    balances = {}
+                    deltas = {}
+                    entries = []
+                    accounts = {}
+                    postings = {}
+                    last_entry = {}
+                    current_datetime = _utc_now()
+                    for transfer in chunk:
+                        result = results[transfer["index"]]
+                        try:
+                            sender = senders.get(str(transfer["sender_id"]))
+                            if sender is None:
+                                raise ValueError("Invalid sender")
+                            receiver = receivers.get((transfer["receiver_bank_name"], str(transfer["receiver_account_number"])))
+                            sender_account = sender['user_account_number']
+                            running = balances.setdefault(sender_account, sender['balance_minor'])
+                            self._validate_sender(dict(sender, balance_minor=running), transfer["amount_minor"])
+                            self._validate_receiver(receiver)
+                            receiver_account = receiver['user_account_number']
+                            if sender_account == receiver_account:
+                                raise ValueError("You can't transfer money to yourself")
+                        except ValueError as e:
+                            result.update(status="error", error=str(e))
+                            continue
+
+                        amount_minor = transfer["amount_minor"]
+                        balances[sender_account] = running - amount_minor
+                        balances[receiver_account] = balances.get(receiver_account, receiver['balance_minor']) + amount_minor
+                        deltas[sender_account] = deltas.get(sender_account, 0) - amount_minor
+                        deltas[receiver_account] = deltas.get(receiver_account, 0) + amount_minor
+                        entries.append((sender_account, receiver_account, amount_minor, 'transfer',
+                                        transfer["description"], current_datetime))
+                        accounts[sender_account] = sender
+                        accounts[receiver_account] = receiver
+                        postings[sender_account] = postings.get(sender_account, 0) + 1
+                        postings[receiver_account] = postings.get(receiver_account, 0) + 1
+                        last_entry[sender_account] = last_entry[receiver_account] = len(entries)
+
+                    # Net balance changes, applied in account order so concurrent batches lock rows the same way
+                    cursor.executemany(
+                        "UPDATE users SET balance_minor = balance_minor + ? WHERE user_account_number = ?",
+                        [(delta, account) for account, delta in sorted(deltas.items()) if delta]
+                    )
+                    # Rowids are allocated as MAX(rowid) + 1 and we hold the write lock,
+                    # so the batch's entries get consecutive ids after the current maximum.
+                    cursor.execute("SELECT COALESCE(MAX(entry_id), 0) FROM journal")
+                    last_id = cursor.fetchone()[0]
+                    cursor.executemany(self.JOURNAL_INSERT, entries)
+                    self._track_checkpoints(cursor, [
+                        (accounts[account], count, balances[account], last_id + last_entry[account])
+                        for account, count in sorted(postings.items())
+                    ], current_datetime)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    for transfer in chunk:
+                        results[transfer["index"]].update(status="error", error=f"Batch chunk failed: {e}")
+
+    def _fetch_accounts_by_identifier(self, cursor, identifiers):
+        """Look up accounts by username or account number; keys are the identifiers as strings."""
+        accounts = {}
+        identifiers = [str(identifier) for identifier in identifiers]
+        for batch in _batched(identifiers, 500):
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f"SELECT * FROM users WHERE username IN ({placeholders})", batch)
+            for row in cursor.fetchall():
+                accounts[row['username']] = row
+            numbers = [int(identifier) for identifier in batch if identifier not in accounts and identifier.isdigit()]
+            if numbers:
+                placeholders = ", ".join("?" * len(numbers))
+                cursor.execute(f"SELECT * FROM users WHERE user_account_number IN ({placeholders})", numbers)
+                for row in cursor.fetchall():
+                    accounts.setdefault(str(row['user_account_number']), row)
+        return accounts
+
+    def _fetch_receivers(self, cursor, keys):
+        """Look up receivers by (bank name, account number); keys use the account number as a string."""
+        receivers = {}
+        bank_ids = {}
+        for bank_name in {bank_name for bank_name, _ in keys}:
+            bank_id = self._bank_registration_number(bank_name, cursor)
+            if bank_id is not None:
+                bank_ids[bank_name] = bank_id
+        numbers = sorted({int(account) for _, account in keys if str(account).isdigit()})
+        rows = {}
+        for batch in _batched(numbers, 500):
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f"SELECT * FROM users WHERE user_account_number IN ({placeholders})", batch)
+            for row in cursor.fetchall():
+                rows[row['user_account_number']] = row
+        for bank_name, account in keys:
+            row = rows.get(int(account)) if str(account).isdigit() else None
+            if row is not None and bank_name in bank_ids and row['bank_id'] == bank_ids[bank_name]:
+                receivers[(bank_name, str(account))] = row
+        return receivers
 
-    def _validate_sender(self, sender, amount):
+    def _get_user_details(self, cursor, user_identifier):
+        """Retrieve user details by username or account number."""
+        # Two index probes instead of one OR predicate, which SQLite cannot serve from the primary key
+        cursor.execute("SELECT * FROM users WHERE username = ?", (user_identifier,))
+        user = cursor.fetchone()
+        if user is None and str(user_identifier).isdigit():
+            cursor.execute("SELECT * FROM users WHERE user_account_number = ?", (int(user_identifier),))
+            user = cursor.fetchone()
+        return user
+
+    def _validate_sender(self, sender, amount_minor):
         """Validate sender details."""
         if not sender:
             raise ValueError("Invalid sender")
-        if sender['balance'] < amount:
+        if sender['balance_minor'] < amount_minor:
             raise ValueError("Insufficient balance")
         if sender['status'] != 'active':
             raise ValueError("Account under review")
@@ -78,11 +289,15 @@ class TransactionOperations(UserOperations):
 
     def _get_receiver_details(self, cursor, bank_name, account_number):
         """Retrieve receiver details."""
-        cursor.execute(
-            "SELECT * FROM users WHERE bank_id = (SELECT bank_registration_number FROM banks WHERE bank_name = ?) AND user_account_number = ?",
-            (bank_name, account_number)
-        )
-        return cursor.fetchone()
+        # The bank normally comes from the bank directory, leaving one primary-key probe
+        bank_id = self._bank_registration_number(bank_name, cursor)
+        if bank_id is None:
+            return None
+        cursor.execute("SELECT * FROM users WHERE user_account_number = ?", (account_number,))
+        receiver = cursor.fetchone()
+        if receiver is None or receiver['bank_id'] != bank_id:
+            return None
+        return receiver
 
     def _validate_receiver(self, receiver):
         """Validate receiver details."""
@@ -96,56 +311,170 @@ class TransactionOperations(UserOperations):
             raise ValueError("Receiver account frozen")
         return receiver
 
-    def _update_sender_balance(self, cursor, sender, new_balance):
-        """Update sender's balance."""
-        cursor.execute(
-            "UPDATE users SET balance = ? WHERE username = ? OR user_account_number = ?",
-            (new_balance, sender['username'], sender['user_account_number'])
-        )
-
-    def _update_receiver_balance(self, cursor, receiver, new_balance):
-        """Update receiver's balance."""
+    def _post_transfer(self, cursor, sender, receiver, amount_minor, description):
+        """Move money between two validated account rows and journal it; returns the entry id."""
+        # Update balances in place; the debit only applies if the funds are still there
+        self._debit_account(cursor, sender['user_account_number'], amount_minor)
+        self._credit_account(cursor, receiver['user_account_number'], amount_minor)
+
+        # Record both legs in one journal entry
+        current_datetime = _utc_now()
+        entry_id = self._post_journal_entry(
+            cursor, sender['user_account_number'], receiver['user_account_number'],
+            amount_minor, 'transfer', description, current_datetime)
+        self._track_checkpoints(cursor, [
+            (sender, 1, sender['balance_minor'] - amount_minor, entry_id),
+            (receiver, 1, receiver['balance_minor'] + amount_minor, entry_id),
+        ], current_datetime)
+        return entry_id
+
+    def _debit_account(self, cursor, account_number, amount_minor):
+        """Subtract from a balance, failing instead of going below zero."""
         cursor.execute(
-            "UPDATE users SET balance = ? WHERE username = ? OR user_account_number = ?",
-            (new_balance, receiver['username'],
-             receiver['user_account_number'])
+            "UPDATE users SET balance_minor = balance_minor - ? WHERE user_account_number = ? AND balance_minor >= ?",
+            (amount_minor, account_number, amount_minor)
         )
+        if cursor.rowcount != 1:
+            raise ValueError("Insufficient balance")
 
-    def _insert_transaction_history(self, cursor, sender, receiver, amount, description):
-        """Insert transaction history."""
-        sender_transaction_id = str(uuid.uuid4())
-        receiver_transaction_id = str(uuid.uuid4())
-        current_datetime = datetime.now(timezone.utc).isoformat()
-        sender_transaction_description = description + \
-            ' to ' + receiver['username']
-        receiver_transaction_description = 'Transfer from ' + \
-            sender['username']
-
+    def _credit_account(self, cursor, account_number, amount_minor):
+        """Add to a balance."""
         cursor.execute(
-            "INSERT INTO transactions (transaction_id, sender_user_id, receiver_user_id, amount, description, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (sender_transaction_id, sender['user_account_number'], receiver['user_account_number'], -
-             amount, sender_transaction_description, current_datetime)
+            "UPDATE users SET balance_minor = balance_minor + ? WHERE user_account_number = ?",
+            (amount_minor, account_number)
         )
+        if cursor.rowcount != 1:
+            raise ValueError("Account not found")
 
+    def _post_journal_entry(self, cursor, debit_account, credit_account, amount_minor, kind, description, current_datetime):
+        """Insert one journal row holding both legs of a money movement."""
         cursor.execute(
-            "INSERT INTO transactions (transaction_id, sender_user_id, receiver_user_id, amount, description, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (receiver_transaction_id, sender['user_account_number'], receiver['user_account_number'],
-             amount, receiver_transaction_description, current_datetime)
+            self.JOURNAL_INSERT,
+            (debit_account, credit_account, amount_minor, kind, description, current_datetime)
         )
+        return cursor.lastrowid
+
+    def _track_checkpoints(self, cursor, postings, current_datetime):
+        """Advance per-account entry counters and checkpoint accounts that reached the interval.
+
+        ``postings`` holds (account row read in this transaction, entries posted,
+        balance after them, id of the last of them) per account.
+        """
+        counters = []
+        checkpoints = []
+        for account, entries, balance_minor, entry_id in postings:
+            count = account['entries_since_checkpoint'] + entries
+            if count >= self.CHECKPOINT_INTERVAL:
+                checkpoints.append((account['user_account_number'], entry_id, current_datetime, balance_minor))
+                count = 0
+            counters.append((count, account['user_account_number']))
+        cursor.executemany("UPDATE users SET entries_since_checkpoint = ? WHERE user_account_number = ?", counters)
+        cursor.executemany(self.CHECKPOINT_INSERT, checkpoints)
+
+    @timed_operation
+    def checkpoint_balances(self):
+        """Checkpoint every account with entries since its last checkpoint; returns how many were written."""
+        with self.db_manager.pool.item() as conn:
+            with conn.cursor() as cursor:
+                try:
+                    conn.begin("IMMEDIATE")
+                    current_datetime = _utc_now()
+                    cursor.execute("SELECT COALESCE(MAX(entry_id), 0) FROM journal")
+                    last_id = cursor.fetchone()[0]
+                    cursor.execute(
+                        """
+                        INSERT OR REPLACE INTO balance_checkpoints (account, entry_id, created_at, balance_minor)
+                        SELECT user_account_number, ?, ?, balance_minor FROM users WHERE entries_since_checkpoint > 0
+                        """,
+                        (last_id, current_datetime)
+                    )
+                    written = cursor.rowcount
+                    cursor.execute("UPDATE users SET entries_since_checkpoint = 0 WHERE entries_since_checkpoint > 0")
+                    conn.commit()
+                    return written
+                except Exception as e:
+                    conn.rollback()
+                    raise e
 
+    @timed_operation
+    def get_statement(self, account_number, start, end):
+        """Return the statement for ``account_number`` between ``start`` (inclusive) and ``end`` (exclusive).
+
+        ``start`` and ``end`` are datetimes (naive ones are taken as UTC) or ISO
+        8601 strings. The opening balance is rebuilt from the nearest checkpoint
+        before ``start`` plus the few journal entries after it.
+        """
+        start, end = _as_timestamp(start), _as_timestamp(end)
+        with self.read_pool.item() as conn:
+            # One read transaction so the balance and the lines come from the same snapshot
+            conn.begin()
+            try:
+                opening = self._balance_before(conn, account_number, start)
+                lines = conn.execute_cached(
+                    "SELECT * FROM account_statement WHERE account = ? AND created_at >= ? AND created_at < ? ORDER BY created_at, entry_id",
+                    (account_number, start, end)
+                ).fetchall()
+            finally:
+                conn.commit()
+
+        balance = opening
+        statement_lines = []
+        for line in lines:
+            balance += line['amount_minor']
+            statement_lines.append(dict(line, balance_minor=balance))
+        return {
+            "account": account_number,
+            "start": start,
+            "end": end,
+            "opening_balance_minor": opening,
+            "closing_balance_minor": balance,
+            "lines": statement_lines,
+        }
+
+    def get_balance_as_of(self, account_number, when):
+        """Return the balance of ``account_number`` in minor units just before ``when``."""
+        with self.read_pool.item() as conn:
+            conn.begin()
+            try:
+                return self._balance_before(conn, account_number, _as_timestamp(when))
+            finally:
+                conn.commit()
+
+    def _balance_before(self, conn, account_number, timestamp):
+        """Nearest checkpoint before ``timestamp`` plus the journal entries between them."""
+        checkpoint = conn.execute_cached(
+            "SELECT * FROM balance_checkpoints WHERE account = ? AND created_at < ? ORDER BY created_at DESC, entry_id DESC LIMIT 1",
+            (account_number, timestamp)
+        ).fetchall()
+        if checkpoint:
+            balance, entry_id, since = checkpoint[0]['balance_minor'], checkpoint[0]['entry_id'], checkpoint[0]['created_at']
+        else:
+            # Accounts without a checkpoint started from zero
+            balance, entry_id, since = 0, 0, ""
+        # Straight from the journal rather than the statement view, so both sums are covering-index scans
+        movement = conn.execute_cached(
+            "SELECT (SELECT COALESCE(SUM(amount_minor), 0) FROM journal WHERE credit_account = ? AND created_at >= ? AND created_at < ? AND entry_id > ?)"
+            " - (SELECT COALESCE(SUM(amount_minor), 0) FROM journal WHERE debit_account = ? AND created_at >= ? AND created_at < ? AND entry_id > ?)",
+            (account_number, since, timestamp, entry_id) * 2
+        ).fetchall()
+        return balance + movement[0][0]
+
+    def get_account_entries(self, account_number, limit=50):
+        """Return the newest statement lines for an account, derived from the journal."""
+        statement = "SELECT * FROM account_statement WHERE account = ? ORDER BY created_at DESC, entry_id DESC LIMIT ?"
+        return self._read_all(statement, (account_number, limit))
+
+    @timed_operation
     def deposit_money(self, user_id, amount):
+        amount_minor = to_minor_units(amount)
         with self.db_manager.pool.item() as conn:
             with conn.cursor() as cursor:
                 try:
                     # Begin a transaction
-                    conn.begin()
+                    conn.begin("IMMEDIATE")
 
                     # Retrieve user details
-                    cursor.execute(
-                        "SELECT * FROM users WHERE username = ? OR account_number = ?",
-                        (user_id, user_id)
-                    )
-                    user = cursor.fetchone()
+                    user = self._get_user_details(cursor, user_id)
 
                     # Check if user is valid and has an active status
                     if not user:
@@ -154,23 +483,14 @@ class TransactionOperations(UserOperations):
                         raise ValueError("Account under review")
 
                     # Perform the deposit
-                    new_balance = user['balance'] + amount
-                    cursor.execute(
-                        "UPDATE users SET balance = ? WHERE username = ? OR user_account_number = ?",
-                        (new_balance, user['username'],
-                         user['user_account_number'])
-                    )
+                    self._credit_account(cursor, user['user_account_number'], amount_minor)
 
-                    # Insert transaction history
-                    transaction_id = str(uuid.uuid4())
-                    current_datetime = datetime.now(timezone.utc).isoformat()
-                    transaction_type = 'credit'
-                    transaction_description = 'Deposit'
-                    cursor.execute(
-                        "INSERT INTO transactions (transaction_id, user_id, amount, type, description, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                        (transaction_id, user['user_account_number'], amount,
-                         transaction_type, transaction_description, current_datetime)
-                    )
+                    # Record the deposit; it has no debit leg inside the bank
+                    current_datetime = _utc_now()
+                    entry_id = self._post_journal_entry(
+                        cursor, None, user['user_account_number'], amount_minor, 'deposit', 'Deposit', current_datetime)
+                    self._track_checkpoints(
+                        cursor, [(user, 1, user['balance_minor'] + amount_minor, entry_id)], current_datetime)
 
                     # Commit the transaction
                     conn.commit()
@@ -180,19 +500,17 @@ class TransactionOperations(UserOperations):
                     conn.rollback()
                     raise e
 
+    @timed_operation
     def withdraw_money(self, user_id, amount):
+        amount_minor = to_minor_units(amount)
         with self.db_manager.pool.item() as conn:
             with conn.cursor() as cursor:
                 try:
                     # Begin a transaction
-                    conn.begin()
+                    conn.begin("IMMEDIATE")
 
                     # Retrieve user details
-                    cursor.execute(
-                        "SELECT * FROM users WHERE username = ? OR account_number = ?",
-                        (user_id, user_id)
-                    )
-                    user = cursor.fetchone()
+                    user = self._get_user_details(cursor, user_id)
 
                     # Check if user is valid and has an active status
                     if not user:
@@ -202,23 +520,14 @@ class TransactionOperations(UserOperations):
                             "Account under review, please contact support")
 
                     # Perform the withdrawal
-                    new_balance = user['balance'] - amount
-                    cursor.execute(
-                        "UPDATE users SET balance = ? WHERE username = ? OR user_account_number = ?",
-                        (new_balance, user['username'],
-                         user['user_account_number'])
-                    )
-
-                    # Insert transaction history
-                    transaction_id = str(uuid.uuid4())
-                    current_datetime = datetime.now(timezone.utc).isoformat()
-                    transaction_type = 'debit'
-                    transaction_description = 'Withdrawal'
-                    cursor.execute(
-                        "INSERT INTO transactions (transaction_id, user_id, amount, type, description, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                        (transaction_id, user['user_account_number'], -amount,
-                         transaction_type, transaction_description, current_datetime)
-                    )
+                    self._debit_account(cursor, user['user_account_number'], amount_minor)
+
+                    # Record the withdrawal; it has no credit leg inside the bank
+                    current_datetime = _utc_now()
+                    entry_id = self._post_journal_entry(
+                        cursor, user['user_account_number'], None, amount_minor, 'withdrawal', 'Withdrawal', current_datetime)
+                    self._track_checkpoints(
+                        cursor, [(user, 1, user['balance_minor'] - amount_minor, entry_id)], current_datetime)
 
                     # Commit the transaction
                     conn.commit()
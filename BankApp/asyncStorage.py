@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from BankApp.fileStorage import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    """Runs blocking DatabaseManager work off the asyncio event loop.
+
+    Writes are queued on one dedicated writer thread: SQLite admits a single
+    writer at a time, so extra writer threads would only wait on its lock.
+    Reads run on a thread pool sized like the manager's read connection pool.
+    """
+
+    def __init__(self, db_manager="bank.db", **kwargs) -> None:
+        """Wrap an existing DatabaseManager, or open one for the given path."""
+        if not isinstance(db_manager, DatabaseManager):
+            db_manager = DatabaseManager(db_manager, **kwargs)
+        self.db_manager = db_manager
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bank-writer")
+        self._readers = ThreadPoolExecutor(max_workers=db_manager.read_pool_size,
+                                           thread_name_prefix="bank-reader")
+
+    async def run_write(self, func, *args, **kwargs):
+        """Run ``func`` on the writer thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, partial(func, *args, **kwargs))
+
+    async def run_read(self, func, *args, **kwargs):
+        """Run ``func`` on a reader thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, partial(func, *args, **kwargs))
+
+    async def close(self) -> None:
+        """Wait for queued work, stop the executors and close the connection pools."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.db_manager.close()
+
+    async def __aenter__(self) -> "AsyncDatabaseManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
@@ -0,0 +1,453 @@
+"""One storage interface over the three persistence paths.
+
+Banks, accounts and the ledger can live in SQLite (``BankApp``'s schema and
+journal), in the JSON bank file (``practice``'s repository and history
+store) or in memory. Callers and benchmarks talk to a StorageBackend and
+pick the implementation by name:
+
+    backend = open_backend("sqlite", path="bank.db")
+
+``BANK_BACKEND`` sets the default name. Amounts are integer minor units
+(cents) everywhere, failures raise ValueError, and ledger entries have the
+columns of the ``account_statement`` view: ``entry_id``, ``account``,
+signed ``amount_minor``, ``type`` ("debit"/"credit"), ``kind``,
+``description``, ``counterparty`` and ``created_at``, newest first.
+"""
+import itertools
+import os
+import secrets
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _check_amount(amount_minor) -> int:
+    if not isinstance(amount_minor, int) or amount_minor <= 0:
+        raise ValueError("Amount must be a positive number of minor units")
+    return amount_minor
+
+
+def _statement_lines(entry_id, debit, credit, amount_minor, kind, description, created_at):
+    """The per-account lines of one journal entry, keyed by account."""
+    lines = {}
+    if debit is not None:
+        lines[debit] = {"entry_id": entry_id, "account": debit, "amount_minor": -amount_minor, "type": "debit",
+                        "kind": kind, "description": description, "counterparty": credit, "created_at": created_at}
+    if credit is not None:
+        lines[credit] = {"entry_id": entry_id, "account": credit, "amount_minor": amount_minor, "type": "credit",
+                         "kind": kind, "description": description, "counterparty": debit, "created_at": created_at}
+    return lines
+
+
+class StorageBackend:
+    """Banks, accounts and their ledger behind one interface.
+
+    Accounts are returned as dicts with at least ``id``, ``bank_id``,
+    ``name``, ``balance_minor`` and ``status``. An opening balance given to
+    ``create_account`` is journaled as a deposit, so balances always equal
+    the sum of the account's entries.
+    """
+
+    name = None
+
+    def create_bank(self, name: str, **fields):
+        """Create a bank and return its id; bank names are unique."""
+        raise NotImplementedError
+
+    def get_bank(self, bank_id) -> dict:
+        """Return the bank, or None."""
+        raise NotImplementedError
+
+    def list_banks(self) -> list:
+        """Return ``(bank_id, name)`` pairs."""
+        raise NotImplementedError
+
+    def create_account(self, bank_id, name: str, balance_minor: int = 0, **fields) -> int:
+        """Open an active account at ``bank_id`` and return its id.
+
+        Give every account a distinct ``name``: SQLite stores it as the
+        unique username and rejects repeats.
+        """
+        raise NotImplementedError
+
+    def get_account(self, account_id) -> dict:
+        """Return the account, or None."""
+        raise NotImplementedError
+
+    def get_balance(self, account_id) -> int:
+        account = self.get_account(account_id)
+        if account is None:
+            raise ValueError("Account not found")
+        return account["balance_minor"]
+
+    def transfer(self, debit_account, credit_account, amount_minor: int, description: str = "") -> None:
+        raise NotImplementedError
+
+    def deposit(self, account_id, amount_minor: int) -> None:
+        raise NotImplementedError
+
+    def withdraw(self, account_id, amount_minor: int) -> None:
+        raise NotImplementedError
+
+    def entries(self, account_id, limit: int = 50) -> list:
+        """Return the newest ``limit`` ledger lines of an account."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MemoryBackend(StorageBackend):
+    """Dicts guarded by one lock; nothing is persisted. The baseline the others are measured against."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._entry_ids = itertools.count(1)
+        self._banks = {}
+        self._bank_names = set()
+        self._accounts = {}
+        # account id -> its statement lines, oldest first
+        self._lines = {}
+
+    def create_bank(self, name, **fields):
+        with self._lock:
+            if name in self._bank_names:
+                raise ValueError("Bank already exists")
+            bank_id = next(self._ids)
+            self._banks[bank_id] = dict(fields, id=bank_id, name=name, created_at=_now())
+            self._bank_names.add(name)
+            return bank_id
+
+    def get_bank(self, bank_id):
+        with self._lock:
+            bank = self._banks.get(bank_id)
+            return dict(bank) if bank is not None else None
+
+    def list_banks(self):
+        with self._lock:
+            return [(bank_id, bank["name"]) for bank_id, bank in self._banks.items()]
+
+    def create_account(self, bank_id, name, balance_minor=0, **fields):
+        with self._lock:
+            if bank_id not in self._banks:
+                raise ValueError("Bank not found")
+            account_id = next(self._ids)
+            self._accounts[account_id] = dict(fields, id=account_id, bank_id=bank_id, name=name,
+                                              balance_minor=0, status="active")
+            self._lines[account_id] = []
+            if balance_minor:
+                self._post(None, account_id, _check_amount(balance_minor), "deposit", "Opening balance")
+            return account_id
+
+    def get_account(self, account_id):
+        with self._lock:
+            account = self._accounts.get(account_id)
+            return dict(account) if account is not None else None
+
+    def _active(self, account_id):
+        account = self._accounts.get(account_id)
+        if account is None:
+            raise ValueError("Account not found")
+        if account["status"] != "active":
+            raise ValueError("Account under review")
+        return account
+
+    def _post(self, debit, credit, amount_minor, kind, description):
+        # Caller holds the lock and has validated both accounts
+        if debit is not None:
+            if self._accounts[debit]["balance_minor"] < amount_minor:
+                raise ValueError("Insufficient balance")
+            self._accounts[debit]["balance_minor"] -= amount_minor
+        if credit is not None:
+            self._accounts[credit]["balance_minor"] += amount_minor
+        lines = _statement_lines(next(self._entry_ids), debit, credit, amount_minor, kind, description, _now())
+        for account_id, line in lines.items():
+            self._lines[account_id].append(line)
+
+    def transfer(self, debit_account, credit_account, amount_minor, description=""):
+        _check_amount(amount_minor)
+        if debit_account == credit_account:
+            raise ValueError("You can't transfer money to yourself")
+        with self._lock:
+            self._active(debit_account)
+            self._active(credit_account)
+            self._post(debit_account, credit_account, amount_minor, "transfer", description)
+
+    def deposit(self, account_id, amount_minor):
+        _check_amount(amount_minor)
+        with self._lock:
+            self._active(account_id)
+            self._post(None, account_id, amount_minor, "deposit", "Deposit")
+
+    def withdraw(self, account_id, amount_minor):
+        _check_amount(amount_minor)
+        with self._lock:
+            self._active(account_id)
+            self._post(account_id, None, amount_minor, "withdrawal", "Withdrawal")
+
+    def entries(self, account_id, limit=50):
+        with self._lock:
+            lines = self._lines.get(account_id, [])
+            return [dict(line) for line in reversed(lines[-limit:])] if limit > 0 else []
+
+
+class JsonBackend(StorageBackend):
+    """The JSON bank file through ``practice``'s BankRepository and HistoryStore.
+
+    Accounts are stored under their bank like the ones UserOperation
+    creates, with ``balance_minor`` beside them; ledger lines go to the
+    per-account history segments beside the file. Writes take the same
+    account locks and cross-process file lock as the practice operations.
+    """
+
+    name = "json"
+
+    def __init__(self, path: str = "banks.json", codec=None, durability=None) -> None:
+        from practice.historyStorage import HistoryStore
+        from practice.logStorage import LogStore
+        from practice.repository import BankRepository
+        from practice.serialization import resolve_durability
+        from practice.user import AccountState
+
+        self.path = path
+        self.durable = resolve_durability(durability) != "none"
+        self._active_state = AccountState.ACTIVE.value
+        self.store = LogStore.open(path, codec=codec, durability=durability)
+        self.repository = BankRepository.open(path, self.store)
+        self.history = HistoryStore.open(f"{path}.history", durable=self.durable)
+
+    def create_bank(self, name, **fields):
+        repository = self.repository
+        with repository.locked(durable=self.durable), repository.lock:
+            if any(bank.get("name") == name for bank in repository.banks.values()):
+                raise ValueError("Bank already exists")
+            bank_id = str(uuid.uuid4())
+            repository.banks[bank_id] = dict(fields, id=bank_id, name=name, creation_datetime=_now(), users={})
+            repository.mark_bank_created(bank_id)
+        return bank_id
+
+    def get_bank(self, bank_id):
+        repository = self.repository
+        repository.refresh()
+        with repository.lock:
+            bank = repository.banks.get(bank_id)
+            if bank is None:
+                return None
+            return {key: value for key, value in bank.items() if key != "users"}
+
+    def list_banks(self):
+        repository = self.repository
+        repository.refresh()
+        with repository.lock:
+            return [(bank_id, bank.get("name")) for bank_id, bank in repository.banks.items()]
+
+    def create_account(self, bank_id, name, balance_minor=0, **fields):
+        repository = self.repository
+        # No account lock: the id is only drawn under the file lock, so no one else can hold it yet
+        with repository.locked(durable=self.durable), repository.lock:
+            bank = repository.banks.get(bank_id)
+            if bank is None:
+                raise ValueError("Bank not found")
+            account_id = self._new_account_id()
+            bank.setdefault("users", {})[str(account_id)] = dict(
+                fields, id=account_id, name=name, balance_minor=0, state=self._active_state)
+            repository.mark_user_dirty(bank_id, account_id)
+        if balance_minor:
+            self._post(None, account_id, balance_minor, "deposit", "Opening balance")
+        return account_id
+
+    def _new_account_id(self):
+        """Draw a random account id that no bank uses yet; hold the repository lock."""
+        while True:
+            account_id = int(secrets.token_hex(4), 16)
+            if self.repository.find_account(account_id)[1] is None:
+                return account_id
+
+    def get_account(self, account_id):
+        repository = self.repository
+        repository.refresh()
+        bank_id, account = repository.find_account(account_id)
+        if account is None:
+            return None
+        with repository.lock:
+            return self._public(bank_id, account)
+
+    def _public(self, bank_id, account):
+        status = "active" if account.get("state") == self._active_state else "inactive"
+        return dict(account, bank_id=bank_id, balance_minor=account.get("balance_minor", 0), status=status)
+
+    def _post(self, debit, credit, amount_minor, kind, description):
+        _check_amount(amount_minor)
+        repository = self.repository
+        with repository.locked(debit, credit, durable=self.durable):
+            with repository.lock:
+                accounts = {}
+                for account_id in (debit, credit):
+                    if account_id is None:
+                        continue
+                    bank_id, account = repository.find_account(account_id)
+                    if account is None:
+                        raise ValueError("Account not found")
+                    if account.get("state") != self._active_state:
+                        raise ValueError("Account under review")
+                    accounts[account_id] = bank_id, account
+                if debit is not None and accounts[debit][1].get("balance_minor", 0) < amount_minor:
+                    raise ValueError("Insufficient balance")
+                for account_id, sign in ((debit, -1), (credit, 1)):
+                    if account_id is not None:
+                        bank_id, account = accounts[account_id]
+                        account["balance_minor"] = account.get("balance_minor", 0) + sign * amount_minor
+                        repository.mark_user_dirty(bank_id, account_id)
+            # Still under the file lock, so history appends stay serialized across processes
+            lines = _statement_lines(uuid.uuid4().hex, debit, credit, amount_minor, kind, description, _now())
+            self.history.append_many(lines.items())
+
+    def transfer(self, debit_account, credit_account, amount_minor, description=""):
+        if debit_account == credit_account:
+            raise ValueError("You can't transfer money to yourself")
+        self._post(debit_account, credit_account, amount_minor, "transfer", description)
+
+    def deposit(self, account_id, amount_minor):
+        self._post(None, account_id, amount_minor, "deposit", "Deposit")
+
+    def withdraw(self, account_id, amount_minor):
+        self._post(account_id, None, amount_minor, "withdrawal", "Withdrawal")
+
+    def entries(self, account_id, limit=50):
+        lines, _ = self.history.page(account_id, limit=limit)
+        return lines
+
+    def close(self):
+        self.store.close()
+
+
+class SqliteBackend(StorageBackend):
+    """``BankApp``'s SQLite schema through TransactionOperations.
+
+    Deposits and withdrawals are ``deposit_money``/``withdraw_money``
+    themselves, and transfers share ``transfer_money``'s posting step, so
+    what is measured here is the code the application runs. ``options``
+    go to DatabaseManager (pool size, storage profile, ...).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "bank.db", **options) -> None:
+        from BankApp.fileStorage import DatabaseManager
+        from BankApp.Transaction import TransactionOperations
+
+        self.path = path
+        self.db_manager = DatabaseManager(path, **options)
+        self.operations = TransactionOperations(self.db_manager)
+
+    def create_bank(self, name, **fields):
+        try:
+            return self.operations.create_bank(
+                name, fields.get("address"), fields.get("location"), fields.get("branch"), fields.get("ifsc"),
+                fields.get("contact"), fields.get("email"), fields.get("account_types"), fields.get("admin_id"))
+        except sqlite3.IntegrityError:
+            raise ValueError("Bank already exists") from None
+
+    def get_bank(self, bank_id):
+        row = self.db_manager._read_one("SELECT * FROM banks WHERE bank_registration_number = ?", (bank_id,))
+        if row is None:
+            return None
+        bank = dict(row)
+        bank.update(id=bank["bank_registration_number"], name=bank["Bank_name"])
+        return bank
+
+    def list_banks(self):
+        rows = self.db_manager._read_all("SELECT bank_registration_number, Bank_name FROM banks")
+        return [(row[0], row[1]) for row in rows]
+
+    def create_account(self, bank_id, name, balance_minor=0, **fields):
+        now = _now()
+        with self.db_manager.pool.item() as conn:
+            if conn.execute_cached("SELECT 1 FROM banks WHERE bank_registration_number = ?", (bank_id,)).fetchone() is None:
+                raise ValueError("Bank not found")
+            try:
+                cursor = conn.execute_cached(
+                    """
+                    INSERT INTO users (username, password, first_name, last_name, bank_id, email, account_type, status, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 'active', ?, ?)
+                    """,
+                    (name, fields.get("password"), fields.get("first_name"), fields.get("last_name"), bank_id,
+                     fields.get("email"), fields.get("account_type", "saving"), now, now)
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError("Account already exists") from None
+            account_id = cursor.lastrowid
+        if balance_minor:
+            self.deposit(account_id, balance_minor)
+        return account_id
+
+    def get_account(self, account_id):
+        row = self.db_manager._read_one("SELECT * FROM users WHERE user_account_number = ?", (account_id,))
+        if row is None:
+            return None
+        account = dict(row)
+        account.update(id=account["user_account_number"], name=account["username"])
+        return account
+
+    def transfer(self, debit_account, credit_account, amount_minor, description=""):
+        _check_amount(amount_minor)
+        if debit_account == credit_account:
+            raise ValueError("You can't transfer money to yourself")
+        operations = self.operations
+        with self.db_manager.pool.item() as conn:
+            with conn.cursor() as cursor:
+                try:
+                    conn.begin("IMMEDIATE")
+                    cursor.execute("SELECT * FROM users WHERE user_account_number = ?", (debit_account,))
+                    sender = operations._validate_sender(cursor.fetchone(), amount_minor)
+                    cursor.execute("SELECT * FROM users WHERE user_account_number = ?", (credit_account,))
+                    receiver = operations._validate_receiver(cursor.fetchone())
+                    operations._post_transfer(cursor, sender, receiver, amount_minor, description)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+    def deposit(self, account_id, amount_minor):
+        from BankApp.Transaction import from_minor_units
+        self.operations.deposit_money(account_id, from_minor_units(_check_amount(amount_minor)))
+
+    def withdraw(self, account_id, amount_minor):
+        from BankApp.Transaction import from_minor_units
+        self.operations.withdraw_money(account_id, from_minor_units(_check_amount(amount_minor)))
+
+    def entries(self, account_id, limit=50):
+        return [dict(row) for row in self.operations.get_account_entries(account_id, limit)]
+
+    def close(self):
+        self.db_manager.close()
+
+
+BACKENDS = {backend.name: backend for backend in (MemoryBackend, JsonBackend, SqliteBackend)}
+
+# Backend used when none is configured; BANK_BACKEND overrides it
+DEFAULT_BACKEND = os.environ.get("BANK_BACKEND", SqliteBackend.name)
+
+
+def open_backend(name: str = None, **options) -> StorageBackend:
+    """Create the backend registered as ``name`` (or the default one) with ``options``."""
+    name = name or DEFAULT_BACKEND
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend {name!r}; choose from {', '.join(BACKENDS)}") from None
+    return backend_class(**options)
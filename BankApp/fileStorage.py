@@ -1,30 +1,667 @@
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
 import sqlite3
+import threading
+import time
 import uuid
 
+from BankApp.instrumentation import BATCH, Instrumentation, SlowQueryLog, table_scans
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+class FullScanError(AssertionError):
+    """Raised by assert_indexed when a query plan falls back to a full table scan."""
+
+
+class UncoveredQueryError(FullScanError):
+    """Raised by assert_indexed(covering=True) when a query reads table rows an index could have served."""
+
+
+class _Cursor(sqlite3.Cursor):
+    """Cursor that can be used as a context manager and closes itself on exit."""
+
+    def __enter__(self) -> "_Cursor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _InstrumentedCursor(_Cursor):
+    """_Cursor that reports each statement's time and row count."""
+
+    def execute(self, statement, params=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(statement, params)
+        finally:
+            self.connection.instrumentation.statement(statement, time.perf_counter() - start, self.rowcount, params)
+
+    def executemany(self, statement, seq_of_params):
+        start = time.perf_counter()
+        try:
+            return super().executemany(statement, seq_of_params)
+        finally:
+            self.connection.instrumentation.statement(statement, time.perf_counter() - start, self.rowcount, BATCH)
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection handed out by ConnectionPool."""
+
+    # Set by DatabaseManager._connect; shared by all connections of the manager
+    instrumentation = None
+
+    def cursor(self, factory=None) -> sqlite3.Cursor:
+        """Return a cursor usable in a ``with`` block."""
+        if factory is None:
+            instrumentation = self.instrumentation
+            factory = _InstrumentedCursor if instrumentation is not None and instrumentation.enabled else _Cursor
+        return super().cursor(factory)
+
+    def commit(self) -> None:
+        instrumentation = self.instrumentation
+        if instrumentation is None or not instrumentation.enabled:
+            return super().commit()
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            instrumentation.observe("commit_seconds", time.perf_counter() - start)
+
+    def begin(self, mode: str = "DEFERRED") -> None:
+        """Start an explicit transaction (DEFERRED, IMMEDIATE or EXCLUSIVE)."""
+        self.execute(f"BEGIN {mode}")
+
+    def is_healthy(self) -> bool:
+        """Return True if the connection still answers a trivial query."""
+        try:
+            self.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def execute_cached(self, statement: str, params=()) -> sqlite3.Cursor:
+        """Execute ``statement`` on a cursor reused from this connection's statement cache.
+
+        The returned cursor is shared with later calls for the same SQL, so
+        its rows must be fetched before the statement is executed again.
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is None or not instrumentation.enabled:
+            return self.statement_cache.cursor_for(statement).execute(statement, params)
+        start = time.perf_counter()
+        cursor = self.statement_cache.cursor_for(statement).execute(statement, params)
+        instrumentation.statement(statement, time.perf_counter() - start, cursor.rowcount, params)
+        return cursor
+
+    def fetch_all_cached(self, statement: str, params=()) -> list:
+        """``execute_cached(...).fetchall()``, reporting the time and rows of the whole read."""
+        instrumentation = self.instrumentation
+        if instrumentation is None or not instrumentation.enabled:
+            return self.statement_cache.cursor_for(statement).execute(statement, params).fetchall()
+        start = time.perf_counter()
+        rows = self.statement_cache.cursor_for(statement).execute(statement, params).fetchall()
+        instrumentation.statement(statement, time.perf_counter() - start, len(rows), params)
+        return rows
+
+
+class StatementStats:
+    """Thread-safe hit and miss counters shared by every statement cache of a manager."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, hit: bool, evicted: bool = False) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if evicted:
+                self.evictions += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class StatementCache:
+    """Per-connection LRU of cursors keyed by SQL text.
+
+    sqlite3 keeps the compiled statement for each SQL string in its own
+    per-connection cache (sized by ``cached_statements``); reusing the cursor
+    as well means a hot query neither re-parses nor allocates on each call.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, capacity: int, stats: StatementStats) -> None:
+        self._conn = conn
+        self._capacity = capacity
+        self._stats = stats
+        self._cursors = OrderedDict()
+
+    def cursor_for(self, statement: str) -> sqlite3.Cursor:
+        """Return the cached cursor for ``statement``, creating it on a miss."""
+        cursor = self._cursors.get(statement)
+        if cursor is not None:
+            self._cursors.move_to_end(statement)
+            self._stats.record(hit=True)
+            return cursor
+
+        # Plain cursor: execute_cached reports the timing itself
+        cursor = self._conn.cursor(_Cursor)
+        self._cursors[statement] = cursor
+        evicted = len(self._cursors) > self._capacity
+        if evicted:
+            _, old_cursor = self._cursors.popitem(last=False)
+            old_cursor.close()
+        self._stats.record(hit=False, evicted=evicted)
+        return cursor
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+
+class BankDirectory:
+    """Process-local LRU of bank name -> bank_registration_number, with a TTL.
+
+    Banks rarely change, so transfers and registrations resolve the
+    receiver's bank here instead of querying ``banks`` each time.
+    BankOperation invalidates entries when it creates, renames or deletes
+    a bank; changes made by other processes are picked up once an entry is
+    older than ``ttl`` seconds (0 disables caching). Misses are not cached,
+    so a bank created elsewhere is found at once.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: float = 60.0) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # name -> (bank id, expires at)
+        # Bumped by every invalidation, so a lookup that raced one is not cached
+        self.generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, bank_name: str):
+        """Return the cached bank id, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(bank_name)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(bank_name)
+                    self._hits += 1
+                    return entry[0]
+                del self._entries[bank_name]
+            self._misses += 1
+            return None
+
+    def put(self, bank_name: str, bank_id: int, generation: int) -> None:
+        """Cache ``bank_id``, unless an invalidation happened since ``generation`` was read."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[bank_name] = (bank_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(bank_name)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, bank_name: str = None, bank_id: int = None) -> None:
+        """Drop the entry for ``bank_name`` and every name that maps to ``bank_id``."""
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(bank_name, None)
+            if bank_id is not None:
+                for name in [name for name, entry in self._entries.items() if entry[0] == bank_id]:
+                    del self._entries[name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self._hits, "misses": self._misses,
+                    "evictions": self._evictions}
+
+
+class PreparedStatement:
+    """SQL text bound to a DatabaseManager and executed through the statement caches."""
+
+    def __init__(self, db_manager: "DatabaseManager", statement: str) -> None:
+        self.db_manager = db_manager
+        self.sql = statement
+
+    def execute(self, params: tuple = ()) -> int:
+        """Execute as a write and return the number of rows affected."""
+        return self.db_manager._execute_prepared_statement(self, params)
+
+    def fetchone(self, params: tuple = ()) -> sqlite3.Row:
+        """Execute as a read and return the first row."""
+        return self.db_manager._read_one(self, params)
+
+    def fetchall(self, params: tuple = ()) -> list:
+        """Execute as a read and return all rows."""
+        return self.db_manager._read_all(self, params)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of SQLite connections.
+
+    A thread that already holds a connection gets the same one back from
+    nested ``item()`` calls, so helpers can be called inside a checkout
+    without taking a second connection.
+    """
+
+    def __init__(self, connect, size: int = 5, timeout: float = 30.0,
+                 health_check_interval: float = 30.0, name: str = "write",
+                 instrumentation: Instrumentation = None) -> None:
+        """Initialize the pool; connections are opened lazily up to ``size``."""
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.name = name
+        self.instrumentation = instrumentation
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+        self._checkouts = 0
+        self._timeouts = 0
+        self._replaced = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextmanager
+    def item(self):
+        """Check out a connection for the current thread."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._checkin(conn)
+
+    def _checkout(self) -> PooledConnection:
+        """Take an idle connection, open a new one, or wait for one to be returned."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No connection available after {self.timeout:.1f}s "
+                        f"(pool size {self.size})")
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - last_used > self.health_check_interval and not conn.is_healthy():
+                self._discard(conn)
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if self.instrumentation is not None and self.instrumentation.enabled:
+            self.instrumentation.observe("pool_checkout_seconds", waited, pool=self.name)
+        return conn
+
+    def _checkin(self, conn: PooledConnection) -> None:
+        """Return a connection to the pool, rolling back any unfinished transaction."""
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._created -= 1
+                conn.close()
+            self._cond.notify()
+
+    def _discard(self, conn: PooledConnection) -> None:
+        """Close a connection that failed its health check."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._replaced += 1
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool metrics."""
+        with self._cond:
+            return {
+                "size": self._created,
+                "max_size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "replaced": self._replaced,
+                "wait_time_total": self._wait_total,
+                "wait_time_max": self._wait_max,
+                "wait_time_avg": self._wait_total / self._checkouts if self._checkouts else 0.0,
+            }
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._created -= 1
+                conn.close()
+            self._cond.notify_all()
+
+
+class StorageProfile:
+    """SQLite journal and cache settings applied to every pooled connection."""
+
+    def __init__(self, journal_mode: str = "WAL", synchronous: str = "NORMAL",
+                 mmap_size: int = 256 * 1024 * 1024, cache_size: int = -64000,
+                 busy_timeout: int = 5000, temp_store: str = "MEMORY") -> None:
+        """Initialize the profile.
+
+        ``cache_size`` follows SQLite's convention: negative values are KiB,
+        positive values are pages. ``busy_timeout`` is in milliseconds.
+        """
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.busy_timeout = busy_timeout
+        self.temp_store = temp_store
+
+    def connection_pragmas(self) -> list:
+        """Return the per-connection PRAGMA statements for this profile."""
+        return [
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA mmap_size = {int(self.mmap_size)}",
+            f"PRAGMA cache_size = {int(self.cache_size)}",
+            f"PRAGMA busy_timeout = {int(self.busy_timeout)}",
+            f"PRAGMA temp_store = {self.temp_store}",
+        ]
+
+
+# WAL lets balance reads continue while a transfer holds the write lock
+DEFAULT_PROFILE = StorageProfile()
+# The original rollback-journal behaviour, for filesystems without shared memory support
+LEGACY_PROFILE = StorageProfile(journal_mode="DELETE", synchronous="FULL", mmap_size=0, cache_size=-2000)
+
+
+# Schema migrations, applied in order. PRAGMA user_version records the last one applied.
+MIGRATIONS = [
+    (1, "secondary indexes for bank, email, history and staff lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_users_bank_id ON users (bank_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_created ON transactions (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_bankstaff_bank_id ON BankStaff (bank_id)",
+    ]),
+    (2, "store balances and amounts as integer minor units (cents)", [
+        "ALTER TABLE users ADD COLUMN balance_minor INTEGER NOT NULL DEFAULT 0",
+        "UPDATE users SET balance_minor = CAST(ROUND(COALESCE(balance, 0) * 100) AS INTEGER)",
+        "ALTER TABLE users DROP COLUMN balance",
+        "ALTER TABLE transactions ADD COLUMN amount_minor INTEGER NOT NULL DEFAULT 0",
+        "UPDATE transactions SET amount_minor = CAST(ROUND(COALESCE(amount, 0) * 100) AS INTEGER)",
+        "ALTER TABLE transactions DROP COLUMN amount",
+    ]),
+    # One row per money movement. The debit leg is the account money leaves, the credit leg the
+    # account it arrives in; deposits have no debit leg and withdrawals no credit leg.
+    (3, "double-entry journal with per-account statement view", [
+        """
+        CREATE TABLE IF NOT EXISTS journal (
+            entry_id INTEGER PRIMARY KEY,
+            debit_account INTEGER,
+            credit_account INTEGER,
+            amount_minor INTEGER NOT NULL CHECK (amount_minor > 0),
+            kind TEXT CHECK (kind IN ('transfer', 'deposit', 'withdrawal')),
+            description TEXT,
+            created_at TEXT,
+            CHECK (debit_account IS NOT NULL OR credit_account IS NOT NULL),
+            FOREIGN KEY (debit_account) REFERENCES users(user_account_number),
+            FOREIGN KEY (credit_account) REFERENCES users(user_account_number)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_journal_debit ON journal (debit_account, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_journal_credit ON journal (credit_account, created_at)",
+        """
+        CREATE VIEW IF NOT EXISTS account_statement AS
+            SELECT entry_id, debit_account AS account, -amount_minor AS amount_minor, 'debit' AS type,
+                   kind, description, credit_account AS counterparty, created_at
+            FROM journal WHERE debit_account IS NOT NULL
+            UNION ALL
+            SELECT entry_id, credit_account AS account, amount_minor, 'credit' AS type,
+                   kind, description, debit_account AS counterparty, created_at
+            FROM journal WHERE credit_account IS NOT NULL
+        """,
+    ]),
+    # Balance of an account right after journal entry ``entry_id``; statements start from the
+    # nearest checkpoint instead of summing the whole journal.
+    (4, "per-account balance checkpoints", [
+        """
+        CREATE TABLE IF NOT EXISTS balance_checkpoints (
+            account INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            balance_minor INTEGER NOT NULL,
+            PRIMARY KEY (account, entry_id),
+            FOREIGN KEY (account) REFERENCES users(user_account_number)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_balance_checkpoints_time ON balance_checkpoints (account, created_at)",
+        "ALTER TABLE users ADD COLUMN entries_since_checkpoint INTEGER NOT NULL DEFAULT 0",
+        # Baseline for existing accounts, whose balances predate the journal
+        """
+        INSERT OR IGNORE INTO balance_checkpoints (account, entry_id, created_at, balance_minor)
+        SELECT user_account_number,
+               (SELECT COALESCE(MAX(entry_id), 0) FROM journal),
+               strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now'),
+               balance_minor
+        FROM users
+        """,
+    ]),
+    # Covering indexes: listing a bank's accounts and summing an account's movements since a
+    # checkpoint read only the index, never the table rows. entry_id is the rowid, which every
+    # index carries, so the entry_id > ? filter is covered too.
+    (5, "covering indexes for account listings and statement balances", [
+        "DROP INDEX IF EXISTS idx_users_bank_id",
+        "CREATE INDEX IF NOT EXISTS idx_users_bank_accounts ON users (bank_id, username, status)",
+        "DROP INDEX IF EXISTS idx_journal_debit",
+        "DROP INDEX IF EXISTS idx_journal_credit",
+        "CREATE INDEX IF NOT EXISTS idx_journal_debit_amount ON journal (debit_account, created_at, amount_minor)",
+        "CREATE INDEX IF NOT EXISTS idx_journal_credit_amount ON journal (credit_account, created_at, amount_minor)",
+    ]),
+    # isoformat() drops the fraction when microseconds are 0; pad those timestamps so every
+    # created_at has the same length and string comparison matches time order.
+    (6, "fixed-width journal and checkpoint timestamps", [
+        """
+        UPDATE journal SET created_at = substr(created_at, 1, 19) || '.000000' || substr(created_at, 20)
+        WHERE length(created_at) = 25 AND substr(created_at, 20, 1) IN ('+', '-')
+        """,
+        """
+        UPDATE balance_checkpoints SET created_at = substr(created_at, 1, 19) || '.000000' || substr(created_at, 20)
+        WHERE length(created_at) = 25 AND substr(created_at, 20, 1) IN ('+', '-')
+        """,
+    ]),
+]
+
+# Queries on the request path; assert_indexed must pass for each of them.
+HOT_QUERIES = [
+    ("SELECT * FROM users WHERE username = ?", ("username",)),
+    ("SELECT * FROM users WHERE user_account_number = ?", (1,)),
+    ("SELECT user_account_number, username, status FROM users WHERE bank_id = ?", (1,)),
+    ("SELECT 1 FROM users WHERE (username = ? OR email = ?) AND user_account_number != ?", ("username", "email", 1)),
+    ("SELECT bank_registration_number FROM banks WHERE bank_name = ?", ("bank",)),
+    ("SELECT * FROM transactions WHERE user_id = ? ORDER BY created_at", (1,)),
+    ("SELECT * FROM transactions WHERE created_at BETWEEN ? AND ?", ("2024-01-01", "2024-12-31")),
+    ("SELECT * FROM BankStaff WHERE bank_id = ?", (1,)),
+    ("SELECT * FROM account_statement WHERE account = ? ORDER BY created_at DESC, entry_id DESC LIMIT ?", (1, 50)),
+    ("SELECT * FROM balance_checkpoints WHERE account = ? AND created_at < ? ORDER BY created_at DESC, entry_id DESC LIMIT 1", (1, "2024-01-01")),
+    ("SELECT * FROM account_statement WHERE account = ? AND created_at >= ? AND created_at < ? ORDER BY created_at, entry_id", (1, "2024-01-01", "2024-02-01")),
+]
+
+# Hot queries that must be answered from an index alone (assert_indexed with covering=True).
+# Unique username and account-number probes already read a single row, so they are not here.
+COVERED_QUERIES = [
+    ("SELECT user_account_number, username, status FROM users WHERE bank_id = ?", (1,)),
+    ("SELECT 1 FROM users WHERE username = ?", ("username",)),
+    (
+        "SELECT (SELECT COALESCE(SUM(amount_minor), 0) FROM journal WHERE credit_account = ? AND created_at >= ? AND created_at < ? AND entry_id > ?)"
+        " - (SELECT COALESCE(SUM(amount_minor), 0) FROM journal WHERE debit_account = ? AND created_at >= ? AND created_at < ? AND entry_id > ?)",
+        (1, "2024-01-01", "2024-02-01", 0) * 2,
+    ),
+]
+
+
 class DatabaseManager:
-    """Manages the SQLite database connection and table creation."""
+    """Manages the SQLite connection pools and table creation.
+
+    Writes go through ``pool``; SELECT-only helpers use ``read_pool``, whose
+    connections are opened with ``query_only`` so they never take the write lock.
+    """
 
-    def __init__(self, db_path: str) -> None:
-        """Initialize the database manager."""
+    def __init__(self, db_path: str, pool_size: int = 5, checkout_timeout: float = 30.0,
+                 profile: StorageProfile = None, read_pool_size: int = None,
+                 statement_cache_size: int = 128, instrumentation: Instrumentation = None,
+                 bank_cache_size: int = 1024, bank_cache_ttl: float = 60.0) -> None:
+        """Initialize the database manager.
+
+        ``instrumentation`` receives pool, statement and commit timings; by
+        default a disabled one is created, which ``instrumentation.add_sink``
+        turns on. ``bank_cache_size`` and ``bank_cache_ttl`` size the
+        BankDirectory of bank names.
+        """
         self.db_path = db_path
+        self.pool_size = pool_size
+        self.read_pool_size = read_pool_size or pool_size
+        self.checkout_timeout = checkout_timeout
+        self.profile = profile or DEFAULT_PROFILE
+        self.statement_cache_size = statement_cache_size
+        self._statements = {}
+        self._statement_stats = StatementStats()
+        self.instrumentation = instrumentation or Instrumentation()
+        self.bank_directory = BankDirectory(bank_cache_size, bank_cache_ttl)
         self._ensure_connection()
         self._ensure_tables_exist()
+        self._run_migrations()
+
+    def _attach(self, db_manager: "DatabaseManager") -> None:
+        """Share another manager's connection pools instead of opening new ones."""
+        self.db_path = db_manager.db_path
+        self.pool_size = db_manager.pool_size
+        self.read_pool_size = db_manager.read_pool_size
+        self.checkout_timeout = db_manager.checkout_timeout
+        self.profile = db_manager.profile
+        self.statement_cache_size = db_manager.statement_cache_size
+        self._statements = db_manager._statements
+        self._statement_stats = db_manager._statement_stats
+        self.instrumentation = db_manager.instrumentation
+        self.bank_directory = db_manager.bank_directory
+        self.pool = db_manager.pool
+        self.read_pool = db_manager.read_pool
+
+    def _connect(self, readonly: bool = False) -> PooledConnection:
+        """Open a new connection for one of the pools."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.profile.busy_timeout / 1000,
+            check_same_thread=False,  # Connections move between threads through the pool
+            isolation_level=None,     # Transactions are started explicitly with begin()
+            factory=PooledConnection,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row  # Allow accessing data by column names
+        conn.statement_cache = StatementCache(conn, self.statement_cache_size, self._statement_stats)
+        conn.instrumentation = self.instrumentation
+        for pragma in self.profile.connection_pragmas():
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
 
     def _ensure_connection(self) -> None:
-        """Ensure a connection to the SQLite database exists."""
+        """Ensure the connection pools exist and the journal mode is set."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row  # Allow accessing data by column names
+            self.pool = ConnectionPool(self._connect, size=self.pool_size, timeout=self.checkout_timeout,
+                                       name="write", instrumentation=self.instrumentation)
+            self.read_pool = ConnectionPool(lambda: self._connect(readonly=True),
+                                            size=self.read_pool_size, timeout=self.checkout_timeout,
+                                            name="read", instrumentation=self.instrumentation)
+            with self.pool.item() as conn:
+                # journal_mode is persistent, so it only needs setting once per database
+                conn.execute(f"PRAGMA journal_mode = {self.profile.journal_mode}")
         except sqlite3.Error as e:
             print(f"An error occurred while connecting to the database: {e}")
             raise
 
     def _ensure_tables_exist(self) -> None:
         """Ensure the required tables exist in the database."""
-        cursor = self.conn.cursor()
         try:
-            cursor.executescript("""
+            with self.pool.item() as conn:
+                conn.executescript("""
                 CREATE TABLE IF NOT EXISTS admin (
                     admin_id INTEGER UNIQUE PRIMARY KEY,
                     username TEXT UNIQUE,
@@ -54,7 +691,7 @@ class DatabaseManager:
                     username TEXT UNIQUE,
                     staff_name TEXT,
                     role TEXT CHECK (role IN ('admin', 'user')),
-                    Staff_role TEXT CHECK (type IN ('Junior_staff', 'manager', 'vault_manager')),
+                    Staff_role TEXT CHECK (Staff_role IN ('Junior_staff', 'manager', 'vault_manager')),
                     email TEXT,
                     phone TEXT,
                     password TEXT,
@@ -91,28 +728,142 @@ class DatabaseManager:
                     FOREIGN KEY (user_id) REFERENCES users(user_account_number)
                 );
             """)
-            self.conn.commit()
         except sqlite3.Error as e:
           # Print a more specific error message
           error_msg = f"An error occurred creating tables: {e}. \nFailed table creation might be due to: \n - Syntax errors in CREATE TABLE statements. \n - Name conflicts with existing tables."
           print(error_msg)
           raise
 
+    def _run_migrations(self) -> None:
+        """Apply pending MIGRATIONS in one write transaction."""
+        with self.pool.item() as conn:
+            conn.begin("IMMEDIATE")
+            try:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                for version, _description, statements in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    for statement in statements:
+                        conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"An error occurred while migrating the database schema: {e}")
+                raise
+
+    def schema_version(self) -> int:
+        """Return the last migration applied to the database."""
+        return self._read_one("PRAGMA user_version")[0]
+
+    def explain_query_plan(self, statement: str, params: tuple = ()) -> list:
+        """Return the EXPLAIN QUERY PLAN detail lines for ``statement``."""
+        rows = self._read_all(f"EXPLAIN QUERY PLAN {statement}", params)
+        return [row["detail"] for row in rows]
+
+    def assert_indexed(self, statement: str, params: tuple = (), covering: bool = False) -> list:
+        """Raise FullScanError if ``statement`` scans a whole table; return the plan otherwise.
+
+        With ``covering`` every table access must also use a covering index
+        (or the rowid itself), else UncoveredQueryError is raised.
+        """
+        plan = self.explain_query_plan(statement, params)
+        tables = {row[0].lower() for row in self._read_all("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        scans = table_scans(plan, tables)
+        if scans:
+            raise FullScanError(f"Full table scan ({scans[0]}) in query: {statement.strip()}")
+        if covering:
+            for detail in plan:
+                words = detail.split()
+                if (len(words) > 1 and words[0] in ("SEARCH", "SCAN") and words[1].lower() in tables
+                        and "COVERING INDEX" not in detail and "INTEGER PRIMARY KEY" not in detail):
+                    raise UncoveredQueryError(f"Table lookup ({detail}) in query: {statement.strip()}")
+        return plan
+
+    def check_hot_queries(self) -> None:
+        """Run assert_indexed over HOT_QUERIES, and with ``covering`` over COVERED_QUERIES."""
+        for statement, params in HOT_QUERIES:
+            self.assert_indexed(statement, params)
+        for statement, params in COVERED_QUERIES:
+            self.assert_indexed(statement, params, covering=True)
+
+    def enable_slow_query_log(self, threshold: float = 0.05, **options) -> SlowQueryLog:
+        """Start logging statements slower than ``threshold`` seconds; returns the log for its reports."""
+        return self.instrumentation.add_sink(SlowQueryLog(self.db_path, threshold, **options))
+
+    def pool_stats(self) -> dict:
+        """Return metrics (size, in-use, wait time) for the write and read pools."""
+        return {"write": self.pool.stats(), "read": self.read_pool.stats()}
+
     def close_connection(self) -> None:
-        """Close the database connection."""
-        self.conn.close()
+        """Close the pooled database connections."""
+        self.pool.close()
+        self.read_pool.close()
+
+    def close(self) -> None:
+        """Close the pooled database connections."""
+        self.close_connection()
+
+    def statement_stats(self) -> dict:
+        """Return statement cache hit and miss counts."""
+        return self._statement_stats.snapshot()
+
+    def _bank_registration_number(self, bank_name, cursor=None):
+        """Return the id of the bank called ``bank_name``, or None, through the bank directory.
+
+        On a miss the bank is read with ``cursor`` when given (so the read
+        joins the caller's transaction), otherwise from the read pool.
+        """
+        bank_id = self.bank_directory.get(bank_name)
+        if bank_id is not None:
+            return bank_id
+        generation = self.bank_directory.generation
+        statement = "SELECT bank_registration_number FROM banks WHERE bank_name = ?"
+        if cursor is None:
+            row = self._read_one(statement, (bank_name,))
+        else:
+            cursor.execute(statement, (bank_name,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        self.bank_directory.put(bank_name, row[0], generation)
+        return row[0]
+
+    def _prepare_statement(self, statement: str) -> PreparedStatement:
+        """Return the prepared statement for ``statement``, reusing it across calls."""
+        prepared = self._statements.get(statement)
+        if prepared is None:
+            prepared = self._statements.setdefault(statement, PreparedStatement(self, statement))
+        return prepared
+
+    def _execute_prepared_statement(self, statement, params: tuple = ()) -> int:
+        """Execute a write statement with the given parameters and return the rows affected.
+
+        Outside an explicit transaction the statement commits on its own;
+        inside one it becomes part of the caller's transaction.
+        """
+        sql = getattr(statement, "sql", statement)
+        with self.pool.item() as conn:
+            return conn.execute_cached(sql, params).rowcount
+
+    def _read_one(self, statement, params: tuple = ()) -> sqlite3.Row:
+        """Run a SELECT on a read-only connection and return the first row."""
+        sql = getattr(statement, "sql", statement)
+        with self.read_pool.item() as conn:
+            # Drain the cursor so the statement is reset and releases its read snapshot
+            rows = conn.fetch_all_cached(sql, params)
+        return rows[0] if rows else None
 
-    def _prepare_statement(self, statement: str) -> sqlite3.PreparedStatement:
-        """Prepare an SQL statement."""
-        return self.conn.cursor().execute(statement)
+    def _read_all(self, statement, params: tuple = ()) -> list:
+        """Run a SELECT on a read-only connection and return all rows."""
+        sql = getattr(statement, "sql", statement)
+        with self.read_pool.item() as conn:
+            return conn.fetch_all_cached(sql, params)
 
-    def _execute_prepared_statement(self, statement: sqlite3.PreparedStatement, params: tuple) -> None:
-        """Execute a prepared statement with the given parameters."""
-        statement.execute(params)
-        self.conn.commit()
+    def _execute_prepared_statement_with_fetchone(self, statement, params: tuple = ()) -> sqlite3.Row:
+        """Execute a prepared statement with the given parameters and return the first row."""
+        return self._read_one(statement, params)
 
-    def _execute_prepared_statement_with_fetchall(self, statement: sqlite3.PreparedStatement, params: tuple) -> list:
+    def _execute_prepared_statement_with_fetchall(self, statement, params: tuple = ()) -> list:
         """Execute a prepared statement with the given parameters and return the result."""
-        statement.execute(params)
-        return statement.fetchall()
-    
+        return self._read_all(statement, params)
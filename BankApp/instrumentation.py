@@ -0,0 +1,410 @@
+"""Timing of pool checkouts, statements, commits, bcrypt and whole operations.
+
+Every DatabaseManager owns an Instrumentation (shared by managers attached to
+it). It is disabled until a sink is added:
+
+    db_manager.instrumentation.add_sink(HistogramSink())
+
+While disabled the hooks cost one attribute check; the timed code paths are
+only taken once a sink is present. Observations are ``(name, value,
+labels)``:
+
+    pool_checkout_seconds  pool="write"|"read"   time spent waiting for a connection
+    statement_seconds      statement=<SQL>       execute (and fetch, for reads)
+    statement_rows         statement=<SQL>       rows changed or returned
+    commit_seconds                               COMMIT, including the WAL fsync
+    bcrypt_seconds         op="hash"|"verify"    hasher queue wait plus hashing
+    operation_seconds      operation, outcome    one public operation end to end
+"""
+import bisect
+import functools
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Stands in for the parameters of an executemany() batch
+BATCH = object()
+
+# Histogram bucket upper bounds: seconds for *_seconds metrics, plain counts otherwise
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 10000)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_statement(sql: str) -> str:
+    """Collapse the whitespace of ``sql`` so one statement always gets one label."""
+    return " ".join(sql.split())
+
+
+class Sink:
+    """Receives observations; subclasses decide what to keep."""
+
+    def observe(self, name: str, value: float, labels: dict) -> None:
+        raise NotImplementedError
+
+    def statement(self, statement: str, seconds: float, rows: int, params) -> None:
+        """Called once per SQL statement besides its ``observe`` calls; ``params`` are the bound values."""
+
+
+class Histogram:
+    """Bucketed distribution of one metric for one set of labels."""
+
+    def __init__(self, bounds) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (the max for the last bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class HistogramSink(Sink):
+    """Keeps a Histogram per metric name and label set, in memory."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                bounds = TIME_BUCKETS if name.endswith("_seconds") else COUNT_BUCKETS
+                histogram = self._histograms[key] = Histogram(bounds)
+            histogram.add(value)
+
+    def histograms(self) -> list:
+        """Return ``(name, labels, Histogram)`` for every series, sorted by name."""
+        with self._lock:
+            return [(name, dict(labels), histogram) for (name, labels), histogram in sorted(self._histograms.items())]
+
+    def snapshot(self) -> dict:
+        """Return ``{name: [dict(labels, **summary), ...]}``."""
+        result = {}
+        for name, labels, histogram in self.histograms():
+            result.setdefault(name, []).append(dict(labels, **histogram.snapshot()))
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+class LoggingSink(Sink):
+    """Logs each observation at or above ``min_value`` (e.g. only slow statements)."""
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG, min_value: float = 0.0) -> None:
+        self.logger = logger or logging.getLogger("BankApp.metrics")
+        self.level = level
+        self.min_value = min_value
+
+    def observe(self, name, value, labels):
+        if value >= self.min_value and self.logger.isEnabledFor(self.level):
+            details = " ".join(f"{key}={value!r}" for key, value in labels.items())
+            self.logger.log(self.level, f"{name} {value:.6f} {details}".rstrip())
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class PrometheusSink(HistogramSink):
+    """Histograms written to ``path`` in the Prometheus text exposition format.
+
+    Point node_exporter's textfile collector at the file. It is rewritten
+    atomically by ``write()``, and by ``observe`` at most once every
+    ``interval`` seconds, so no background thread is needed.
+    """
+
+    def __init__(self, path: str, interval: float = 10.0, prefix: str = "bank_") -> None:
+        super().__init__()
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self._written = time.monotonic()
+
+    def observe(self, name, value, labels):
+        super().observe(name, value, labels)
+        if time.monotonic() - self._written >= self.interval:
+            self.write()
+
+    def render(self) -> str:
+        lines = []
+        current = None
+        for name, labels, histogram in self.histograms():
+            metric = f"{self.prefix}{name}"
+            if metric != current:
+                lines.append(f"# TYPE {metric} histogram")
+                current = metric
+            base = ",".join(f'{key}="{_label_value(value)}"' for key, value in sorted(labels.items()))
+            cumulative = 0
+            for bound, count in zip(list(histogram.bounds) + ["+Inf"], histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{metric}_sum{suffix} {histogram.sum}")
+            lines.append(f"{metric}_count{suffix} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Replace the exposition file with the current histograms."""
+        self._written = time.monotonic()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.chmod(tmp_path, 0o644)
+            # Scrapers read the old file or the new one, never a partial write
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def params_shape(params) -> str:
+    """Describe bound parameters by type only, e.g. ``(str, int)``; values are never logged."""
+    if params is BATCH:
+        return "[batch]"
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in params) + ")"
+
+
+def table_scans(plan, tables) -> list:
+    """Return the EXPLAIN QUERY PLAN lines of ``plan`` that scan a whole table in ``tables``."""
+    scans = []
+    for detail in plan:
+        # Index scans read "SCAN t USING [COVERING] INDEX ..."; a bare "SCAN t" is a table scan.
+        # Scans of views and subqueries only walk rows already produced by indexed searches.
+        words = detail.split()
+        if len(words) > 1 and words[0] == "SCAN" and words[1].lower() in tables and " USING " not in detail:
+            scans.append(detail)
+    return scans
+
+
+class SlowQueryLog(Sink):
+    """Logs statements slower than ``threshold`` seconds and aggregates all of them.
+
+    Each slow statement is logged with its elapsed time, rows, parameter
+    shape and EXPLAIN QUERY PLAN. Every statement, slow or not, is counted
+    per normalized SQL, so ``report()`` can rank them by total time and
+    flag the ones whose plan scans a whole table, which is how cheap but
+    frequent full scans show up under real traffic.
+
+    Plans come from a private read-only connection to ``db_path`` (so
+    explaining never waits on the pools) with every parameter bound to
+    NULL, and are cached per statement.
+    """
+
+    def __init__(self, db_path: str, threshold: float = 0.05, logger: logging.Logger = None,
+                 level: int = logging.WARNING, max_shapes: int = 5) -> None:
+        self.db_path = db_path
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger("BankApp.slow_queries")
+        self.level = level
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._plans = {}
+        self._tables = None
+        self._conn = None
+
+    def observe(self, name, value, labels):
+        pass
+
+    def statement(self, statement, seconds, rows, params):
+        if statement.startswith("EXPLAIN"):
+            return
+        slow = seconds >= self.threshold
+        shape = params_shape(params)
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                stats = self._stats[statement] = {"count": 0, "slow": 0, "total": 0.0, "max": 0.0, "rows": 0, "shapes": []}
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["rows"] += max(rows, 0)
+            if seconds > stats["max"]:
+                stats["max"] = seconds
+            if slow:
+                stats["slow"] += 1
+            if shape not in stats["shapes"] and len(stats["shapes"]) < self.max_shapes:
+                stats["shapes"].append(shape)
+        if slow and self.logger.isEnabledFor(self.level):
+            plan = "; ".join(self.plan(statement)) or "-"
+            self.logger.log(self.level, f"Slow query {seconds * 1000:.1f} ms rows={rows} params={shape}: "
+                                        f"{statement} | plan: {plan}")
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True,
+                                         check_same_thread=False)
+        return self._conn
+
+    def plan(self, statement: str) -> list:
+        """EXPLAIN QUERY PLAN detail lines for ``statement`` (cached)."""
+        plan = self._plans.get(statement)
+        if plan is not None:
+            return plan
+        with self._lock:
+            try:
+                conn = self._connection()
+                params = (None,) * statement.count("?")
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", params)]
+            except sqlite3.Error as e:
+                plan = [f"unavailable: {e}"]
+            self._plans[statement] = plan
+        return plan
+
+    def _table_names(self):
+        if self._tables is None:
+            with self._lock:
+                try:
+                    rows = self._connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                    self._tables = {row[0].lower() for row in rows}
+                except sqlite3.Error:
+                    return set()
+        return self._tables
+
+    def report(self, n: int = 10, by: str = "total") -> list:
+        """Top ``n`` statements by ``by`` ("total", "max", "count" or "slow"), with plans and full scans."""
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda item: item[1][by], reverse=True)[:n]
+            ranked = [(statement, dict(stats, shapes=list(stats["shapes"]))) for statement, stats in ranked]
+        tables = self._table_names()
+        report = []
+        for statement, stats in ranked:
+            plan = self.plan(statement)
+            report.append(dict(
+                stats,
+                statement=statement,
+                mean=stats["total"] / stats["count"],
+                plan=plan,
+                full_scans=table_scans(plan, tables),
+            ))
+        return report
+
+    def format_report(self, n: int = 10, by: str = "total") -> str:
+        """``report()`` as text, one block per statement."""
+        lines = []
+        for entry in self.report(n, by):
+            flag = "  FULL SCAN" if entry["full_scans"] else ""
+            lines.append(f"{entry['total'] * 1000:10.1f} ms total  {entry['count']:>8} calls  "
+                         f"{entry['slow']:>6} slow  max {entry['max'] * 1000:8.1f} ms{flag}")
+            lines.append(f"    {entry['statement']}")
+            lines.append(f"    params {', '.join(entry['shapes'])}")
+            for detail in entry["plan"]:
+                lines.append(f"    plan   {detail}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class Instrumentation:
+    """Fans observations out to the sinks; ``enabled`` is False while there are none."""
+
+    def __init__(self, sinks=()) -> None:
+        self.sinks = list(sinks)
+        self.enabled = bool(self.sinks)
+
+    def add_sink(self, sink: Sink) -> Sink:
+        # Replace the list rather than mutate it, so threads iterating it are unaffected
+        self.sinks = self.sinks + [sink]
+        self.enabled = True
+        return sink
+
+    def remove_sink(self, sink: Sink) -> None:
+        self.sinks = [s for s in self.sinks if s is not sink]
+        self.enabled = bool(self.sinks)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        for sink in self.sinks:
+            try:
+                sink.observe(name, value, labels)
+            except Exception:
+                # A broken sink must never fail the operation being measured
+                logging.getLogger(__name__).exception(f"Metrics sink {sink!r} failed")
+
+    def statement(self, sql: str, seconds: float, rows: int = -1, params=None) -> None:
+        """Observe one statement; ``params`` is its parameters, or BATCH for executemany."""
+        label = normalize_statement(sql)
+        self.observe("statement_seconds", seconds, statement=label)
+        if rows >= 0:
+            self.observe("statement_rows", rows, statement=label)
+        for sink in self.sinks:
+            try:
+                sink.statement(label, seconds, rows, params)
+            except Exception:
+                logging.getLogger(__name__).exception(f"Metrics sink {sink!r} failed")
+
+    def time(self, name: str, func, *args, labels=None, **kwargs):
+        """Call ``func`` and observe its duration as ``name``."""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.observe(name, time.perf_counter() - start, **(labels or {}))
+
+
+def timed_operation(method):
+    """Observe ``operation_seconds`` for an operation method while instrumentation is enabled."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self.instrumentation
+        if not instrumentation.enabled:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = method(self, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            instrumentation.observe("operation_seconds", time.perf_counter() - start, operation=name, outcome=outcome)
+
+    return wrapper
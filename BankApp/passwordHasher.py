@@ -0,0 +1,88 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+
+import bcrypt
+
+
+class HasherBusyError(RuntimeError):
+    """Raised when the hashing queue is full; callers should shed load and retry later."""
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _as_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else value.encode('utf-8')
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool instead of the calling thread.
+
+    bcrypt releases the GIL, so a thread pool already hashes in parallel;
+    ``use_processes`` moves the work to separate processes instead. At most
+    ``max_pending`` hashes may be queued or running; beyond that, callers get
+    HasherBusyError after waiting ``acquire_timeout`` seconds for a slot.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 4, max_pending: int = 64,
+                 acquire_timeout: float = 5.0, use_processes: bool = False) -> None:
+        """Initialize the hasher; ``rounds`` is the bcrypt cost used for new hashes."""
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers")
+        self.rounds = rounds
+        self.acquire_timeout = acquire_timeout
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, func, *args):
+        """Run ``func`` on the pool, waiting for a queue slot first."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise HasherBusyError("Too many password hashing requests in flight")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        """Hash ``password`` with the configured cost."""
+        return self._run(_hashpw, _as_bytes(password), self.rounds).decode('utf-8')
+
+    def verify(self, password: str, hashed) -> bool:
+        """Check ``password`` against a stored bcrypt hash (str or bytes)."""
+        if not hashed:
+            return False
+        return self._run(_checkpw, _as_bytes(password), _as_bytes(hashed))
+
+    def needs_rehash(self, hashed) -> bool:
+        """Return True if ``hashed`` was made with a different cost than the configured one."""
+        try:
+            # bcrypt hashes look like $2b$<cost>$<salt+digest>
+            return int(_as_bytes(hashed).split(b'$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        self._executor.shutdown(wait=True)
+
+
+_default_hasher = None
+_default_hasher_lock = threading.Lock()
+
+
+def default_hasher() -> PasswordHasher:
+    """Return the process-wide PasswordHasher, creating it on first use."""
+    global _default_hasher
+    with _default_hasher_lock:
+        if _default_hasher is None:
+            _default_hasher = PasswordHasher()
+        return _default_hasher
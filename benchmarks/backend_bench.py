@@ -0,0 +1,138 @@
+"""Run one workload against every storage backend.
+
+    python benchmarks/backend_bench.py --accounts 1000 --operations 5000
+
+Seeds each backend with the same banks and accounts through the
+StorageBackend interface, then replays the same seeded mix of balance
+reads, statement reads, transfers, deposits and withdrawals. Prints the
+throughput of each operation per backend, so a backend can be picked for a
+load profile; ``--mix`` changes the profile.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BankApp.backends import BACKENDS, open_backend  # noqa: E402
+
+DEFAULT_MIX = {"balance": 60, "entries": 10, "transfer": 20, "deposit": 5, "withdraw": 5}
+
+
+def backend_options(name, directory):
+    """Where each backend keeps its files inside ``directory``."""
+    if name == "sqlite":
+        return {"path": os.path.join(directory, "bank.db")}
+    if name == "json":
+        return {"path": os.path.join(directory, "banks.json")}
+    return {}
+
+
+def seed(backend, banks, accounts, opening_minor=100_000):
+    """Create ``banks`` banks and ``accounts`` accounts spread over them; return the account ids."""
+    bank_ids = [backend.create_bank(f"Bank {b}", location="City", branch="Main") for b in range(banks)]
+    return [backend.create_account(bank_ids[i % banks], f"user{i}", opening_minor, email=f"user{i}@example.com")
+            for i in range(accounts)]
+
+
+def operations(mix, count, accounts, rng):
+    """The sequence of ``(operation, args)`` to replay; the same for every backend given the same seed."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    plan = []
+    for name in rng.choices(names, weights, k=count):
+        if name == "transfer":
+            debit, credit = rng.sample(range(accounts), 2)
+            plan.append((name, (debit, credit, rng.randint(1, 500))))
+        elif name in ("deposit", "withdraw"):
+            plan.append((name, (rng.randrange(accounts), rng.randint(1, 500))))
+        else:
+            plan.append((name, (rng.randrange(accounts),)))
+    return plan
+
+
+def replay(backend, account_ids, plan):
+    """Run ``plan`` and return ``{operation: [seconds, ...]}``; rejected operations still count."""
+    calls = {
+        "balance": lambda a: backend.get_balance(account_ids[a]),
+        "entries": lambda a: backend.entries(account_ids[a], 20),
+        "transfer": lambda d, c, amount: backend.transfer(account_ids[d], account_ids[c], amount, "bench"),
+        "deposit": lambda a, amount: backend.deposit(account_ids[a], amount),
+        "withdraw": lambda a, amount: backend.withdraw(account_ids[a], amount),
+    }
+    timings = {name: [] for name in calls}
+    clock = time.perf_counter
+    for name, args in plan:
+        call = calls[name]
+        start = clock()
+        try:
+            call(*args)
+        except ValueError:
+            # e.g. insufficient balance; the attempt is part of the profile
+            pass
+        timings[name].append(clock() - start)
+    return timings
+
+
+def run(names, banks, accounts, count, mix, seed_value):
+    results = []
+    for name in names:
+        with tempfile.TemporaryDirectory() as tmp:
+            with open_backend(name, **backend_options(name, tmp)) as backend:
+                start = time.perf_counter()
+                account_ids = seed(backend, banks, accounts)
+                seed_s = time.perf_counter() - start
+                plan = operations(mix, count, accounts, random.Random(seed_value))
+                start = time.perf_counter()
+                timings = replay(backend, account_ids, plan)
+                total_s = time.perf_counter() - start
+        row = {"backend": name, "accounts": accounts, "seed_s": round(seed_s, 3),
+               "ops_per_s": round(count / total_s, 1), "operations": {}}
+        for operation, samples in timings.items():
+            if samples:
+                row["operations"][operation] = {
+                    "count": len(samples),
+                    "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+                    "ops_per_s": round(len(samples) / sum(samples), 1),
+                }
+        results.append(row)
+        detail = "  ".join(f"{operation} {stats['mean_us']:.0f}us" for operation, stats in row["operations"].items())
+        print(f"{name:<8} seed {seed_s:7.2f} s  {row['ops_per_s']:10.1f} ops/s  {detail}", flush=True)
+    return results
+
+
+def parse_mix(text):
+    """``balance=60,transfer=20,...`` -> dict of weights."""
+    mix = {}
+    for part in text.split(","):
+        operation, _, weight = part.partition("=")
+        if operation not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r}")
+        mix[operation] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--banks", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="operation weights, e.g. balance=60,entries=10,transfer=20,deposit=5,withdraw=5")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    results = run(args.backends, args.banks, args.accounts, args.operations, args.mix, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
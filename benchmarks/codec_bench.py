@@ -0,0 +1,101 @@
+"""Save/load latency and file size of each bank-file codec.
+
+    python benchmarks/codec_bench.py --sizes 10000 100000 1000000
+
+Builds a synthetic bank document with the given number of accounts (spread
+over 100 banks), then times ``dump_file`` and ``load_file`` for every codec
+that can run here. Each measurement is the best of ``--repeat`` runs.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from practice.serialization import CODECS, MsgpackCodec, dump_file, load_file, msgpack  # noqa: E402
+
+
+def build_document(accounts, banks=100):
+    document = {}
+    for b in range(banks):
+        bank_id = f"bank-{b:05d}"
+        document[bank_id] = {
+            "id": bank_id,
+            "creation_date": "2024-01-01",
+            "creation_time": "12:00:00.000000",
+            "last_modified": "2024-01-01",
+            "name": f"Bank {b}",
+            "location": "City",
+            "branch": "Main",
+            "ifsc": f"IFSC{b:07d}",
+            "contact": "0000000000",
+            "email": f"bank{b}@example.com",
+            "account_types": ["savings", "current"],
+            "users": {},
+        }
+    for i in range(accounts):
+        user_id = 10_000_000 + i
+        document[f"bank-{i % banks:05d}"]["users"][str(user_id)] = {
+            "id": user_id,
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "password": "x" * 16,
+            "balance": (i * 37) % 100_000 + 0.5,
+            "transaction_pin": 1000 + i % 9000,
+            "state": 1,
+            "state_change_date": "2024-01-01",
+            "state_change_time": "12:00:00.000000",
+        }
+    return document
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat, codecs):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            document = build_document(size)
+            for name in codecs:
+                path = os.path.join(tmp, f"banks.{name}")
+                save = best_of(repeat, lambda: dump_file(path, document, name))
+                load = best_of(repeat, lambda: load_file(path))
+                results.append({
+                    "accounts": size,
+                    "codec": name,
+                    "save_s": round(save, 4),
+                    "load_s": round(load, 4),
+                    "bytes": os.path.getsize(path),
+                })
+                print(f"{size:>9} {name:<12} save {save * 1000:9.1f} ms  load {load * 1000:9.1f} ms  "
+                      f"{os.path.getsize(path) / 1e6:8.1f} MB", flush=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--codecs", nargs="+", default=None, choices=sorted(CODECS))
+    parser.add_argument("--json", dest="output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    codecs = args.codecs or [name for name in CODECS if name != MsgpackCodec.name or msgpack is not None]
+    results = run(args.sizes, args.repeat, codecs)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
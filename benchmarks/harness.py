@@ -0,0 +1,222 @@
+"""Latency and throughput of the bank operations at several data sizes.
+
+    python benchmarks/harness.py --sizes 100 1000 10000 --json results.json
+    python benchmarks/harness.py --sizes 100 1000 --compare results.json
+
+For each size (number of accounts) a fresh store is seeded through the
+public operations: banks with ``create_bank``, accounts with
+``register_user`` (SQLite) or ``create_user`` (JSON), and ``size``
+transfers with ``transfer_money``/``transfer``. Every call is timed, then a
+read phase times balance and statement lookups on random accounts. The
+results (p50, p99, mean and ops/s per operation) go to ``--json`` together
+with the commit they were measured on; ``--compare`` reports operations
+whose p50 grew by more than ``--threshold`` against an earlier file and
+exits with status 1 if there are any.
+
+bcrypt runs at ``--bcrypt-rounds`` (4 by default) so seeding stays fast;
+pass 12 to time registrations and logins at the production cost.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SUITES = ("sqlite", "json")
+OPENING_BALANCE = 10_000
+ACCOUNTS_PER_BANK = 100
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of ``samples`` (0 < q <= 100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples):
+    """Count, p50/p99/mean in microseconds and ops/s for a list of durations in seconds."""
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "p50_us": round(percentile(samples, 50) * 1e6, 1),
+        "p99_us": round(percentile(samples, 99) * 1e6, 1),
+        "mean_us": round(total / len(samples) * 1e6, 1),
+        "ops_per_s": round(len(samples) / total, 1) if total else None,
+    }
+
+
+class Recorder:
+    """Collects the duration of each call per operation name."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, operation, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples.setdefault(operation, []).append(time.perf_counter() - start)
+        return result
+
+    def results(self):
+        return {operation: summarize(samples) for operation, samples in self.samples.items()}
+
+
+def _plan(size, rng):
+    """Pairs of distinct account indexes for the seeding transfers."""
+    return [tuple(rng.sample(range(size), 2)) for _ in range(size)]
+
+
+def run_sqlite(directory, size, rng, reads, bcrypt_rounds):
+    from BankApp.fileStorage import DatabaseManager
+    from BankApp.passwordHasher import PasswordHasher
+    from BankApp.Transaction import TransactionOperations
+
+    recorder = Recorder()
+    db_manager = DatabaseManager(os.path.join(directory, "bank.db"))
+    hasher = PasswordHasher(rounds=bcrypt_rounds)
+    operations = TransactionOperations(db_manager, password_hasher=hasher)
+    try:
+        bank_names = [f"Bank {b}" for b in range(max(size // ACCOUNTS_PER_BANK, 1))]
+        for name in bank_names:
+            recorder.time("create_bank", operations.create_bank, name, "Street 1", "City", "Main",
+                          "IFSC0000001", "0000000000", "bank@example.com", "saving", None)
+        accounts = []
+        for i in range(size):
+            bank_name = bank_names[i % len(bank_names)]
+            recorder.time("register_user", operations.register_user, f"user{i}", "secret", "First", "Last",
+                          bank_name, f"user{i}@example.com")
+            number = operations.get_user_by_username(f"user{i}")["user_account_number"]
+            recorder.time("deposit_money", operations.deposit_money, number, OPENING_BALANCE)
+            accounts.append((number, bank_name))
+        for sender, receiver in _plan(size, rng):
+            recorder.time("transfer_money", operations.transfer_money, accounts[sender][0],
+                          accounts[receiver][0], accounts[receiver][1], rng.randint(1, 100), "benchmark")
+        for _ in range(reads):
+            number = rng.choice(accounts)[0]
+            recorder.time("get_user_by_id", operations.get_user_by_id, number)
+            recorder.time("get_account_entries", operations.get_account_entries, number, 20)
+        for _ in range(min(reads, 50)):
+            recorder.time("login", operations.login, f"user{rng.randrange(size)}", "secret")
+    finally:
+        hasher.close()
+        db_manager.close()
+    return recorder.results()
+
+
+def run_json(directory, size, rng, reads, bcrypt_rounds=None):
+    from practice.transaction import TransactionOperation
+    from practice.user import UserOperation
+
+    recorder = Recorder()
+    filename = os.path.join(directory, "banks.json")
+    users = UserOperation(filename)
+    transactions = TransactionOperation(filename)
+    try:
+        bank_ids = []
+        for b in range(max(size // ACCOUNTS_PER_BANK, 1)):
+            bank = recorder.time("create_bank", users.create_bank, f"Bank {b}", "City", "Main", "IFSC0000001",
+                                 "0000000000", "bank@example.com", ["Savings"])
+            bank_ids.append(bank["id"])
+        accounts = []
+        for i in range(size):
+            bank_id = bank_ids[i % len(bank_ids)]
+            user = recorder.time("create_user", users.create_user, bank_id, "Savings", f"user{i}",
+                                 f"user{i}@example.com", "secret", 1234)
+            recorder.time("update_user", users.update_user, user["id"], balance=OPENING_BALANCE)
+            accounts.append((user["id"], bank_id))
+        for sender, receiver in _plan(size, rng):
+            (sender, sender_bank), (receiver, receiver_bank) = accounts[sender], accounts[receiver]
+            recorder.time("transfer", transactions.transfer, sender_bank, receiver_bank, rng.randint(1, 100),
+                          sender, receiver, 1234, "benchmark")
+        for _ in range(reads):
+            account = rng.choice(accounts)[0]
+            recorder.time("read_user", users.read_user, account)
+            recorder.time("get_history", transactions.get_history, account, limit=20)
+    finally:
+        transactions.repository.store.close()
+    return recorder.results()
+
+
+RUNNERS = {"sqlite": run_sqlite, "json": run_json}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suites, sizes, reads, bcrypt_rounds, seed):
+    results = []
+    for suite in suites:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                operations = RUNNERS[suite](tmp, size, random.Random(seed), reads, bcrypt_rounds)
+            for operation, stats in operations.items():
+                results.append(dict(suite=suite, accounts=size, operation=operation, **stats))
+                print(f"{suite:<7} {size:>8} {operation:<20} p50 {stats['p50_us']:10.1f} us  "
+                      f"p99 {stats['p99_us']:10.1f} us  {stats['ops_per_s'] or 0:10.1f} ops/s", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return ``(key, old_p50, new_p50)`` for operations whose p50 grew by more than ``threshold``."""
+    old = {(r["suite"], r["accounts"], r["operation"]): r["p50_us"] for r in baseline["results"]}
+    regressions = []
+    for row in results:
+        key = (row["suite"], row["accounts"], row["operation"])
+        if key in old and old[key] and row["p50_us"] > old[key] * (1 + threshold):
+            regressions.append((key, old[key], row["p50_us"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", nargs="+", default=list(SUITES), choices=SUITES)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--reads", type=int, default=500, help="balance/statement lookups per size")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare p50s against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 growth, as a fraction")
+    args = parser.parse_args(argv)
+
+    results = run(args.suites, args.sizes, args.reads, args.bcrypt_rounds, args.seed)
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for (suite, size, operation), old, new in regressions:
+            print(f"REGRESSION {suite} {size} {operation}: p50 {old:.1f} us -> {new:.1f} us")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
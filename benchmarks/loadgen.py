@@ -0,0 +1,334 @@
+"""Production-like load against a local bank.db from several processes and threads.
+
+    python benchmarks/loadgen.py --db bank.db --accounts 2000 --processes 4 --threads 8 --duration 30
+
+The mix is about 70% balance reads (``get_user_by_id``), 20% transfers
+(``transfer_money``), 5% deposits and withdrawals and 5% logins, each
+picking accounts from a Zipf distribution (``--zipf`` exponent) so a few
+hot accounts see most of the traffic, as in production. Missing accounts
+are registered first through ``register_user`` and funded with
+``deposit_money``.
+
+Each process opens its own DatabaseManager and runs ``--threads`` workers
+until ``--duration`` seconds have passed. An operation that fails with
+SQLITE_BUSY/SQLITE_LOCKED is retried up to ``--retries`` times with
+backoff; its latency includes the retries. The report covers throughput,
+p50/p95/p99/p99.9/max per operation, outcomes (ok, rejected by a business
+rule, busy, pool or hasher timeouts), retries, and the time threads spent
+waiting for a pooled connection. A busy error returned well before
+``--busy-timeout`` is counted as a deadlock: SQLite gives up without
+waiting when waiting could never succeed.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness import percentile  # noqa: E402
+
+MIX = (("balance", 70), ("transfer", 20), ("deposit", 2.5), ("withdraw", 2.5), ("login", 5))
+PASSWORD = "secret"
+
+
+class ZipfSampler:
+    """Draws items with probability proportional to 1 / rank ** exponent."""
+
+    def __init__(self, items, exponent, rng):
+        self.items = list(items)
+        # Hot accounts are spread over the table rather than being the oldest rows
+        rng.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(self.items) + 1)))
+
+    def sample(self, rng):
+        return rng.choices(self.items, cum_weights=self.cum_weights)[0]
+
+
+def seed(args):
+    """Register and fund accounts until the database has ``--accounts`` of them."""
+    from BankApp.fileStorage import DatabaseManager
+    from BankApp.passwordHasher import PasswordHasher
+    from BankApp.Transaction import TransactionOperations
+
+    db_manager = DatabaseManager(args.db)
+    hasher = PasswordHasher(rounds=args.bcrypt_rounds)
+    operations = TransactionOperations(db_manager, password_hasher=hasher)
+    try:
+        bank_names = [f"Load Bank {b}" for b in range(args.banks)]
+        existing = {row[0] for row in db_manager._read_all("SELECT Bank_name FROM banks")}
+        for name in bank_names:
+            if name not in existing:
+                operations.create_bank(name, "Street 1", "City", "Main", "IFSC0000001", "0000000000",
+                                       "bank@example.com", "saving", None)
+        count = db_manager._read_one("SELECT COUNT(*) FROM users WHERE username LIKE 'load%'")[0]
+        for i in range(count, args.accounts):
+            operations.register_user(f"load{i}", PASSWORD, "Load", "User", bank_names[i % args.banks],
+                                     f"load{i}@example.com")
+            number = operations.get_user_by_username(f"load{i}")["user_account_number"]
+            operations.deposit_money(number, args.opening_balance)
+        rows = db_manager._read_all(
+            "SELECT u.user_account_number, u.username, b.Bank_name FROM users u "
+            "JOIN banks b ON b.bank_registration_number = u.bank_id WHERE u.username LIKE 'load%' "
+            "ORDER BY u.user_account_number")
+        return [tuple(row) for row in rows[:args.accounts]]
+    finally:
+        hasher.close()
+        db_manager.close()
+
+
+def classify(exc):
+    """Outcome name for an exception raised by an operation."""
+    from BankApp.fileStorage import PoolTimeoutError
+    from BankApp.passwordHasher import HasherBusyError
+
+    if isinstance(exc, PoolTimeoutError):
+        return "pool_timeout"
+    if isinstance(exc, HasherBusyError):
+        return "hasher_busy"
+    if isinstance(exc, sqlite3.OperationalError):
+        name = getattr(exc, "sqlite_errorname", "") or ""
+        message = str(exc)
+        if name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED")) or "locked" in message or "busy" in message:
+            return "busy"
+        return "sqlite_error"
+    if isinstance(exc, ValueError):
+        return "rejected"
+    return "error"
+
+
+class Stats:
+    """Per-process results, merged by the parent."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name, _ in MIX}
+        self.outcomes = {}
+        self.busy_errors = {}
+        self.retries = 0
+        self.retries_exhausted = 0
+        self.deadlocks = 0
+
+    def count(self, table, key, amount=1):
+        table[key] = table.get(key, 0) + amount
+
+
+def run_thread(operations, accounts, args, stats, rng, deadline):
+    sampler = ZipfSampler(accounts, args.zipf, rng)
+    names = [name for name, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    busy_timeout = args.busy_timeout / 1000
+    clock = time.perf_counter
+    latencies = {name: [] for name in names}
+    outcomes, busy_errors = {}, {}
+    retries = exhausted = deadlocks = 0
+
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        number, username, _ = sampler.sample(rng)
+        if name == "balance":
+            call = lambda: operations.get_user_by_id(number)  # noqa: E731
+        elif name == "transfer":
+            receiver = sampler.sample(rng)
+            while receiver[0] == number:
+                receiver = sampler.sample(rng)
+            amount = rng.randint(1, 100)
+            call = lambda: operations.transfer_money(number, receiver[0], receiver[2], amount, "load")  # noqa: E731
+        elif name == "deposit":
+            call = lambda: operations.deposit_money(number, rng.randint(1, 100))  # noqa: E731
+        elif name == "withdraw":
+            call = lambda: operations.withdraw_money(number, rng.randint(1, 100))  # noqa: E731
+        else:
+            call = lambda: operations.login(username, PASSWORD)  # noqa: E731
+
+        start = clock()
+        for attempt in range(args.retries + 1):
+            attempt_start = clock()
+            try:
+                call()
+                outcome = "ok"
+                break
+            except Exception as exc:
+                outcome = classify(exc)
+                if outcome != "busy":
+                    break
+                error = getattr(exc, "sqlite_errorname", None) or str(exc)
+                busy_errors[error] = busy_errors.get(error, 0) + 1
+                if clock() - attempt_start < busy_timeout / 2:
+                    deadlocks += 1
+                if attempt == args.retries:
+                    exhausted += 1
+                    break
+                retries += 1
+                time.sleep(rng.uniform(0, 0.001 * 2 ** attempt))
+        latencies[name].append(clock() - start)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    with stats.lock:
+        for name, samples in latencies.items():
+            stats.latencies[name].extend(samples)
+        for key, value in outcomes.items():
+            stats.count(stats.outcomes, key, value)
+        for key, value in busy_errors.items():
+            stats.count(stats.busy_errors, key, value)
+        stats.retries += retries
+        stats.retries_exhausted += exhausted
+        stats.deadlocks += deadlocks
+
+
+def run_process(index, args, accounts, start_at, results):
+    from BankApp.fileStorage import DatabaseManager, StorageProfile
+    from BankApp.passwordHasher import PasswordHasher
+    from BankApp.Transaction import TransactionOperations
+
+    db_manager = DatabaseManager(args.db, pool_size=args.pool_size or args.threads,
+                                 profile=StorageProfile(busy_timeout=args.busy_timeout))
+    hasher = PasswordHasher(rounds=args.bcrypt_rounds)
+    operations = TransactionOperations(db_manager, password_hasher=hasher)
+    slow_queries = None
+    if args.slow_query_ms is not None:
+        slow_queries = db_manager.enable_slow_query_log(threshold=args.slow_query_ms / 1000)
+    stats = Stats()
+    # All processes start together, after the slowest one finished importing
+    time.sleep(max(start_at - time.time(), 0))
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=run_thread,
+                         args=(operations, accounts, args, stats, random.Random(args.seed * 1000 + index * 100 + t),
+                               deadline))
+        for t in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    hasher.close()
+    results.put({
+        "latencies": stats.latencies,
+        "outcomes": stats.outcomes,
+        "busy_errors": stats.busy_errors,
+        "retries": stats.retries,
+        "retries_exhausted": stats.retries_exhausted,
+        "deadlocks": stats.deadlocks,
+        "pools": db_manager.pool_stats(),
+        "queries": slow_queries.report(n=args.top_queries) if slow_queries is not None else [],
+    })
+    if slow_queries is not None:
+        slow_queries.close()
+    db_manager.close()
+
+
+def merge(parts, duration):
+    latencies = {name: [] for name, _ in MIX}
+    queries = {}
+    report = {"outcomes": {}, "busy_errors": {}, "retries": 0, "retries_exhausted": 0, "deadlocks": 0,
+              "pool_wait": {"write_s": 0.0, "read_s": 0.0, "max_s": 0.0, "timeouts": 0}}
+    for part in parts:
+        for name, samples in part["latencies"].items():
+            latencies[name].extend(samples)
+        for table in ("outcomes", "busy_errors"):
+            for key, value in part[table].items():
+                report[table][key] = report[table].get(key, 0) + value
+        for key in ("retries", "retries_exhausted", "deadlocks"):
+            report[key] += part[key]
+        for pool in ("write", "read"):
+            stats = part["pools"][pool]
+            report["pool_wait"][f"{pool}_s"] += stats["wait_time_total"]
+            report["pool_wait"]["max_s"] = max(report["pool_wait"]["max_s"], stats["wait_time_max"])
+            report["pool_wait"]["timeouts"] += stats["timeouts"]
+        for entry in part["queries"]:
+            merged = queries.setdefault(entry["statement"], dict(entry, total=0.0, count=0, slow=0, max=0.0))
+            merged["total"] += entry["total"]
+            merged["count"] += entry["count"]
+            merged["slow"] += entry["slow"]
+            merged["max"] = max(merged["max"], entry["max"])
+    report["queries"] = sorted(queries.values(), key=lambda entry: entry["total"], reverse=True)
+    total = sum(len(samples) for samples in latencies.values())
+    report["operations"] = total
+    report["throughput"] = round(total / duration, 1)
+    report["latency_ms"] = {
+        name: {
+            "count": len(samples),
+            "p50": round(percentile(samples, 50) * 1e3, 3),
+            "p95": round(percentile(samples, 95) * 1e3, 3),
+            "p99": round(percentile(samples, 99) * 1e3, 3),
+            "p999": round(percentile(samples, 99.9) * 1e3, 3),
+            "max": round(max(samples) * 1e3, 3),
+        }
+        for name, samples in latencies.items() if samples
+    }
+    return report
+
+
+def print_report(report):
+    print(f"{report['operations']} operations, {report['throughput']} ops/s")
+    for name, stats in report["latency_ms"].items():
+        print(f"  {name:<9} {stats['count']:>8}  p50 {stats['p50']:8.2f} ms  p95 {stats['p95']:8.2f} ms  "
+              f"p99 {stats['p99']:8.2f} ms  p99.9 {stats['p999']:8.2f} ms  max {stats['max']:8.2f} ms")
+    print(f"  outcomes {report['outcomes']}")
+    print(f"  busy {report['busy_errors']}  retries {report['retries']}  "
+          f"exhausted {report['retries_exhausted']}  deadlocks {report['deadlocks']}")
+    wait = report["pool_wait"]
+    print(f"  pool wait: write {wait['write_s']:.3f} s  read {wait['read_s']:.3f} s  "
+          f"max {wait['max_s'] * 1e3:.1f} ms  timeouts {wait['timeouts']}")
+    if report["queries"]:
+        print("  top statements by total time:")
+    for entry in report["queries"]:
+        flag = "  FULL SCAN" if entry["full_scans"] else ""
+        print(f"    {entry['total'] * 1e3:10.1f} ms  {entry['count']:>8} calls  {entry['slow']:>6} slow  "
+              f"max {entry['max'] * 1e3:7.1f} ms{flag}  {entry['statement'][:100]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="bank.db")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--banks", type=int, default=10)
+    parser.add_argument("--opening-balance", type=int, default=10_000)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4, help="worker threads per process")
+    parser.add_argument("--pool-size", type=int, default=None, help="connections per pool (default: --threads)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--zipf", type=float, default=1.1, help="skew exponent; 0 is uniform")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="SQLite busy_timeout in ms")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help="log statements slower than this and report the top ones by total time")
+    parser.add_argument("--top-queries", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="output", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    accounts = seed(args)
+    if len(accounts) < 2:
+        parser.error("need at least two accounts")
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    start_at = time.time() + 1.0 + 0.2 * args.processes
+    processes = [context.Process(target=run_process, args=(i, args, accounts, start_at, results))
+                 for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    # Drain before joining so large results don't block the children
+    parts = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    report = merge(parts, args.duration)
+    report["arguments"] = vars(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
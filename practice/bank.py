@@ -1,4 +1,5 @@
 from practice.fileStorage import FileOperation, DataBase
+import copy
 import datetime
 import uuid
 import json
@@ -146,3 +147,108 @@ class BankDb(DataBase, FileOperation):
         if not staff:
             raise ValueError("Staff not found")
         return dict(staff)
+
+
+class BankOperation(FileOperation):
+    """Bank records kept in the JSON document store."""
+
+    def __init__(self, filename='banks.json', backend=None, stream=False):
+        super().__init__(filename, backend, stream)
+
+    def create_bank(self, name, location, branch, ifsc, contact, email, account_types):
+        if not isinstance(name, str):
+            return "Invalid name, must be a string"
+        if not isinstance(location, str):
+            return "Invalid location, must be a string"
+        if not isinstance(branch, str):
+            return "Invalid branch, must be a string"
+        if not isinstance(ifsc, str):
+            return "Invalid ifsc, must be a string"
+        if not isinstance(contact, str):
+            return "Invalid contact, must be a string"
+        if not isinstance(email, str):
+            return "Invalid email, must be a string"
+        if not isinstance(account_types, list):
+            return "Invalid account_types, must be a list"
+        for account_type in account_types:
+            if not isinstance(account_type, str):
+                return "Invalid account_type, must be a string"
+        bank_id = str(uuid.uuid4())[:15]
+        bank = {
+            "id": bank_id,
+            "creation_date": str(datetime.date.today()),
+            "creation_time": str(datetime.datetime.now().time()),
+            "last_modified": str(datetime.date.today()),
+            "name": name,
+            "location": location,
+            "branch": branch,
+            "ifsc": ifsc,
+            "contact": contact,
+            "email": email,
+            "account_types": account_types,
+            "users": {},
+        }
+        repository = self.repository
+        with repository.locked(), repository.lock:
+            repository.banks[bank_id] = copy.deepcopy(bank)
+            repository.mark_bank_created(bank_id)
+        return bank
+
+    def update_bank(self, bank_id, name, location, branch, ifsc, contact, email, account_types):
+        repository = self.repository
+        with repository.locked(), repository.lock:
+            bank = repository.banks.get(bank_id)
+            if not bank:
+                return None
+            if not isinstance(name, str):
+                return "Invalid name, must be a string"
+            if not isinstance(location, str):
+                return "Invalid location, must be a string"
+            if not isinstance(branch, str):
+                return "Invalid branch, must be a string"
+            if not isinstance(ifsc, str):
+                return "Invalid ifsc, must be a string"
+            if not isinstance(contact, str):
+                return "Invalid contact, must be a string"
+            if not isinstance(email, str):
+                return "Invalid email, must be a string"
+            if not isinstance(account_types, list):
+                return "Invalid account_types, must be a list"
+            for account_type in account_types:
+                if not isinstance(account_type, str):
+                    return "Invalid account_type, must be a string"
+            bank["name"] = name
+            bank["location"] = location
+            bank["branch"] = branch
+            bank["ifsc"] = ifsc
+            bank["contact"] = contact
+            bank["email"] = email
+            bank["account_types"] = list(account_types)
+            bank["last_modified"] = str(datetime.date.today())
+            repository.mark_bank_dirty(bank_id)
+            return copy.deepcopy(bank)
+
+    def delete_bank(self, bank_id):
+        repository = self.repository
+        with repository.locked(), repository.lock:
+            if bank_id not in repository.banks:
+                return False
+            del repository.banks[bank_id]
+            repository.mark_bank_deleted(bank_id)
+            return True
+
+    def list_banks(self):
+        if self.stream:
+            banks = (bank for _, bank in self.reader.iter_banks())
+        else:
+            banks = self.read().values()
+        return "\n".join(
+            f"{bank['id']:<10} {bank['name']}"
+            for bank in banks
+        )
+
+    def read_bank(self, bank_id):
+        if self.stream:
+            return self.reader.get_bank(bank_id, users=True, history=True)
+        banks = self.read()
+        return banks.get(bank_id)
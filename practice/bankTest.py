@@ -1,32 +1,32 @@
 
 import datetime
-import json
 import logging
 from pathlib import Path
 import uuid
 
+from practice.serialization import dump_file, get_codec, load_file
+
 
 class BankOperation:
-    def __init__(self, filename='banks.json'):
+    def __init__(self, filename='banks.json', codec=None):
         self.banks_file = Path(filename)
+        self.codec = get_codec(codec)
         # Ensure the file exists on initialization.
         if not self.banks_file.is_file():
             self.save({})
 
     def save(self, data):
         try:
-            with self.banks_file.open('w') as f:
-                json.dump(data, f, indent=4)
+            dump_file(self.banks_file, data, self.codec)
         except OSError as e:
             logging.error(f"Error saving {self.banks_file}: {e}")
 
     def read(self):
         try:
-            with self.banks_file.open('r') as f:
-                return json.load(f)
+            return load_file(self.banks_file)
         except (OSError, IOError) as e:
             logging.error(f"Error reading {self.banks_file}: {e}")
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             logging.error(f"Error parsing {self.banks_file}: {e}")
         return {}
         
@@ -125,8 +125,9 @@ class BankOperation:
 class BankOperation:
     Bank_data = {}
 
-    def __init__(self, BankName, BankLocation, BankBranch, BankIFSC, LLCNumber, BankContact, BankEmail, BankAccountType):
+    def __init__(self, BankName, BankLocation, BankBranch, BankIFSC, LLCNumber, BankContact, BankEmail, BankAccountType, codec=None):
         self.bankId = str(uuid.uuid4())[:15]
+        self.codec = get_codec(codec)
         self.BankName = BankName
         self.BankLocation = BankLocation
         self.BankBranch = BankBranch
@@ -181,28 +182,22 @@ class BankOperation:
         return BankOperation.Bank_data.get(bankId)
 
     def saveBank(self):
-        try:
-            with open('bank.json', 'w') as f:
-                json.dump(BankOperation.Bank_data, f, indent=4)
-        except OSError as e:
-            logging.error(f"Error saving {self.banks_file}: {e}")
+        self.save(BankOperation.Bank_data)
 
     def read(self):
         try:
-            with open('bank.json', 'r') as f:
-                return json.load(f)
+            return load_file('bank.json')
         except (OSError, IOError) as e:
-            logging.error(f"Error reading {self.banks_file}: {e}")
-        except json.JSONDecodeError as e:
-            logging.error(f"Error parsing {self.banks_file}: {e}")
+            logging.error(f"Error reading bank.json: {e}")
+        except ValueError as e:
+            logging.error(f"Error parsing bank.json: {e}")
         return {}
 
     def save(self, data):
         try:
-            with open('bank.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            dump_file('bank.json', data, self.codec)
         except OSError as e:
-            logging.error(f"Error saving {self.banks_file}: {e}")
+            logging.error(f"Error saving bank.json: {e}")
 
     def close(self):
         self.save(BankOperation.Bank_data)
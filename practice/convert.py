@@ -0,0 +1,34 @@
+"""Convert a bank data file between the formats in serialization.py.
+
+    python -m practice.convert banks.json banks.bin --to record
+
+The input format is detected from the file itself.
+"""
+import argparse
+import sys
+
+from practice.serialization import CODECS, detect_codec, dump_file
+
+
+def convert(source, target, codec):
+    """Rewrite ``source`` as ``target`` in ``codec``; return the input codec's name."""
+    with open(source, 'rb') as f:
+        raw = f.read()
+    source_codec = detect_codec(raw)
+    dump_file(target, source_codec.loads(raw), codec)
+    return source_codec.name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="file to read")
+    parser.add_argument("target", help="file to write")
+    parser.add_argument("--to", dest="codec", choices=sorted(CODECS), required=True, help="output format")
+    args = parser.parse_args(argv)
+    source_codec = convert(args.source, args.target, args.codec)
+    print(f"{args.source} ({source_codec}) -> {args.target} ({args.codec})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
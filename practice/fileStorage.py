@@ -1,15 +1,38 @@
-import json
 import logging
+import os
 import sqlite3
 from pathlib import Path
 
+from practice.logStorage import LogStore
+from practice.recordStorage import RecordFile
+from practice.repository import BankRepository
+from practice.serialization import detect_codec, dump_file, get_codec, load_file
+from practice.streamStorage import StreamReader
+
 class DataHandler:
     """Handles data operations with both JSON files and SQLite database."""
     
-    def __init__(self, db_file, json_file):
-        """Initialize the DataHandler with paths to the database file and JSON file."""
+    def __init__(self, db_file, json_file, codec=None, durability=None, double_buffer=False, mmap_reads=False):
+        """Initialize the DataHandler with paths to the database file and JSON file.
+
+        ``codec`` names the serialization.py format used by ``save()``;
+        ``read()`` accepts any of them. ``durability`` is one of
+        serialization.DURABILITY_LEVELS. With ``double_buffer`` the bytes of
+        the last committed save are kept in memory and ``read()`` decodes them
+        instead of going to disk, as long as the file is still the one written.
+        With ``mmap_reads`` every save also writes ``<json_file>.rec`` (see
+        RecordFile) and ``read_bank``/``read_account``/``list_banks`` serve
+        from a memory map of it instead of parsing the whole file.
+        """
         self.db_file = db_file
         self.json_file = json_file
+        self.codec = get_codec(codec)
+        self.durability = durability
+        self.double_buffer = double_buffer
+        self.mmap_reads = mmap_reads
+        self.records = RecordFile(f"{json_file}.rec")
+        # (file stamp, bytes) of the last committed version, swapped in whole
+        self._committed = None
         self.conn = None
         try:
             self.conn = sqlite3.connect(self.db_file)
@@ -59,24 +82,85 @@ class DataHandler:
                 )
             """)
 
+    def _file_stamp(self):
+        st = os.stat(self.json_file)
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
     def save(self, data):
-        """Save data to the JSON file."""
+        """Save data to the JSON file.
+
+        The file is replaced atomically, so a crash or a concurrent ``read()``
+        sees either the old or the new contents, never a truncated file.
+        """
         try:
-            with open(self.json_file, 'w') as f:
-                json.dump(data, f, indent=4)
+            raw = dump_file(self.json_file, data, self.codec, durability=self.durability)
+            if self.double_buffer:
+                self._committed = (self._file_stamp(), raw)
+            if self.mmap_reads:
+                RecordFile.write(self.records.path, data, durability=self.durability)
+                self.records.refresh()
         except OSError as e:
             logging.error(f"Error saving to {self.json_file}: {e}")
             raise
 
-    def read(self):
-        """Read data from the JSON file."""
+    def read(self, stream=False):
+        """Read data from the JSON file.
+
+        With ``stream`` an iterator of ``(bank_id, bank)`` is returned instead,
+        parsed incrementally and without transaction histories.
+        """
+        if stream:
+            return StreamReader(self.json_file).iter_banks(users=True)
         try:
-            with open(self.json_file, 'r') as f:
-                return json.load(f)
-        except (OSError, IOError, json.JSONDecodeError) as e:
+            if self.double_buffer:
+                committed = self._committed
+                stamp = self._file_stamp()
+                if committed is None or committed[0] != stamp:
+                    with open(self.json_file, 'rb') as f:
+                        committed = self._committed = (stamp, f.read())
+                return detect_codec(committed[1]).loads(committed[1])
+            return load_file(self.json_file)
+        except (OSError, IOError, ValueError) as e:
             logging.error(f"Error reading from {self.json_file}: {e}")
             raise
 
+    def _record_file(self):
+        """The record file, rebuilt first if the JSON file is newer (written by someone else)."""
+        try:
+            stale = os.stat(self.records.path).st_mtime_ns < os.stat(self.json_file).st_mtime_ns
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            RecordFile.write(self.records.path, self.read(), durability=self.durability)
+        return self.records
+
+    def read_bank(self, bank_id, users=False):
+        """Return one bank (with its users if asked), or None."""
+        if self.mmap_reads:
+            return self._record_file().get_bank(bank_id, users=users)
+        bank = self.read().get(bank_id)
+        if bank is not None and not users:
+            bank.pop("users", None)
+        return bank
+
+    def read_account(self, account_id):
+        """Return ``(bank_id, account)`` for an account, or ``(None, None)``."""
+        if self.mmap_reads:
+            return self._record_file().get_account(account_id)
+        for bank_id, bank in self.read().items():
+            account = bank.get("users", {}).get(str(account_id))
+            if account is not None:
+                return bank_id, account
+        return None, None
+
+    def list_banks(self):
+        """Return ``(bank_id, name)`` for every bank."""
+        if self.mmap_reads:
+            banks = self._record_file().iter_banks()
+        else:
+            banks = self.read().items()
+        return [(bank_id, bank.get("name")) for bank_id, bank in banks]
+
     def execute_query(self, query, args=None):
         """Execute a query on the SQLite database."""
         with self.conn:
@@ -107,3 +191,77 @@ class DataHandler:
         if self.conn:
             self.conn.close()
             self.conn = None
+
+
+class FileOperation:
+    """JSON-document store used by the bank, user and transaction operations.
+
+    Data lives in a process-wide BankRepository on top of a LogStore, so a
+    save appends only what changed instead of rewriting the file;
+    ``banks.json`` itself is the periodic checkpoint. ``read()`` and
+    ``save()`` keep their whole-document semantics; ``repository`` gives
+    direct access to the live data with dirty tracking.
+
+    With ``stream`` the listing and lookup methods parse the files
+    incrementally through ``reader`` instead of loading the repository, which
+    is then only opened on the first write.
+    """
+
+    def __init__(self, filename, backend=None, stream=False, codec=None, durability=None):
+        """Initialize the store for ``filename``; ``backend`` overrides the LogStore.
+
+        ``codec`` picks the snapshot format and ``durability`` the fsync
+        policy (see serialization.py).
+        """
+        if backend is None and (codec is not None or durability is not None):
+            backend = LogStore.open(filename, codec=codec, durability=durability)
+        self.filename = filename
+        self.stream = stream
+        self.reader = StreamReader(filename)
+        self._backend = backend
+        self._repository = None
+        if not stream:
+            self._repository = BankRepository.open(filename, store=backend)
+
+    @property
+    def repository(self):
+        if self._repository is None:
+            self._repository = BankRepository.open(self.filename, store=self._backend)
+        return self._repository
+
+    @property
+    def backend(self):
+        return self.repository.store
+
+    def read(self):
+        """Return a copy of the stored data."""
+        return self.repository.snapshot()
+
+    def save(self, data, encoder=None):
+        """Persist ``data``, using ``encoder`` as the JSON encoder class."""
+        try:
+            self.repository.save(data, encoder=encoder)
+        except OSError as e:
+            logging.error(f"Error saving to {self.filename}: {e}")
+            raise
+
+
+class DataBase:
+    """Thin wrapper around a SQLite connection for the practice models."""
+
+    def __init__(self, db_file):
+        """Initialize the DataBase with a path to the database file."""
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+
+    def _execute(self, query, args=None):
+        """Execute a query, commit it and return the cursor."""
+        with self.conn:
+            return self.conn.execute(query, args or ())
+
+    def close(self):
+        """Close the SQLite database connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+
+class HistoryStore:
+    """Per-account transaction history kept outside the account records.
+
+    Each account gets a directory of JSON-lines segments holding at most
+    ``segment_size`` entries, so appending touches only the newest segment
+    and reading a page touches only the one or two segments it spans. Entry
+    ``n`` of an account lives at line ``n % segment_size`` of segment
+    ``n // segment_size``; that index is the pagination cursor.
+
+    Entry counts are cached per process and checked against the size of the
+    newest segment, so appends from other processes are noticed. Appenders in
+    different processes must still be serialized (the transaction code holds
+    the bank file's FileLock).
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory, **kwargs):
+        """Return the shared store for ``directory``; one per directory per process."""
+        key = os.path.abspath(directory)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls._instances[key] = cls(directory, **kwargs)
+            return store
+
+    def __init__(self, directory, segment_size=1000, durable=True):
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.durable = durable
+        self._lock = threading.Lock()
+        # account id -> (number of entries, size of the segment the next one goes to)
+        self._counts = {}
+
+    def _account_dir(self, account_id):
+        return self.directory / str(account_id)
+
+    def _segment(self, account_id, number):
+        return self._account_dir(account_id) / f"{number:08d}.jsonl"
+
+    def _read_segment(self, account_id, number):
+        try:
+            with self._segment(account_id, number).open('rb') as f:
+                return [line for line in f if line.endswith(b'\n')]
+        except FileNotFoundError:
+            return []
+
+    def count(self, account_id):
+        """Return the number of entries recorded for ``account_id``."""
+        with self._lock:
+            return self._count(account_id)
+
+    def _segment_size(self, account_id, count):
+        try:
+            return os.stat(self._segment(account_id, count // self.segment_size)).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _count(self, account_id):
+        key = str(account_id)
+        cached = self._counts.get(key)
+        if cached is not None and self._segment_size(key, cached[0]) == cached[1]:
+            return cached[0]
+        segments = sorted(self._account_dir(key).glob("*.jsonl"))
+        if segments:
+            last = int(segments[-1].stem)
+            count = last * self.segment_size + len(self._read_segment(key, last))
+        else:
+            count = 0
+        self._counts[key] = (count, self._segment_size(key, count))
+        return count
+
+    def append(self, account_id, entry, encoder=None):
+        """Append ``entry`` to the account's history and return its index."""
+        return self.append_many([(account_id, entry)], encoder=encoder)[0]
+
+    def append_many(self, entries, encoder=None):
+        """Append ``(account_id, entry)`` pairs and return their indexes."""
+        indexes = []
+        with self._lock:
+            # Group lines by segment so each file is opened and fsynced once
+            segments = {}
+            counts = {}
+            for account_id, entry in entries:
+                key = str(account_id)
+                index = counts[key] if key in counts else self._count(key)
+                path = self._segment(key, index // self.segment_size)
+                segments.setdefault(path, []).append(json.dumps(entry, cls=encoder, separators=(',', ':')) + '\n')
+                counts[key] = index + 1
+                indexes.append(index)
+            for path, lines in segments.items():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open('a', encoding='utf-8') as f:
+                    f.writelines(lines)
+                    if self.durable:
+                        f.flush()
+                        os.fsync(f.fileno())
+            for key, count in counts.items():
+                self._counts[key] = (count, self._segment_size(key, count))
+        return indexes
+
+    def page(self, account_id, cursor=None, limit=50):
+        """Return ``(entries, next_cursor)``, newest first.
+
+        ``cursor`` is the value returned by the previous call (None for the
+        newest page); ``next_cursor`` is None once the oldest entry is reached.
+        """
+        key = str(account_id)
+        end = self.count(key) if cursor is None else min(cursor, self.count(key))
+        start = max(end - limit, 0)
+        entries = []
+        number = (end - 1) // self.segment_size if end else 0
+        while end > start:
+            lines = self._read_segment(key, number)
+            first = number * self.segment_size
+            for line in reversed(lines[max(start - first, 0):end - first]):
+                entries.append(json.loads(line))
+            end = first
+            number -= 1
+        return entries, (start or None)
+
+    def migrate(self, repository, encoder=None):
+        """Move ``transaction_history`` lists out of the repository's accounts.
+
+        Returns the number of entries moved. Accounts are flushed without
+        their history once its entries are stored here. Run it once, with no
+        other writers, when switching an existing file over.
+        """
+        moved = 0
+        with repository.lock:
+            for bank_id, account in list(repository.iter_accounts()):
+                history = account.get("transaction_history")
+                if history is None:
+                    continue
+                self.append_many(((account["id"], entry) for entry in history), encoder=encoder)
+                del account["transaction_history"]
+                repository.mark_user_dirty(bank_id, account["id"])
+                moved += len(history)
+        repository.flush(encoder=encoder)
+        logging.info(f"Moved {moved} history entries to {self.directory}")
+        return moved
@@ -0,0 +1,102 @@
+import contextlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """Cross-process exclusive lock on ``path``, shared by the threads of one process.
+
+    The first thread to enter takes an ``flock`` on the file; threads that
+    enter while it is held just join, and the last one out releases it. So
+    the lock excludes other processes, not other threads, which coordinate
+    through AccountLocks and the repository lock instead. Where fcntl is not
+    available (Windows) only the in-process bookkeeping remains.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mutex = threading.Lock()
+        self._holders = 0
+        self._fd = None
+
+    def acquire(self):
+        with self._mutex:
+            if self._holders == 0 and fcntl is not None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+                except OSError:
+                    os.close(self._fd)
+                    self._fd = None
+                    raise
+            self._holders += 1
+
+    def release(self):
+        with self._mutex:
+            if self._holders == 0:
+                raise RuntimeError(f"Releasing {self.path} lock that is not held")
+            self._holders -= 1
+            if self._holders == 0 and self._fd is not None:
+                try:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                finally:
+                    os.close(self._fd)
+                    self._fd = None
+
+    @property
+    def held(self):
+        return self._holders > 0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class AccountLocks:
+    """In-process lock per account id, always taken in sorted order.
+
+    Sorting means two operations over the same accounts acquire them in the
+    same order, so they can't deadlock, while operations on disjoint accounts
+    don't wait for each other.
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, account_id):
+        with self._guard:
+            lock = self._locks.get(account_id)
+            if lock is None:
+                lock = self._locks[account_id] = threading.Lock()
+            return lock
+
+    @contextlib.contextmanager
+    def hold(self, *account_ids):
+        """Hold the locks for ``account_ids`` (duplicates and None ignored)."""
+        keys = sorted({str(account_id) for account_id in account_ids if account_id is not None})
+        acquired = []
+        try:
+            for key in keys:
+                lock = self._lock(key)
+                lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def discard(self, account_id):
+        """Forget the lock of a deleted account."""
+        with self._guard:
+            lock = self._locks.get(str(account_id))
+            if lock is not None and not lock.locked():
+                del self._locks[str(account_id)]
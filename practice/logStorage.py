@@ -0,0 +1,331 @@
+import copy
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from practice.locking import FileLock
+from practice.serialization import commit_temp, fsync_directory, get_codec, load_file, resolve_durability, write_temp
+
+
+class LogStore:
+    """Append-only mutation log with a JSON snapshot as its checkpoint.
+
+    Every change is appended to ``<file>.log`` as one JSON line holding a
+    ``set`` or ``del`` of a key path. On startup the snapshot (the original
+    JSON file) is loaded and the log replayed over it. A background thread
+    fsyncs the log in groups and, once the log grows past ``compact_bytes``,
+    rewrites the snapshot and starts a fresh log.
+
+    Records are idempotent (they carry whole values), so replaying a record
+    that the snapshot already contains is harmless.
+
+    Lock order is ``_file_lock`` -> ``state_lock`` -> ``_lock``. Callers that
+    mutate ``state`` in place (see BankRepository) hold ``state_lock``.
+    ``file_lock`` excludes other processes: loading, appending and compacting
+    all happen under it, so a reader never sees (and truncates) a record
+    another process is still writing.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, filename, **kwargs):
+        """Return the shared store for ``filename``; one per file per process."""
+        key = os.path.abspath(filename)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None or store.closed:
+                store = cls._instances[key] = cls(filename, **kwargs)
+            return store
+
+    def __init__(self, filename, sync_interval=0.005, compact_bytes=4 * 1024 * 1024, codec=None, durability=None):
+        """Load the snapshot, replay the log and start the background thread.
+
+        ``sync_interval`` is how long the background thread waits to gather
+        appends into one fsync; ``compact_bytes`` is the log size that
+        triggers a new snapshot, written with ``codec``. With ``durability``
+        "none" writers don't wait for the fsync (it still happens in the
+        background), trading the last few milliseconds of writes on power
+        loss for throughput.
+        """
+        self.codec = get_codec(codec)
+        self.durability = resolve_durability(durability)
+        self.snapshot_file = Path(filename)
+        self.log_file = Path(f"{filename}.log")
+        self.old_log_file = Path(f"{filename}.log.old")
+        self.sync_interval = sync_interval
+        self.compact_bytes = compact_bytes
+        self.closed = False
+
+        # Guards the log file and sequence numbers
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        # Guards the in-memory document
+        self.state_lock = threading.RLock()
+        # Held while the log file is fsynced or swapped, so the two never overlap
+        self._file_lock = threading.Lock()
+        # Serializes whole compactions
+        self._compact_lock = threading.Lock()
+        # Excludes other processes
+        self.file_lock = FileLock(f"{filename}.lock")
+
+        with self.file_lock:
+            self._state = self._load()
+        self._log = self.log_file.open('a', encoding='utf-8')
+        self._log_size = self._log.tell()
+        self._seq = 0
+        self._synced_seq = 0
+        self._compacting = False
+        # Set when an fsync fails; the log can no longer be trusted to be on disk
+        self._failure = None
+        self._stamp = self._file_stamp()
+
+        self._worker = threading.Thread(target=self._background, name=f"logstore-{self.snapshot_file.name}", daemon=True)
+        self._worker.start()
+
+    @property
+    def state(self):
+        """The live in-memory document; hold ``state_lock`` while changing it."""
+        return self._state
+
+    def _load(self):
+        """Read the snapshot and replay any logs written after it."""
+        state = {}
+        if self.snapshot_file.is_file():
+            try:
+                state = load_file(self.snapshot_file)
+            except ValueError as e:
+                logging.error(f"Error parsing {self.snapshot_file}: {e}")
+                raise
+        # A leftover .log.old means a compaction was interrupted; its records come first
+        for log_file in (self.old_log_file, self.log_file):
+            if log_file.is_file():
+                self._replay(log_file, state)
+        return state
+
+    def _replay(self, log_file, state):
+        """Apply every complete record in ``log_file``; drop a torn last line."""
+        good_offset = 0
+        with log_file.open('rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._apply(state, record)
+                good_offset += len(line)
+        if good_offset != log_file.stat().st_size:
+            logging.warning(f"Truncating torn record at offset {good_offset} of {log_file}")
+            with log_file.open('r+b') as f:
+                f.truncate(good_offset)
+
+    @staticmethod
+    def _apply(state, record):
+        """Apply one ``set``/``del`` record to ``state``."""
+        *parents, last = record["path"]
+        node = state
+        for key in parents:
+            node = node.setdefault(key, {})
+        if record["op"] == "set":
+            node[last] = record["value"]
+        elif record["op"] == "del":
+            node.pop(last, None)
+        else:
+            raise ValueError(f"Unknown log operation: {record['op']}")
+
+    def _file_stamp(self):
+        """Identity of the files on disk: (inode, size, mtime) of snapshot and log."""
+        stamp = []
+        for path in (self.snapshot_file, self.log_file):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def changed_externally(self):
+        """Return True if the files were modified by someone other than this store."""
+        with self._lock:
+            return self._file_stamp() != self._stamp
+
+    def reload(self):
+        """Re-read the files into the existing state dict, dropping the in-memory view."""
+        with self.file_lock, self._file_lock, self.state_lock, self._lock:
+            self._log.close()
+            state = self._load()
+            self._state.clear()
+            self._state.update(state)
+            self._log = self.log_file.open('a', encoding='utf-8')
+            self._log_size = self._log.tell()
+            self._stamp = self._file_stamp()
+
+    def read_disk(self):
+        """Return the document as stored on disk, leaving the live state alone."""
+        with self.file_lock:
+            return self._load()
+
+    def read(self):
+        """Return a copy of the current data."""
+        with self.state_lock:
+            return copy.deepcopy(self._state)
+
+    def save(self, data, encoder=None, durable=True):
+        """Log the top-level entries of ``data`` that differ from the stored ones.
+
+        Only changed banks are written, so the cost is proportional to the
+        change rather than to the whole file.
+        """
+        with self.state_lock:
+            records = [
+                {"op": "set", "path": [key], "value": value}
+                for key, value in data.items()
+                if key not in self._state or self._state[key] != value
+            ]
+            records.extend(
+                {"op": "del", "path": [key]}
+                for key in self._state.keys() - data.keys()
+            )
+            self.write(records, encoder=encoder, durable=False)
+        if durable:
+            self.sync()
+
+    def set(self, path, value, encoder=None, durable=True):
+        """Set the value at key ``path`` (a list of keys)."""
+        self.write([{"op": "set", "path": list(path), "value": value}], encoder=encoder, durable=durable)
+
+    def delete(self, path, durable=True):
+        """Delete the value at key ``path`` if it exists."""
+        self.write([{"op": "del", "path": list(path)}], durable=durable)
+
+    def write(self, records, encoder=None, durable=True, apply=True):
+        """Append ``records`` and return their sequence number.
+
+        With ``apply`` the records are also applied to the state; callers that
+        already changed the live state in place pass ``apply=False``. With
+        ``durable`` the call waits for the group fsync that covers them.
+        """
+        if not records:
+            return self._seq
+        lines = [json.dumps(record, cls=encoder, separators=(',', ':')) for record in records]
+        with self.file_lock, self.state_lock:
+            with self._lock:
+                if self.closed:
+                    raise ValueError(f"{self.snapshot_file} store is closed")
+                for line in lines:
+                    self._log.write(line + '\n')
+                    self._log_size += len(line) + 1
+                    if apply:
+                        # Apply the decoded record so memory matches what a replay would produce
+                        self._apply(self._state, json.loads(line))
+                self._log.flush()
+                self._stamp = self._file_stamp()
+                self._seq += 1
+                seq = self._seq
+                self._synced.notify_all()
+        if durable:
+            self.sync(seq)
+        return seq
+
+    def sync(self, seq=None):
+        """Block until everything up to ``seq`` (default: all appends so far) is on disk.
+
+        Raises OSError if the background fsync failed before reaching ``seq``.
+        """
+        if self.durability == "none":
+            return
+        with self._lock:
+            if seq is None:
+                seq = self._seq
+            self._synced.notify_all()
+            while self._synced_seq < seq and not self.closed and self._failure is None:
+                self._synced.wait()
+            if self._synced_seq < seq and self._failure is not None:
+                raise OSError(f"Could not sync {self.log_file}") from self._failure
+
+    def _background(self):
+        """Group fsyncs and trigger compaction."""
+        while True:
+            with self._lock:
+                while self._synced_seq == self._seq and not self.closed:
+                    self._synced.wait()
+                if self.closed:
+                    return
+            # Let concurrent writers join this fsync
+            time.sleep(self.sync_interval)
+            with self._file_lock:
+                with self._lock:
+                    seq = self._seq
+                    log = self._log
+                try:
+                    os.fsync(log.fileno())
+                except OSError as e:
+                    # A failed fsync may have dropped dirty pages; retrying could report a false success
+                    logging.error(f"Error syncing {self.log_file}: {e}")
+                    with self._lock:
+                        self._failure = e
+                        self._synced.notify_all()
+                    return
+            with self._lock:
+                self._synced_seq = max(self._synced_seq, seq)
+                self._synced.notify_all()
+                compact = self._log_size >= self.compact_bytes and not self._compacting
+                if compact:
+                    self._compacting = True
+            if compact:
+                try:
+                    self.compact()
+                except Exception as e:
+                    # The logs still hold every record, so keep syncing; the next fsync retries
+                    logging.error(f"Error compacting {self.log_file}: {e}")
+                finally:
+                    self._compacting = False
+
+    def compact(self):
+        """Write the current state as the new snapshot and start an empty log."""
+        with self.file_lock, self._compact_lock:
+            with self._file_lock, self.state_lock, self._lock:
+                snapshot = self.codec.dumps(self._state)
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                if self.old_log_file.is_file():
+                    # An earlier compaction failed after its swap; keep those records ahead of these
+                    with self.old_log_file.open('ab') as old, self.log_file.open('rb') as new:
+                        shutil.copyfileobj(new, old)
+                        old.flush()
+                        os.fsync(old.fileno())
+                    self.log_file.unlink()
+                else:
+                    os.replace(self.log_file, self.old_log_file)
+                self._log = self.log_file.open('a', encoding='utf-8')
+                self._log_size = 0
+                self._stamp = self._file_stamp()
+
+            tmp_file = write_temp(self.snapshot_file, snapshot, "fsync")
+            with self._lock:
+                commit_temp(tmp_file, self.snapshot_file, "none")
+                self.old_log_file.unlink()
+                self._stamp = self._file_stamp()
+            # Make the snapshot rename and the log unlink durable together
+            fsync_directory(self.snapshot_file)
+
+    def close(self):
+        """Flush, fsync and stop the background thread."""
+        with self._file_lock, self._lock:
+            if self.closed:
+                return
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._synced_seq = self._seq
+            self.closed = True
+            self._synced.notify_all()
+        self._worker.join()
+        self._log.close()
@@ -0,0 +1,152 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+from practice.serialization import CompactJsonCodec, atomic_write
+
+
+_CODEC = CompactJsonCodec()
+
+
+def _digest(kind, key):
+    """Fixed-size index key for a bank (``b``) or account (``a``) id."""
+    return hashlib.blake2b(f"{kind}:{key}".encode('utf-8'), digest_size=16).digest()
+
+
+class RecordFile:
+    """Bank data laid out as independently decodable records plus an index.
+
+    Layout (little endian)::
+
+        header   MAGIC, bank table offset, bank count, index offset, index count
+        records  one compact-JSON record per bank (without its users) and per account
+        banks    (offset, length) of every bank record, in document order
+        index    (digest, offset, length) sorted by digest
+
+    The index digest is a blake2b of the kind and id, so a lookup is a binary
+    search over fixed-size entries in the mapping followed by decoding one
+    record; nothing else in the file is parsed. The file is replaced
+    atomically by ``write()``, and readers remap when its inode, size or
+    mtime changes.
+    """
+
+    MAGIC = b"BNKIDX\x01\x00"
+    _HEADER = struct.Struct('<8sQQQQ')
+    _BANK = struct.Struct('<QI')
+    _ENTRY = struct.Struct('<16sQI')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # (stamp, mmap, header fields); replaced whole so readers never see a mix
+        self._mapping = None
+
+    @classmethod
+    def write(cls, path, data, encoder=None, durability=None):
+        """Write ``data`` (the bank document) to ``path`` in record layout."""
+        chunks = [b'\0' * cls._HEADER.size]
+        offset = cls._HEADER.size
+        banks, index = [], []
+
+        def add(kind, key, record):
+            nonlocal offset
+            raw = _CODEC.dumps(record, encoder=encoder)
+            chunks.append(raw)
+            index.append((_digest(kind, key), offset, len(raw)))
+            offset += len(raw)
+            return index[-1]
+
+        for bank_id, bank in data.items():
+            # Ids are compared as strings, as JSON would have loaded them
+            bank_id = str(bank_id)
+            users = {str(account_id): account for account_id, account in bank.get("users", {}).items()}
+            fields = {key: value for key, value in bank.items() if key != "users"}
+            _, bank_offset, bank_length = add("b", bank_id, {"id": bank_id, "bank": fields, "accounts": list(users)})
+            banks.append((bank_offset, bank_length))
+            for account_id, account in users.items():
+                add("a", account_id, {"id": account_id, "bank_id": bank_id, "account": account})
+
+        bank_table = offset
+        chunks.extend(cls._BANK.pack(*entry) for entry in banks)
+        offset += len(banks) * cls._BANK.size
+        index.sort()
+        chunks.extend(cls._ENTRY.pack(*entry) for entry in index)
+        chunks[0] = cls._HEADER.pack(cls.MAGIC, bank_table, len(banks), offset, len(index))
+        atomic_write(path, b''.join(chunks), durability)
+
+    def _stamp(self):
+        st = os.stat(self.path)
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _current(self):
+        """Return the mapping of the file as it is now, remapping after a commit."""
+        stamp = self._stamp()
+        mapping = self._mapping
+        if mapping is not None and mapping[0] == stamp:
+            return mapping
+        with self._lock:
+            mapping = self._mapping
+            if mapping is None or mapping[0] != stamp:
+                with open(self.path, 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    # Stamp the file we actually mapped, in case it was replaced meanwhile
+                    stamp = os.fstat(f.fileno())
+                    stamp = stamp.st_ino, stamp.st_size, stamp.st_mtime_ns
+                magic, *header = self._HEADER.unpack_from(mapped, 0)
+                if magic != self.MAGIC:
+                    raise ValueError(f"{self.path} is not a record file")
+                # The old map is closed when the last reader drops it
+                mapping = self._mapping = (stamp, mapped, header)
+            return mapping
+
+    def refresh(self):
+        """Remap now if the file was replaced."""
+        self._current()
+
+    def _lookup(self, kind, key):
+        _, mapped, (_, _, index_offset, index_count) = self._current()
+        digest = _digest(kind, key)
+        entry_size = self._ENTRY.size
+        lo, hi = 0, index_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = index_offset + mid * entry_size
+            found = mapped[position:position + 16]
+            if found < digest:
+                lo = mid + 1
+            elif found > digest:
+                hi = mid
+            else:
+                _, offset, length = self._ENTRY.unpack_from(mapped, position)
+                return _CODEC.loads(mapped[offset:offset + length])
+        return None
+
+    def get_bank(self, bank_id, users=False):
+        """Return one bank, or None; its users only when asked for."""
+        record = self._lookup("b", bank_id)
+        if record is None or record["id"] != bank_id:
+            return None
+        bank = record["bank"]
+        if users:
+            bank["users"] = {}
+            for account_id in record["accounts"]:
+                _, account = self.get_account(account_id)
+                bank["users"][account_id] = account
+        return bank
+
+    def get_account(self, account_id):
+        """Return ``(bank_id, account)``, or ``(None, None)``."""
+        record = self._lookup("a", str(account_id))
+        if record is None or record["id"] != str(account_id):
+            return None, None
+        return record["bank_id"], record["account"]
+
+    def iter_banks(self):
+        """Yield ``(bank_id, bank)`` without users, in document order."""
+        _, mapped, (bank_table, bank_count, _, _) = self._current()
+        for i in range(bank_count):
+            offset, length = self._BANK.unpack_from(mapped, bank_table + i * self._BANK.size)
+            record = _CODEC.loads(mapped[offset:offset + length])
+            yield record["id"], record["bank"]
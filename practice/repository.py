@@ -0,0 +1,306 @@
+import contextlib
+import copy
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from practice.locking import AccountLocks
+from practice.logStorage import LogStore
+
+
+class BankRepository:
+    """Process-level in-memory copy of the bank document with dirty tracking.
+
+    The document is loaded once and mutated in place. Callers mark the banks
+    and users they changed, and ``flush()`` appends only those entities to
+    the LogStore instead of re-serializing everything. Before each use,
+    ``refresh()`` compares the files' inode, size and mtime with what this
+    process last wrote and reloads if another process edited them.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, filename, store=None):
+        """Return the shared repository for ``filename``; one per file per process."""
+        key = os.path.abspath(filename)
+        with cls._instances_lock:
+            repository = cls._instances.get(key)
+            if repository is None or repository.store.closed:
+                repository = cls._instances[key] = cls(filename, store)
+            return repository
+
+    def __init__(self, filename, store=None):
+        self.filename = filename
+        self.store = store or LogStore.open(filename)
+        # Shared with the store so compaction never serializes a half-applied change
+        self.lock = self.store.state_lock
+        # Held (in sorted order) around changes to specific accounts
+        self.account_locks = AccountLocks()
+        self._pending = OrderedDict()
+        # Paths marked by the current thread's locked() block, for rollback
+        self._local = threading.local()
+        # account id (str) -> bank id, so account lookups don't scan every bank
+        self._accounts = {}
+        # bank id -> its account ids, so dropping a bank from the index is cheap
+        self._bank_accounts = {}
+        self._rebuild_index()
+
+    @property
+    def banks(self):
+        """The live bank document; hold ``lock`` while reading or changing it."""
+        return self.store.state
+
+    def refresh(self):
+        """Reload the document if the files changed outside this process."""
+        if not self.store.changed_externally():
+            return
+        with self.store.file_lock, self.lock:
+            if self._pending:
+                logging.warning(f"Discarding {len(self._pending)} unflushed changes; {self.filename} changed on disk")
+                self._pending.clear()
+            self.store.reload()
+            self._rebuild_index()
+
+    def snapshot(self):
+        """Return a deep copy of the document."""
+        self.refresh()
+        with self.lock:
+            return copy.deepcopy(self.banks)
+
+    def _mark(self, path, op):
+        # Re-inserting moves the path to the end, so the latest change to it is written last
+        self._pending.pop(path, None)
+        self._pending[path] = op
+        touched = getattr(self._local, "touched", None)
+        if touched is not None:
+            touched.add(path)
+
+    def mark_bank_dirty(self, bank_id):
+        """Mark a bank's own fields (not its users) as changed."""
+        with self.lock:
+            bank = self.banks.get(bank_id)
+            if bank is None:
+                return
+            for key in bank:
+                if key != "users":
+                    self._mark((bank_id, key), "set")
+
+    def mark_bank_created(self, bank_id):
+        """Mark a whole bank, including its users, as changed."""
+        with self.lock:
+            self._mark((bank_id,), "set")
+            self._index_bank(bank_id)
+
+    def mark_bank_deleted(self, bank_id):
+        with self.lock:
+            self._mark((bank_id,), "del")
+            self._unindex_bank(bank_id)
+
+    def mark_user_dirty(self, bank_id, user_id):
+        with self.lock:
+            self._mark((bank_id, "users", str(user_id)), "set")
+            self._accounts[str(user_id)] = bank_id
+            self._bank_accounts.setdefault(bank_id, set()).add(str(user_id))
+
+    def mark_user_deleted(self, bank_id, user_id):
+        with self.lock:
+            self._mark((bank_id, "users", str(user_id)), "del")
+            if self._accounts.get(str(user_id)) == bank_id:
+                del self._accounts[str(user_id)]
+            self._bank_accounts.get(bank_id, set()).discard(str(user_id))
+
+    def _rebuild_index(self):
+        with self.lock:
+            self._accounts = {}
+            self._bank_accounts = {}
+            for bank_id in self.banks:
+                self._index_bank(bank_id)
+
+    def _index_bank(self, bank_id):
+        self._unindex_bank(bank_id)
+        account_ids = set(self.banks.get(bank_id, {}).get("users", {}))
+        self._bank_accounts[bank_id] = account_ids
+        for account_id in account_ids:
+            self._accounts[account_id] = bank_id
+
+    def _unindex_bank(self, bank_id):
+        for account_id in self._bank_accounts.pop(bank_id, ()):
+            if self._accounts.get(account_id) == bank_id:
+                del self._accounts[account_id]
+
+    def find_account(self, account_id):
+        """Return (bank_id, account) for ``account_id``, or (None, None)."""
+        key = str(account_id)
+        with self.lock:
+            bank_id = self._accounts.get(key)
+            if bank_id is None:
+                return None, None
+            # Resolve through the live document so replaced dicts are never returned
+            account = self.banks.get(bank_id, {}).get("users", {}).get(key)
+            if account is None:
+                del self._accounts[key]
+                return None, None
+            return bank_id, account
+
+    def iter_accounts(self):
+        """Yield (bank_id, account) for every account."""
+        with self.lock:
+            for bank_id, bank in self.banks.items():
+                for account in bank.get("users", {}).values():
+                    yield bank_id, account
+
+    def _value_at(self, path):
+        return self._value_in(self.banks, path)
+
+    @staticmethod
+    def _value_in(document, path):
+        node = document
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return None, False
+            node = node[key]
+        return node, True
+
+    @contextlib.contextmanager
+    def locked(self, *account_ids, encoder=None, durable=True):
+        """Hold ``account_ids`` and the cross-process file lock around a change.
+
+        The data is refreshed on entry and the marked changes are flushed
+        before the file lock is released, so other processes see them on
+        their next refresh. With ``durable`` the caller then waits for the
+        fsync, outside the locks. If the block raises, the accounts it held
+        and the paths it marked are restored from disk and nothing is
+        flushed.
+        """
+        with self.account_locks.hold(*account_ids), self.store.file_lock:
+            self.refresh()
+            outer = getattr(self._local, "touched", None)
+            touched = self._local.touched = set()
+            try:
+                yield self
+            except BaseException:
+                self._rollback(touched, account_ids)
+                raise
+            finally:
+                self._local.touched = outer
+                if outer is not None:
+                    outer.update(touched)
+            seq = self.flush(encoder=encoder, durable=False)
+        if durable:
+            self.store.sync(seq)
+
+    def _rollback(self, touched, account_ids):
+        """Drop the pending marks of a failed change and reload what it may have changed in place."""
+        with self.lock:
+            paths = set(touched)
+            for account_id in account_ids:
+                bank_id = self._accounts.get(str(account_id))
+                if bank_id is not None:
+                    paths.add((bank_id, "users", str(account_id)))
+            if not paths:
+                return
+            for path in paths:
+                self._pending.pop(path, None)
+            stored = self.store.read_disk()
+            for path in paths:
+                value, found = self._value_in(stored, path)
+                *parents, last = path
+                node, _ = self._value_in(self.banks, parents)
+                if not isinstance(node, dict):
+                    continue
+                if found:
+                    node[last] = value
+                else:
+                    node.pop(last, None)
+            self._rebuild_index()
+        logging.warning(f"Rolled back {len(paths)} unflushed changes to {self.filename}")
+
+    def flush(self, encoder=None, durable=True):
+        """Append the pending changes to the log and return the log sequence number."""
+        with self.lock:
+            records = []
+            for path, op in self._pending.items():
+                if op == "del":
+                    records.append({"op": "del", "path": list(path)})
+                    continue
+                value, found = self._value_at(path)
+                if found:
+                    records.append({"op": "set", "path": list(path), "value": value})
+            self._pending.clear()
+            seq = self.store.write(records, encoder=encoder, durable=False, apply=False)
+        if durable:
+            self.store.sync(seq)
+        return seq
+
+    def save(self, data, encoder=None, durable=True):
+        """Replace the document with ``data``, writing only what differs.
+
+        The changes are worked out per bank field and per user against this
+        process's view, then applied on top of a refresh under the file
+        lock, so entities another process wrote in the meantime are kept
+        instead of being overwritten with the caller's stale copies.
+        """
+        with self.store.file_lock:
+            with self.lock:
+                changes = self._changes(data)
+            with self.locked(encoder=encoder, durable=False), self.lock:
+                for path, op in changes:
+                    self._apply_change(data, path, op)
+        if durable:
+            self.store.sync()
+
+    def _changes(self, data):
+        """``(path, op)`` for every bank, bank field and user where ``data`` differs from the live document."""
+        changes = [((bank_id,), "del") for bank_id in self.banks.keys() - data.keys()]
+        for bank_id, bank in data.items():
+            old = self.banks.get(bank_id)
+            if old == bank:
+                continue
+            if not isinstance(old, dict) or not isinstance(bank, dict):
+                changes.append(((bank_id,), "set"))
+                continue
+            changes.extend(((bank_id, key), "del") for key in old.keys() - bank.keys())
+            for key, value in bank.items():
+                old_value = old.get(key)
+                if key == "users" and isinstance(value, dict) and isinstance(old_value, dict):
+                    changes.extend(((bank_id, key, user_id), "del") for user_id in old_value.keys() - value.keys())
+                    changes.extend(((bank_id, key, user_id), "set") for user_id, user in value.items()
+                                   if old_value.get(user_id) != user)
+                elif key not in old or old_value != value:
+                    changes.append(((bank_id, key), "set"))
+        return changes
+
+    def _apply_change(self, data, path, op):
+        """Apply one change from ``_changes`` to the refreshed document; hold ``lock``."""
+        bank_id = path[0]
+        if op == "del":
+            if len(path) == 1:
+                if self.banks.pop(bank_id, None) is not None:
+                    self.mark_bank_deleted(bank_id)
+                return
+            node, found = self._value_in(self.banks, path[:-1])
+            if found and isinstance(node, dict) and node.pop(path[-1], None) is not None:
+                if len(path) == 3:
+                    self.mark_user_deleted(bank_id, path[-1])
+                else:
+                    self._mark(path, "del")
+            return
+        # Copy so the caller's dicts do not become the live ones
+        if len(path) == 1 or not isinstance(self.banks.get(bank_id), dict):
+            # The bank is new, or another process deleted it: write the caller's whole bank
+            self.banks[bank_id] = copy.deepcopy(data[bank_id])
+            self.mark_bank_created(bank_id)
+            return
+        value, _ = self._value_in(data, path)
+        if len(path) == 3:
+            self.banks[bank_id].setdefault(path[1], {})[path[2]] = copy.deepcopy(value)
+            self.mark_user_dirty(bank_id, path[2])
+        else:
+            self.banks[bank_id][path[1]] = copy.deepcopy(value)
+            if path[1] == "users":
+                self.mark_bank_created(bank_id)
+            else:
+                self._mark(path, "set")
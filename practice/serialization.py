@@ -0,0 +1,329 @@
+import json
+import os
+import struct
+import tempfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Codec:
+    """Turns the bank document into bytes and back.
+
+    ``encoder`` is the json.JSONEncoder subclass the callers already pass to
+    ``save()``; every codec uses its ``default`` for values it can't encode.
+    """
+
+    name = None
+
+    def dumps(self, data, encoder=None):
+        raise NotImplementedError
+
+    def loads(self, raw):
+        raise NotImplementedError
+
+    @staticmethod
+    def _default(encoder):
+        return encoder().default if encoder is not None else None
+
+
+class PrettyJsonCodec(Codec):
+    """The original format: stdlib JSON with ``indent=4``."""
+
+    name = "json-pretty"
+
+    def dumps(self, data, encoder=None):
+        return json.dumps(data, cls=encoder, indent=4).encode('utf-8')
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+
+class CompactJsonCodec(Codec):
+    """JSON without whitespace, through orjson when it is installed."""
+
+    name = "json"
+
+    def dumps(self, data, encoder=None):
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, default=self._default(encoder), option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # e.g. ints beyond 64 bits, which the stdlib encoder handles
+                pass
+        return json.dumps(data, cls=encoder, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, raw):
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack; needs the msgpack package."""
+
+    name = "msgpack"
+
+    def dumps(self, data, encoder=None):
+        if msgpack is None:
+            raise RuntimeError("The msgpack codec needs the msgpack package")
+        return msgpack.packb(data, default=self._default(encoder), use_bin_type=True)
+
+    def loads(self, raw):
+        if msgpack is None:
+            raise RuntimeError("The msgpack codec needs the msgpack package")
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+class RecordCodec(Codec):
+    """Dependency-free tagged binary format built on ``struct``.
+
+    After the ``MAGIC`` header every value is a one-byte tag followed by its
+    payload: ``q`` int64, ``d`` float64, ``s`` length-prefixed UTF-8 (also
+    used for ints that don't fit 64 bits, tagged ``I``), ``l``/``m`` a count
+    followed by the items or key/value pairs, and ``N``/``T``/``F`` with no
+    payload. Strings up to ``SHARED_MAX`` bytes are numbered in order of
+    first use and repeats are written as ``r`` plus that number, so the
+    field names and dates repeated in every account are stored once.
+    """
+
+    name = "record"
+    MAGIC = b"BNKR\x01"
+    SHARED_MAX = 64
+
+    _INT = struct.Struct('<cq')
+    _FLOAT = struct.Struct('<cd')
+    _SIZED = struct.Struct('<cI')
+    _INT_MIN, _INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+    def dumps(self, data, encoder=None):
+        out = [self.MAGIC]
+        default = self._default(encoder)
+        write = out.append
+        pack_int, pack_float, pack_sized = self._INT.pack, self._FLOAT.pack, self._SIZED.pack
+        shared = {}
+        int_min, int_max, shared_max = self._INT_MIN, self._INT_MAX, self.SHARED_MAX
+
+        def string(value):
+            index = shared.get(value)
+            if index is not None:
+                write(pack_sized(b'r', index))
+                return
+            text = value.encode('utf-8')
+            if len(text) <= shared_max:
+                shared[value] = len(shared)
+            write(pack_sized(b's', len(text)))
+            write(text)
+
+        def encode(value):
+            kind = type(value)
+            if kind is str:
+                string(value)
+            elif kind is int:
+                if int_min <= value <= int_max:
+                    write(pack_int(b'q', value))
+                else:
+                    text = str(value).encode('ascii')
+                    write(pack_sized(b'I', len(text)))
+                    write(text)
+            elif kind is dict:
+                write(pack_sized(b'm', len(value)))
+                for key, item in value.items():
+                    # JSON semantics: keys are strings
+                    string(key if type(key) is str else json.dumps(key))
+                    encode(item)
+            elif kind is float:
+                write(pack_float(b'd', value))
+            elif value is None:
+                write(b'N')
+            elif value is True:
+                write(b'T')
+            elif value is False:
+                write(b'F')
+            elif kind is list or kind is tuple:
+                write(pack_sized(b'l', len(value)))
+                for item in value:
+                    encode(item)
+            elif isinstance(value, (str, int, float, dict, list, tuple)):
+                # Subclasses (e.g. IntEnum) are written as their base type
+                for base in (str, int, float, dict, list):
+                    if isinstance(value, base):
+                        return encode(base(value))
+            elif default is not None:
+                encode(default(value))
+            else:
+                raise TypeError(f"Object of type {kind.__name__} is not serializable")
+
+        encode(data)
+        return b''.join(out)
+
+    def loads(self, raw):
+        raw = memoryview(raw)
+        if bytes(raw[:len(self.MAGIC)]) != self.MAGIC:
+            raise ValueError("Not a record-format file")
+        unpack_int, unpack_float, unpack_sized = self._INT.unpack_from, self._FLOAT.unpack_from, self._SIZED.unpack_from
+        int_size, float_size, sized_size = self._INT.size, self._FLOAT.size, self._SIZED.size
+        shared = []
+        shared_max = self.SHARED_MAX
+
+        def decode(offset):
+            tag = raw[offset]
+            if tag == 0x72:  # r
+                return shared[unpack_sized(raw, offset)[1]], offset + sized_size
+            if tag == 0x73:  # s
+                size = unpack_sized(raw, offset)[1]
+                offset += sized_size
+                value = str(raw[offset:offset + size], 'utf-8')
+                if size <= shared_max:
+                    shared.append(value)
+                return value, offset + size
+            if tag == 0x71:  # q
+                return unpack_int(raw, offset)[1], offset + int_size
+            if tag == 0x6d:  # m
+                obj = {}
+                offset += sized_size
+                for _ in range(unpack_sized(raw, offset - sized_size)[1]):
+                    key, offset = decode(offset)
+                    obj[key], offset = decode(offset)
+                return obj, offset
+            if tag == 0x64:  # d
+                return unpack_float(raw, offset)[1], offset + float_size
+            if tag == 0x4e:  # N
+                return None, offset + 1
+            if tag == 0x54:  # T
+                return True, offset + 1
+            if tag == 0x46:  # F
+                return False, offset + 1
+            if tag == 0x6c:  # l
+                items = []
+                offset += sized_size
+                for _ in range(unpack_sized(raw, offset - sized_size)[1]):
+                    item, offset = decode(offset)
+                    items.append(item)
+                return items, offset
+            if tag == 0x49:  # I
+                size = unpack_sized(raw, offset)[1]
+                offset += sized_size
+                return int(str(raw[offset:offset + size], 'ascii')), offset + size
+            raise ValueError(f"Unknown record tag {chr(tag)!r} at offset {offset}")
+
+        value, _ = decode(len(self.MAGIC))
+        return value
+
+
+CODECS = {codec.name: codec for codec in (PrettyJsonCodec(), CompactJsonCodec(), MsgpackCodec(), RecordCodec())}
+
+# Codec used when none is configured; BANK_CODEC overrides it
+DEFAULT_CODEC = os.environ.get("BANK_CODEC", CompactJsonCodec.name)
+
+
+def get_codec(codec=None):
+    """Return the codec registered as ``codec`` (a name or a Codec), or the default one."""
+    if isinstance(codec, Codec):
+        return codec
+    name = codec or DEFAULT_CODEC
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec {name!r}; choose from {', '.join(CODECS)}") from None
+
+
+def detect_codec(raw):
+    """Guess the codec that produced ``raw`` from its first bytes."""
+    if raw.startswith(RecordCodec.MAGIC):
+        return CODECS[RecordCodec.name]
+    head = raw.lstrip()[:1]
+    if head in (b'{', b'[', b'') or head.isalnum() or head == b'"':
+        return CODECS[CompactJsonCodec.name]
+    return CODECS[MsgpackCodec.name]
+
+
+# How hard a save tries to survive a crash:
+#   "none"  - write a temp file and rename it over the target (readers never see a
+#             partial file, but a power loss may lose the save)
+#   "fsync" - also fsync the temp file before the rename
+#   "full"  - also fsync the directory, so the rename itself is on disk
+DURABILITY_LEVELS = ("none", "fsync", "full")
+DEFAULT_DURABILITY = os.environ.get("BANK_DURABILITY", "full")
+
+
+def resolve_durability(durability):
+    """Return ``durability``, or the default level, after checking it."""
+    durability = durability or DEFAULT_DURABILITY
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability {durability!r}; choose from {', '.join(DURABILITY_LEVELS)}")
+    return durability
+
+
+def fsync_directory(path):
+    """fsync the directory containing ``path`` so renames in it are durable."""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Not supported on this platform (e.g. Windows)
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_temp(path, raw, durability=None):
+    """Write ``raw`` to a new temp file beside ``path`` and return its name."""
+    durability = resolve_durability(durability)
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; keep the permissions the target had
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+            if durability != "none":
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def commit_temp(tmp_path, path, durability=None):
+    """Rename ``tmp_path`` over ``path``; readers see the old or the new file, never a mix."""
+    durability = resolve_durability(durability)
+    os.replace(tmp_path, path)
+    if durability == "full":
+        fsync_directory(path)
+
+
+def atomic_write(path, raw, durability=None):
+    """Replace ``path`` with ``raw`` via temp file + fsync + rename (+ directory fsync)."""
+    commit_temp(write_temp(path, raw, durability), path, durability)
+
+
+def load_file(path):
+    """Read and decode ``path`` in whichever format it was written."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return detect_codec(raw).loads(raw)
+
+
+def dump_file(path, data, codec=None, encoder=None, durability=None):
+    """Encode ``data`` with ``codec`` and atomically replace ``path`` with it.
+
+    Returns the bytes written.
+    """
+    raw = get_codec(codec).dumps(data, encoder=encoder)
+    atomic_write(path, raw, durability)
+    return raw
@@ -0,0 +1,390 @@
+import json
+import os
+from pathlib import Path
+
+from practice.logStorage import LogStore
+from practice.serialization import CompactJsonCodec, detect_codec, load_file
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+_MISSING = object()
+_STARTS = ('start_map', 'start_array')
+_ENDS = ('end_map', 'end_array')
+
+
+class _Tokenizer:
+    """Incremental JSON tokenizer yielding ijson-style ``(event, value)`` pairs.
+
+    Used when ijson is not installed. Only the current chunk and the token
+    being read are held in memory.
+    """
+
+    _WHITESPACE = ' \t\n\r'
+    _DELIMITERS = ',]} \t\n\r'
+    _LITERALS = {'true': ('boolean', True), 'false': ('boolean', False), 'null': ('null', None)}
+
+    def __init__(self, f, chunk_size=64 * 1024):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+
+    def _more(self):
+        """Drop consumed text and read the next chunk; return False at end of file."""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self._WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def _string(self):
+        i = self.pos + 1
+        while True:
+            j = self.buf.find('"', i)
+            if j == -1:
+                offset = len(self.buf) - self.pos
+                if not self._more():
+                    raise ValueError("Unterminated string")
+                i = offset
+                continue
+            k = j - 1
+            while self.buf[k] == '\\':
+                k -= 1
+            if (j - 1 - k) % 2:
+                # The quote is escaped
+                i = j + 1
+                continue
+            raw = self.buf[self.pos:j + 1]
+            self.pos = j + 1
+            return json.loads(raw) if '\\' in raw else raw[1:-1]
+
+    def _scalar(self):
+        i = self.pos
+        while True:
+            while i < len(self.buf) and self.buf[i] not in self._DELIMITERS:
+                i += 1
+            if i < len(self.buf):
+                break
+            offset = i - self.pos
+            if not self._more():
+                break
+            i = offset
+        token = self.buf[self.pos:i]
+        self.pos = i
+        if token in self._LITERALS:
+            return self._LITERALS[token]
+        return 'number', json.loads(token)
+
+    def __iter__(self):
+        stack = []
+        key_next = False
+        while True:
+            c = self._peek()
+            if not c:
+                if stack:
+                    raise ValueError("Unexpected end of JSON document")
+                return
+            if c == ',':
+                self.pos += 1
+                key_next = stack[-1] == 'map'
+            elif c == ':':
+                self.pos += 1
+            elif c == '{':
+                self.pos += 1
+                stack.append('map')
+                key_next = True
+                yield 'start_map', None
+            elif c == '[':
+                self.pos += 1
+                stack.append('array')
+                yield 'start_array', None
+            elif c == '}':
+                self.pos += 1
+                stack.pop()
+                key_next = False
+                yield 'end_map', None
+            elif c == ']':
+                self.pos += 1
+                stack.pop()
+                yield 'end_array', None
+            elif c == '"':
+                value = self._string()
+                if key_next:
+                    key_next = False
+                    yield 'map_key', value
+                else:
+                    yield 'string', value
+            else:
+                yield self._scalar()
+
+
+def _object_events(value):
+    """Yield the events ``value`` would produce if it were parsed."""
+    if isinstance(value, dict):
+        yield 'start_map', None
+        for key, item in value.items():
+            yield 'map_key', key
+            yield from _object_events(item)
+        yield 'end_map', None
+    elif isinstance(value, list):
+        yield 'start_array', None
+        for item in value:
+            yield from _object_events(item)
+        yield 'end_array', None
+    else:
+        yield 'value', value
+
+
+def _events(path):
+    """Yield ``(event, value)`` pairs for the JSON file at ``path``."""
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    if detect_codec(head).name != CompactJsonCodec.name:
+        # Binary snapshots can't be parsed incrementally; decode and walk them
+        yield from _object_events(load_file(path))
+        return
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            for _, event, value in ijson.parse(f, use_float=True):
+                yield event, value
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _Tokenizer(f)
+
+
+def _skip(events, event):
+    """Consume the rest of a value whose first event was ``event``."""
+    if event not in _STARTS:
+        return
+    depth = 1
+    for event, _ in events:
+        if event in _STARTS:
+            depth += 1
+        elif event in _ENDS:
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _build(events, event, value, skip=()):
+    """Build the value whose first event was ``event``, leaving out keys in ``skip``."""
+    if event == 'start_map':
+        obj = {}
+        for event, key in events:
+            if event == 'end_map':
+                return obj
+            event, value = next(events)
+            if key in skip:
+                _skip(events, event)
+            else:
+                obj[key] = _build(events, event, value, skip)
+    if event == 'start_array':
+        items = []
+        for event, value in events:
+            if event == 'end_array':
+                return items
+            items.append(_build(events, event, value, skip))
+    return value
+
+
+def _entries(events):
+    """Yield ``(key, first_event, first_value)`` for each entry of the current map.
+
+    The caller must consume each value (``_build`` or ``_skip``) before
+    asking for the next entry.
+    """
+    for event, key in events:
+        if event == 'end_map':
+            return
+        event, value = next(events)
+        yield key, event, value
+
+
+def _overlay(value, key, records, depth):
+    """Apply log ``records`` (paths relative from ``depth``) to ``value`` stored at ``key``.
+
+    Returns ``(found, value)``; ``found`` is False when the records delete it.
+    """
+    holder = {} if value is _MISSING else {key: value}
+    for record in records:
+        LogStore._apply(holder, dict(record, path=record["path"][depth:]))
+    return key in holder, holder.get(key, None)
+
+
+class StreamReader:
+    """Read a LogStore-backed bank file without loading it whole.
+
+    The snapshot is parsed incrementally (with ijson when installed) and the
+    log, which compaction keeps small, is overlaid on the entries as they go
+    by. Transaction histories are skipped unless asked for, so peak memory
+    depends on the largest entry rather than on the file size.
+
+    Reads take no lock: they see the data as of the moment the files are
+    opened, like any other reader of the snapshot.
+    """
+
+    def __init__(self, filename):
+        self.snapshot_file = Path(filename)
+        self.log_files = (Path(f"{filename}.log.old"), Path(f"{filename}.log"))
+
+    def _log_records(self):
+        records = []
+        for log_file in self.log_files:
+            try:
+                with log_file.open('rb') as f:
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break
+                        try:
+                            records.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            break
+            except FileNotFoundError:
+                continue
+        return records
+
+    def _open(self):
+        """Return the log records and an event stream over the matching snapshot."""
+        while True:
+            try:
+                snapshot_stat = os.stat(self.snapshot_file)
+            except FileNotFoundError:
+                snapshot_stat = None
+            records = self._log_records()
+            try:
+                current = os.stat(self.snapshot_file)
+            except FileNotFoundError:
+                current = None
+            # A compaction replaced the snapshot while the log was read; start over
+            if (snapshot_stat and snapshot_stat.st_ino) == (current and current.st_ino):
+                break
+        events = _events(self.snapshot_file) if snapshot_stat else iter(())
+        return records, events
+
+    @staticmethod
+    def _by_bank(records):
+        by_bank = {}
+        for record in records:
+            by_bank.setdefault(record["path"][0], []).append(record)
+        return by_bank
+
+    def _banks(self, users, history, bank_id=None):
+        records, events = self._open()
+        by_bank = self._by_bank(records)
+        skip = set() if users else {"users"}
+        if users and not history:
+            skip.add("transaction_history")
+        seen = set()
+        if next(events, (None, None))[0] == 'start_map':
+            for key, event, value in _entries(events):
+                seen.add(key)
+                if bank_id is not None and key != bank_id:
+                    _skip(events, event)
+                    continue
+                bank = _build(events, event, value, skip)
+                yield from self._overlaid_bank(key, bank, by_bank, skip)
+                if bank_id is not None:
+                    return
+        for key in by_bank.keys() - seen:
+            if bank_id is None or key == bank_id:
+                yield from self._overlaid_bank(key, _MISSING, by_bank, skip)
+
+    @staticmethod
+    def _overlaid_bank(bank_id, bank, by_bank, skip):
+        found, bank = _overlay(bank, bank_id, by_bank.get(bank_id, ()), 0)
+        if not found:
+            return
+        if "users" in skip:
+            bank.pop("users", None)
+        elif "transaction_history" in skip:
+            for account in bank.get("users", {}).values():
+                account.pop("transaction_history", None)
+        yield bank_id, bank
+
+    def _accounts(self, history, account_id=None):
+        records, events = self._open()
+        by_bank = self._by_bank(records)
+        skip = () if history else ("transaction_history",)
+        seen_banks = set()
+
+        def from_log(bank_id):
+            """Accounts of a bank whose users the log replaced wholesale."""
+            for _, bank in self._overlaid_bank(bank_id, _MISSING, by_bank, set(skip)):
+                for key, account in bank.get("users", {}).items():
+                    if account_id is None or key == account_id:
+                        yield bank_id, account
+
+        if next(events, (None, None))[0] == 'start_map':
+            for bank_id, event, value in _entries(events):
+                seen_banks.add(bank_id)
+                bank_records = by_bank.get(bank_id, ())
+                if event != 'start_map' or any(
+                    len(r["path"]) == 1 or (len(r["path"]) == 2 and r["path"][1] == "users")
+                    for r in bank_records
+                ):
+                    _skip(events, event)
+                    yield from from_log(bank_id)
+                    continue
+                by_account = {}
+                for record in bank_records:
+                    if len(record["path"]) > 2 and record["path"][1] == "users":
+                        by_account.setdefault(record["path"][2], []).append(record)
+                seen_accounts = set()
+                for field, event, value in _entries(events):
+                    if field != "users" or event != 'start_map':
+                        _skip(events, event)
+                        continue
+                    for key, event, value in _entries(events):
+                        seen_accounts.add(key)
+                        if account_id is not None and key != account_id:
+                            _skip(events, event)
+                            continue
+                        account = _build(events, event, value, skip)
+                        found, account = _overlay(account, key, by_account.get(key, ()), 2)
+                        if found:
+                            if not history:
+                                account.pop("transaction_history", None)
+                            yield bank_id, account
+                for key in by_account.keys() - seen_accounts:
+                    if account_id is None or key == account_id:
+                        found, account = _overlay(_MISSING, key, by_account[key], 2)
+                        if found:
+                            if not history:
+                                account.pop("transaction_history", None)
+                            yield bank_id, account
+        for bank_id in by_bank.keys() - seen_banks:
+            yield from from_log(bank_id)
+
+    def iter_banks(self, users=False, history=False):
+        """Yield ``(bank_id, bank)``; users and their histories only when asked for."""
+        return self._banks(users, history)
+
+    def iter_accounts(self, history=False):
+        """Yield ``(bank_id, account)`` for every account, without histories by default."""
+        return self._accounts(history)
+
+    def get_bank(self, bank_id, users=False, history=False):
+        """Return one bank, or None; the rest of the file is skipped, not built."""
+        for _, bank in self._banks(users, history, bank_id=bank_id):
+            return bank
+        return None
+
+    def get_account(self, account_id, history=True):
+        """Return ``(bank_id, account)`` for one account, or ``(None, None)``."""
+        for bank_id, account in self._accounts(history, account_id=str(account_id)):
+            return bank_id, account
+        return None, None
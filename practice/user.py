@@ -1,4 +1,5 @@
 import datetime
+from decimal import Decimal, InvalidOperation
 from enum import Enum
 import json
 import secrets
@@ -13,118 +14,161 @@ class AccountState(Enum):
     ARCHIVED = 4
 
 
+def to_money(value):
+    """Return ``value`` as a Decimal, or None if it is not a number.
+
+    Balances and amounts are stored as Decimal strings; ints and floats
+    written by older versions are read through their shortest repr, so
+    ``0.1`` becomes ``Decimal("0.1")`` rather than its binary expansion.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        money = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return money if money.is_finite() else None
+
+
+def format_money(money):
+    """Return the canonical string stored for a Decimal amount, without an exponent."""
+    return format(money, "f")
+
+
 class AccountStateEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, AccountState):
             return o.value
+        if isinstance(o, Decimal):
+            # A string, so amounts survive the round trip exactly
+            return format_money(o)
         return super().default(o)
 
 # inherit bank operation
 class UserOperation(BankOperation):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, filename='banks.json', backend=None, stream=False):
+        super().__init__(filename, backend, stream)
 
     def create_user(self, bank_id, account_type, name, email, password, pin):
-        # Read the current state of all banks
-        banks = self.read()
-        # Check if the bank with the given bank_id exists
-        bank = banks.get(bank_id)
-        if not bank:
-            return "Bank ID not found."
-        
-        # Generate a new user ID
-        user_id = int(secrets.token_hex(5)[:8], 16)
-        
-        # Create the user dictionary
-        new_user = {
-            "id": user_id,
-            "name": name,
-            "email": email,
-            "password": password,
-            "balance": 0,
-            "transaction_history": [],
-            "transaction_pin": pin,
-            "state": AccountState.ACTIVE.value,
-            "state_change_date": str(datetime.date.today()),
-            "state_change_time": str(datetime.datetime.now().time())
-        }
-        
-        # Add the new user to the bank's "users" list
-        bank["users"].update({user_id: new_user})
-        # Save the updated state of banks
-        self.save(banks)
-        
+        repository = self.repository
+        with repository.locked(encoder=AccountStateEncoder), repository.lock:
+            # Check if the bank with the given bank_id exists
+            bank = repository.banks.get(bank_id)
+            if not bank:
+                return "Bank ID not found."
+
+            # Generate a new user ID
+            user_id = int(secrets.token_hex(5)[:8], 16)
+
+            # Create the user dictionary
+            new_user = {
+                "id": user_id,
+                "name": name,
+                "email": email,
+                "password": password,
+                # Balances are kept as strings so the live state stays JSON-serializable
+                "balance": format_money(Decimal(0)),
+                "transaction_pin": pin,
+                "state": AccountState.ACTIVE.value,
+                "state_change_date": str(datetime.date.today()),
+                "state_change_time": str(datetime.datetime.now().time())
+            }
+
+            # Keys are strings so the live data matches what JSON loads back
+            bank["users"][str(user_id)] = new_user
+            repository.mark_user_dirty(bank_id, user_id)
+
         # Return the new user
         return new_user
 
     def update_user(self, user_id, **kwargs):
-        users = self.read()
-        for user in users:
-            if user["id"] == user_id:
-                for key, value in kwargs.items():
-                    if key == "name" and not isinstance(value, str):
-                        return "Invalid name, must be a string"
-                    elif key == "email" and not isinstance(value, str):
-                        return "Invalid email, must be a string"
-                    elif key == "password" and not isinstance(value, str):
-                        return "Invalid password, must be a string"
-                    elif key == "pin" and not isinstance(value, int):
-                        return "Invalid pin, must be an integer"
-                    else:
-                        user[key] = value
-                user["last_modified"] = str(datetime.date.today())
-                self.save(users, encoder=AccountStateEncoder)
-                return json.dumps(user, cls=AccountStateEncoder)
-        return None
+        for key, value in kwargs.items():
+            if key == "name" and not isinstance(value, str):
+                return "Invalid name, must be a string"
+            elif key == "email" and not isinstance(value, str):
+                return "Invalid email, must be a string"
+            elif key == "password" and not isinstance(value, str):
+                return "Invalid password, must be a string"
+            elif key == "pin" and not isinstance(value, int):
+                return "Invalid pin, must be an integer"
+            elif key == "balance" and to_money(value) is None:
+                return "Invalid balance, must be a number"
+        if "balance" in kwargs:
+            kwargs["balance"] = format_money(to_money(kwargs["balance"]))
+
+        repository = self.repository
+        with repository.locked(user_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(user_id)
+            if user is None:
+                return None
+            user.update(kwargs)
+            user["last_modified"] = str(datetime.date.today())
+            repository.mark_user_dirty(bank_id, user_id)
+            result = json.dumps(user, cls=AccountStateEncoder)
+        return result
 
     def delete_user(self, user_id):
         """Delete a user by id"""
         if not isinstance(user_id, int):
             return "Invalid user_id, must be an integer"
-        users = self.read()
-        for i, user in enumerate(users):
-            if user["id"] == user_id:
-                del users[i]
-                self.save(users, encoder=AccountStateEncoder)
-                return True
-        return False
+        repository = self.repository
+        with repository.locked(user_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(user_id)
+            if user is None:
+                return False
+            del repository.banks[bank_id]["users"][str(user_id)]
+            repository.mark_user_deleted(bank_id, user_id)
+        return True
 
     def list_users(self):
         """List all users"""
-        users = self.read()
+        if self.stream:
+            users = self.reader.iter_accounts()
+        else:
+            self.repository.refresh()
+            users = self.repository.iter_accounts()
         return "\n".join(
             f"{user['id']:<10} {user['name']} {user['state']}"
-            for user in users
+            for _, user in users
         )
 
     def read_user(self, user_id):
-            """Read a user by id"""
-            if not isinstance(user_id, int):
-                return "Invalid user_id, must be an integer"
-            users = self.read()
-            for user in users:
-                if user["id"] == user_id:
-                    return json.dumps(user, cls=AccountStateEncoder)
-            return None
+        """Read a user by id"""
+        if not isinstance(user_id, int):
+            return "Invalid user_id, must be an integer"
+        if self.stream:
+            _, user = self.reader.get_account(user_id)
+            return None if user is None else json.dumps(user, cls=AccountStateEncoder)
+        self.repository.refresh()
+        with self.repository.lock:
+            _, user = self.repository.find_account(user_id)
+            if user is None:
+                return None
+            return json.dumps(user, cls=AccountStateEncoder)
+
+    def _set_state(self, bank_id, user, state):
+        """Move ``user`` to ``state`` and mark it for the next flush; hold the repository lock."""
+        user["state"] = state.value
+        user["state_change_date"] = str(datetime.date.today())
+        user["state_change_time"] = str(datetime.datetime.now().time())
+        self.repository.mark_user_dirty(bank_id, user["id"])
 
     def freeze(self, account_id):
         """Freeze an account"""
         if not isinstance(account_id, int):
             return "Invalid account_id, must be an integer"
 
-        users = self.read()
-        for user in users:
-            if user["id"] == account_id:
-                if user["state"] != AccountState.ACTIVE.value:
-                    return "Account is not active."
-
-                user["state"] = AccountState.FROZEN.value
-                user["state_change_date"] = str(datetime.date.today())
-                user["state_change_time"] = str(
-                    datetime.datetime.now().time())
-                self.save(users, encoder=AccountStateEncoder)
-                return f"Account {account_id} has been frozen."
-        return "Account not found."
+        repository = self.repository
+        with repository.locked(account_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(account_id)
+            if user is None:
+                return "Account not found."
+            if user["state"] != AccountState.ACTIVE.value:
+                return "Account is not active."
+            self._set_state(bank_id, user, AccountState.FROZEN)
+        return f"Account {account_id} has been frozen."
 
     def unfreeze(self, account_id, pin):
         """Unfreeze an account"""
@@ -133,20 +177,17 @@ class UserOperation(BankOperation):
         if not isinstance(pin, int):
             return "Invalid pin, must be an integer"
 
-        users = self.read()
-        for user in users:
-            if user["id"] == account_id:
-                if user["transaction_pin"] != pin:
-                    return "Invalid pin."
-                if user["state"] != AccountState.FROZEN:
-                    return "Account is not frozen."
-
-                user["state"] = AccountState.ACTIVE.value
-                user["state_change_date"] = str(datetime.date.today())
-                user["state_change_time"] = str(datetime.datetime.now().time())
-                self.save(users, encoder=AccountStateEncoder)
-                return f"Account {account_id} has been unfrozen."
-        return "Account not found."
+        repository = self.repository
+        with repository.locked(account_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(account_id)
+            if user is None:
+                return "Account not found."
+            if user["transaction_pin"] != pin:
+                return "Invalid pin."
+            if user["state"] != AccountState.FROZEN.value:
+                return "Account is not frozen."
+            self._set_state(bank_id, user, AccountState.ACTIVE)
+        return f"Account {account_id} has been unfrozen."
 
     def close(self, account_id, pin):
         """Close an account"""
@@ -155,20 +196,17 @@ class UserOperation(BankOperation):
         if not isinstance(pin, int):
             return "Invalid pin, must be an integer"
 
-        users = self.read()
-        for user in users:
-            if user["id"] == account_id:
-                if user["transaction_pin"] != pin:
-                    return "Invalid pin."
-                if user["state"] == AccountState.CLOSED.value:
-                    return "Account is already closed."
-
-                user["state"] = AccountState.CLOSED
-                user["state_change_date"] = str(datetime.date.today())
-                user["state_change_time"] = str(datetime.datetime.now().time())
-                self.save(users, encoder=AccountStateEncoder)
-                return f"Account {account_id} has been closed."
-        return "Account not found."
+        repository = self.repository
+        with repository.locked(account_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(account_id)
+            if user is None:
+                return "Account not found."
+            if user["transaction_pin"] != pin:
+                return "Invalid pin."
+            if user["state"] == AccountState.CLOSED.value:
+                return "Account is already closed."
+            self._set_state(bank_id, user, AccountState.CLOSED)
+        return f"Account {account_id} has been closed."
 
     def archive(self, account_id, pin):
         """Archive an account"""
@@ -177,21 +215,18 @@ class UserOperation(BankOperation):
         if not isinstance(pin, int):
             return "Invalid pin, must be an integer"
 
-        users = self.read()
-        for user in users:
-            if user["id"] == account_id:
-                if user["transaction_pin"] != pin:
-                    return "Invalid pin."
-                if user["state"] == AccountState.ARCHIVED.value:
-                    return "Account is already archived."
-
-                user["state"] = AccountState.ARCHIVED
-                user["state_change_date"] = str(datetime.date.today())
-                user["state_change_time"] = str(datetime.datetime.now().time())
-                self.save(users, encoder=AccountStateEncoder)
-                return f"Account {account_id} has been archived."
-        return "Account not found."
-    
+        repository = self.repository
+        with repository.locked(account_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(account_id)
+            if user is None:
+                return "Account not found."
+            if user["transaction_pin"] != pin:
+                return "Invalid pin."
+            if user["state"] == AccountState.ARCHIVED.value:
+                return "Account is already archived."
+            self._set_state(bank_id, user, AccountState.ARCHIVED)
+        return f"Account {account_id} has been archived."
+
     def unarchive(self, account_id, pin):
         """Unarchive an account"""
         if not isinstance(account_id, int):
@@ -199,19 +234,14 @@ class UserOperation(BankOperation):
         if not isinstance(pin, int):
             return "Invalid pin, must be an integer"
 
-        users = self.read()
-        for user in users:
-            if user["id"] == account_id:
-                if user["transaction_pin"] != pin:
-                    return "Invalid pin."
-                if user["state"] == AccountState.ACTIVE.value:
-                    return "Account is already active."
-
-                user["state"] = AccountState.ACTIVE
-                user["state_change_date"] = str(datetime.date.today())
-                user["state_change_time"] = str(datetime.datetime.now().time())
-                self.save(users, encoder=AccountStateEncoder)
-                return f"Account {account_id} has been unarchived."
-        return "Account not found."
-               
-
+        repository = self.repository
+        with repository.locked(account_id, encoder=AccountStateEncoder), repository.lock:
+            bank_id, user = repository.find_account(account_id)
+            if user is None:
+                return "Account not found."
+            if user["transaction_pin"] != pin:
+                return "Invalid pin."
+            if user["state"] == AccountState.ACTIVE.value:
+                return "Account is already active."
+            self._set_state(bank_id, user, AccountState.ACTIVE)
+        return f"Account {account_id} has been unarchived."
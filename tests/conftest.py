@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BankApp.fileStorage import DatabaseManager  # noqa: E402
+from BankApp.passwordHasher import PasswordHasher  # noqa: E402
+from BankApp.Transaction import TransactionOperations  # noqa: E402
+from helpers import BANK  # noqa: E402
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "bank.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def operations(db_manager):
+    # The cheapest bcrypt cost; these tests are about money, not hashing
+    hasher = PasswordHasher(rounds=4)
+    operations = TransactionOperations(db_manager, password_hasher=hasher)
+    operations.create_bank(BANK, "Street 1", "City", "Main", "IFSC0000001", "0000000000",
+                           "bank@example.com", "saving", None)
+    yield operations
+    hasher.close()
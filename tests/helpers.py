@@ -0,0 +1,47 @@
+"""Plain helpers shared by the test modules."""
+import itertools
+import threading
+
+BANK = "Test Bank"
+
+_usernames = (f"user{n}" for n in itertools.count(1))
+
+
+def open_account(operations, balance=0, bank=BANK):
+    """Register a user at ``bank``, deposit ``balance`` and return the account number."""
+    username = next(_usernames)
+    operations.register_user(username, "secret", "First", "Last", bank, f"{username}@example.com")
+    number = operations.get_user_by_username(username)["user_account_number"]
+    if balance:
+        operations.deposit_money(number, balance)
+    return number
+
+
+def balance(operations, account):
+    return operations.get_user_by_id(account)["balance_minor"]
+
+
+def statement_sum(db_manager, account):
+    """Sum of the account's journal lines, which must equal its stored balance."""
+    return db_manager._read_one(
+        "SELECT COALESCE(SUM(amount_minor), 0) FROM account_statement WHERE account = ?", (account,))[0]
+
+
+def run_with_timeout(func, timeout=5):
+    """Run ``func`` in a thread and return the exceptions it raised.
+
+    Fails instead of hanging the suite if ``func`` never returns.
+    """
+    errors = []
+
+    def target():
+        try:
+            func()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "call did not return"
+    return errors
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+from BankApp.AsyncOp import AsyncTransactionOperations
+from BankApp.asyncStorage import AsyncDatabaseManager
+from helpers import open_account
+
+
+def _thread_name():
+    return threading.current_thread().name
+
+
+def test_writes_share_one_thread_and_reads_use_the_pool(db_manager):
+    async def scenario():
+        async with AsyncDatabaseManager(db_manager) as manager:
+            writers = await asyncio.gather(*(manager.run_write(_thread_name) for _ in range(8)))
+            readers = await asyncio.gather(*(manager.run_read(_thread_name) for _ in range(8)))
+            return writers, readers
+
+    writers, readers = asyncio.run(scenario())
+    assert len(set(writers)) == 1
+    assert writers[0].startswith("bank-writer")
+    assert all(name.startswith("bank-reader") for name in readers)
+
+
+def test_reads_run_concurrently(db_manager):
+    # Both reads must be inside the barrier at once, or it times out and raises
+    barrier = threading.Barrier(2, timeout=5)
+
+    async def scenario():
+        async with AsyncDatabaseManager(db_manager) as manager:
+            await asyncio.gather(manager.run_read(barrier.wait), manager.run_read(barrier.wait))
+
+    asyncio.run(scenario())
+
+
+def test_close_waits_for_queued_writes_and_closes_the_pools(db_manager):
+    done = []
+
+    async def scenario():
+        manager = AsyncDatabaseManager(db_manager)
+        loop = asyncio.get_running_loop()
+        pending = [loop.create_task(manager.run_write(done.append, n)) for n in range(5)]
+        await asyncio.sleep(0)
+        await manager.close()
+        await asyncio.gather(*pending)
+
+    asyncio.run(scenario())
+    assert done == [0, 1, 2, 3, 4]
+    assert db_manager.pool._closed and db_manager.read_pool._closed
+
+
+def test_async_operations_match_the_blocking_ones(db_manager, operations):
+    sender = open_account(operations, balance=100)
+    receiver = open_account(operations)
+
+    async def scenario():
+        bank = AsyncTransactionOperations(AsyncDatabaseManager(db_manager))
+        # Reuse the cheap hasher from the blocking fixture
+        bank.operations = operations
+        try:
+            sent = await bank.transfer_money(sender, receiver, "Test Bank", 30, "rent")
+            # A generator is materialized before it reaches the writer thread
+            batch = await bank.transfer_many(((receiver, sender, "Test Bank", n, "back") for n in (1, 2)))
+            account = await bank.get_user_by_id(sender)
+        finally:
+            await bank.db_manager.close()
+        return sent, batch, account
+
+    sent, batch, account = asyncio.run(scenario())
+    assert sent == "Money transfer successful"
+    assert [item["status"] for item in batch] == ["ok", "ok"]
+    assert account["balance_minor"] == 7300
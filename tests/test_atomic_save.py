@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from practice import serialization
+from practice.fileStorage import DataHandler
+from practice.serialization import atomic_write, dump_file, load_file, resolve_durability
+
+DOCUMENT = {"a": {"name": "A", "users": {"1": {"id": 1, "balance": "5"}}}}
+
+
+@pytest.fixture
+def handler(tmp_path):
+    handler = DataHandler(str(tmp_path / "bank.db"), str(tmp_path / "banks.json"))
+    yield handler
+    handler.close()
+
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_save_replaces_the_file_and_keeps_its_mode(tmp_path, handler):
+    os.chmod(handler.json_file, 0o640)
+    handler.save(DOCUMENT)
+    assert handler.read() == DOCUMENT
+    assert os.stat(handler.json_file).st_mode & 0o777 == 0o640
+    assert _leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize("durability", ["fsync", "full"])
+def test_failed_write_leaves_the_old_file(tmp_path, monkeypatch, durability):
+    path = tmp_path / "banks.json"
+    dump_file(path, DOCUMENT)
+
+    def failing_fsync(fd):
+        raise OSError("I/O error")
+
+    monkeypatch.setattr(serialization.os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        atomic_write(path, b'{"a": ', durability)
+    monkeypatch.undo()
+    assert load_file(path) == DOCUMENT
+    assert _leftovers(tmp_path) == []
+
+
+def test_unknown_durability_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_durability("sometimes")
+
+
+def test_double_buffer_notices_other_writers(tmp_path):
+    handler = DataHandler(str(tmp_path / "bank.db"), str(tmp_path / "banks.json"), double_buffer=True)
+    try:
+        handler.save(DOCUMENT)
+        assert handler.read() == DOCUMENT
+        dump_file(handler.json_file, {"b": {"name": "B", "users": {}}})
+        assert handler.read() == {"b": {"name": "B", "users": {}}}
+    finally:
+        handler.close()
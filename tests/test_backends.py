@@ -0,0 +1,45 @@
+import itertools
+
+import pytest
+
+from BankApp import backends
+from BankApp.backends import JsonBackend, open_backend
+
+
+@pytest.fixture(params=["memory", "json", "sqlite"])
+def backend(request, tmp_path):
+    options = {"memory": {}, "json": {"path": str(tmp_path / "banks.json")},
+               "sqlite": {"path": str(tmp_path / "bank.db")}}[request.param]
+    backend = open_backend(request.param, **options)
+    yield backend
+    backend.close()
+
+
+def test_backends_agree_on_balances(backend):
+    bank = backend.create_bank("Bank", email="bank@example.com")
+    first = backend.create_account(bank, "first", balance_minor=1000)
+    second = backend.create_account(bank, "second")
+    backend.transfer(first, second, 250, "rent")
+    backend.withdraw(second, 50)
+    assert (backend.get_balance(first), backend.get_balance(second)) == (750, 200)
+    with pytest.raises(ValueError):
+        backend.transfer(second, first, 10_000)
+    with pytest.raises(ValueError):
+        backend.create_bank("Bank")
+    assert backend.get_balance(first) == 750
+
+
+def test_json_account_ids_never_collide(tmp_path, monkeypatch):
+    backend = JsonBackend(str(tmp_path / "banks.json"))
+    try:
+        bank = backend.create_bank("Bank")
+        # The second account's first two draws repeat the first account's id
+        draws = itertools.chain(["0000002a"] * 3, ["0000002b"])
+        monkeypatch.setattr(backends.secrets, "token_hex", lambda size: next(draws))
+        first = backend.create_account(bank, "first", balance_minor=100)
+        second = backend.create_account(bank, "second")
+        assert (first, second) == (0x2a, 0x2b)
+        assert backend.get_account(first)["name"] == "first"
+        assert backend.get_balance(first) == 100
+    finally:
+        backend.close()
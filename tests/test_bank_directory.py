@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from BankApp.fileStorage import BankDirectory
+from helpers import BANK
+
+
+def test_least_recently_used_entry_is_evicted():
+    directory = BankDirectory(capacity=2)
+    directory.put("a", 1, directory.generation)
+    directory.put("b", 2, directory.generation)
+    assert directory.get("a") == 1
+    directory.put("c", 3, directory.generation)
+    assert (directory.get("a"), directory.get("b"), directory.get("c")) == (1, None, 3)
+    assert directory.stats() == {"size": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_entries_expire_after_the_ttl():
+    directory = BankDirectory(ttl=0.05)
+    directory.put("a", 1, directory.generation)
+    assert directory.get("a") == 1
+    time.sleep(0.1)
+    assert directory.get("a") is None
+    assert directory.stats()["size"] == 0
+
+
+def test_zero_ttl_disables_caching():
+    directory = BankDirectory(ttl=0)
+    directory.put("a", 1, directory.generation)
+    assert directory.get("a") is None
+
+
+def test_lookup_that_raced_an_invalidation_is_not_cached():
+    directory = BankDirectory()
+    generation = directory.generation
+    directory.invalidate("a")
+    directory.put("a", 1, generation)
+    assert directory.get("a") is None
+
+
+def test_invalidating_an_id_drops_every_name_for_it():
+    directory = BankDirectory()
+    directory.put("a", 1, directory.generation)
+    directory.put("old a", 1, directory.generation)
+    directory.put("b", 2, directory.generation)
+    directory.invalidate(bank_id=1)
+    assert (directory.get("a"), directory.get("old a"), directory.get("b")) == (None, None, 2)
+
+
+def _bank_id(operations):
+    return operations._bank_registration_number(BANK)
+
+
+@pytest.mark.parametrize("as_form_value", [False, True])
+def test_renamed_bank_is_not_resolved_by_its_old_name(operations, as_form_value):
+    bank_id = _bank_id(operations)
+    assert operations.bank_directory.get(BANK) == bank_id
+    operations.update_bank(str(bank_id) if as_form_value else bank_id, "Renamed Bank", "Street 1", "City",
+                           "Main", "IFSC0000001", "0000000000", "bank@example.com", "saving", None)
+    assert _bank_id(operations) is None
+    assert operations._bank_registration_number("Renamed Bank") == bank_id
+
+
+@pytest.mark.parametrize("as_form_value", [False, True])
+def test_deleted_bank_is_not_resolved(operations, as_form_value):
+    bank_id = _bank_id(operations)
+    operations.delete_bank(str(bank_id) if as_form_value else bank_id)
+    assert operations.bank_directory.get(BANK) is None
+    assert _bank_id(operations) is None
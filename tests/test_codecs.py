@@ -0,0 +1,47 @@
+import enum
+from decimal import Decimal
+
+import pytest
+
+from practice.serialization import CODECS, dump_file, get_codec, load_file
+from practice.user import AccountStateEncoder
+
+DOCUMENT = {
+    "bank": {
+        "name": "Bank",
+        "tags": ["a", "b", "a"],
+        "users": {"1": {"id": 1, "balance": "10.50", "rate": 0.25, "state": 1, "pin": None,
+                        "active": True, "closed": False, "big": 2 ** 70, "name": "Zoë"}},
+    },
+}
+
+# msgpack is optional and not installed everywhere
+AVAILABLE = [name for name in CODECS if name != "msgpack"]
+
+
+class Color(enum.IntEnum):
+    RED = 1
+
+
+@pytest.mark.parametrize("codec", AVAILABLE)
+def test_codec_round_trip(tmp_path, codec):
+    path = tmp_path / f"banks.{codec}"
+    dump_file(path, DOCUMENT, codec)
+    assert load_file(path) == DOCUMENT
+
+
+@pytest.mark.parametrize("codec", AVAILABLE)
+def test_codecs_use_the_encoder_default(codec):
+    codec = get_codec(codec)
+    raw = codec.dumps({"amount": Decimal("1.10"), "color": Color.RED}, encoder=AccountStateEncoder)
+    assert codec.loads(raw) == {"amount": "1.10", "color": 1}
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec("xml")
+
+
+def test_record_format_rejects_other_files():
+    with pytest.raises(ValueError):
+        get_codec("record").loads(b"{}")
@@ -0,0 +1,63 @@
+import pytest
+
+from practice.historyStorage import HistoryStore
+from practice.logStorage import LogStore
+from practice.repository import BankRepository
+
+
+@pytest.fixture
+def history(tmp_path):
+    return HistoryStore(str(tmp_path / "history"), segment_size=3, durable=False)
+
+
+def _pages(history, account_id, limit):
+    pages, cursor = [], None
+    while True:
+        entries, cursor = history.page(account_id, cursor=cursor, limit=limit)
+        pages.append([entry["n"] for entry in entries])
+        if cursor is None:
+            return pages
+
+
+def test_pages_walk_back_across_segments(history):
+    assert history.append_many([(1, {"n": n}) for n in range(8)]) == list(range(8))
+    assert history.count(1) == 8
+    assert _pages(history, 1, 3) == [[7, 6, 5], [4, 3, 2], [1, 0]]
+    assert _pages(history, 1, 5) == [[7, 6, 5, 4, 3], [2, 1, 0]]
+    assert _pages(history, 1, 8) == [[7, 6, 5, 4, 3, 2, 1, 0]]
+
+
+def test_accounts_are_kept_apart(history):
+    history.append_many([(1, {"n": 0}), (2, {"n": 0}), (1, {"n": 1})])
+    assert history.append(2, {"n": 1}) == 1
+    assert _pages(history, 1, 10) == [[1, 0]]
+    assert _pages(history, 2, 10) == [[1, 0]]
+    assert history.page(3) == ([], None)
+
+
+def test_a_stale_cursor_is_clamped(history):
+    history.append_many([(1, {"n": n}) for n in range(4)])
+    assert history.page(1, cursor=100, limit=2) == ([{"n": 3}, {"n": 2}], 2)
+
+
+def test_appends_by_another_instance_are_counted(history):
+    other = HistoryStore(str(history.directory), segment_size=3, durable=False)
+    history.append_many([(1, {"n": n}) for n in range(2)])
+    assert other.count(1) == 2
+    other.append(1, {"n": 2})
+    # The cached count is checked against the size of the newest segment
+    assert history.append(1, {"n": 3}) == 3
+    assert _pages(history, 1, 10) == [[3, 2, 1, 0]]
+
+
+def test_migrate_moves_embedded_histories(tmp_path, history):
+    store = LogStore(str(tmp_path / "banks.json"))
+    store.save({"a": {"users": {"1": {"id": 1, "transaction_history": [{"n": 0}, {"n": 1}]},
+                                "2": {"id": 2}}}})
+    repository = BankRepository(str(tmp_path / "banks.json"), store)
+    try:
+        assert history.migrate(repository) == 2
+        assert store.read_disk() == {"a": {"users": {"1": {"id": 1}, "2": {"id": 2}}}}
+        assert _pages(history, 1, 10) == [[1, 0]]
+    finally:
+        store.close()
@@ -0,0 +1,73 @@
+import logging
+
+from BankApp.instrumentation import (
+    COUNT_BUCKETS, TIME_BUCKETS, Histogram, HistogramSink, Instrumentation, LoggingSink, PrometheusSink, Sink,
+    params_shape,
+)
+from helpers import open_account
+
+
+def test_histogram_quantiles_report_bucket_bounds():
+    histogram = Histogram(TIME_BUCKETS)
+    for value in [0.0002] * 98 + [0.3, 20.0]:
+        histogram.add(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100 and snapshot["max"] == 20.0
+    assert snapshot["p50"] == 0.00025
+    assert snapshot["p99"] == 0.5
+    assert histogram.quantile(1.0) == 20.0
+    assert Histogram(COUNT_BUCKETS).quantile(0.5) == 0.0
+
+
+def test_instrumentation_is_off_until_a_sink_is_added(db_manager, operations):
+    assert not db_manager.instrumentation.enabled
+    sink = db_manager.instrumentation.add_sink(HistogramSink())
+    account = open_account(operations, balance=10)
+    operations.withdraw_money(account, 4)
+    snapshot = sink.snapshot()
+    assert {"pool_checkout_seconds", "statement_seconds", "statement_rows", "commit_seconds",
+            "bcrypt_seconds", "operation_seconds"} <= snapshot.keys()
+    assert ("withdraw_money", "ok") in {(entry["operation"], entry["outcome"]) for entry in snapshot["operation_seconds"]}
+    assert {entry["pool"] for entry in snapshot["pool_checkout_seconds"]} == {"read", "write"}
+
+    db_manager.instrumentation.remove_sink(sink)
+    assert not db_manager.instrumentation.enabled
+
+
+def test_a_broken_sink_does_not_fail_the_operation(db_manager, operations, caplog):
+    class Broken(Sink):
+        def observe(self, name, value, labels):
+            raise RuntimeError("sink down")
+
+    db_manager.instrumentation.add_sink(Broken())
+    with caplog.at_level(logging.ERROR):
+        account = open_account(operations, balance=10)
+    assert operations.get_user_by_id(account)["balance_minor"] == 1000
+    assert "sink down" in caplog.text
+
+
+def test_logging_sink_skips_small_values(caplog):
+    instrumentation = Instrumentation([LoggingSink(level=logging.INFO, min_value=0.01)])
+    with caplog.at_level(logging.INFO, logger="BankApp.metrics"):
+        instrumentation.observe("commit_seconds", 0.001)
+        instrumentation.observe("statement_seconds", 0.5, statement="SELECT 1")
+    assert [record.getMessage() for record in caplog.records] == ["statement_seconds 0.500000 statement='SELECT 1'"]
+
+
+def test_prometheus_sink_writes_cumulative_buckets(tmp_path):
+    path = tmp_path / "bank.prom"
+    sink = PrometheusSink(str(path), interval=0)
+    sink.observe("statement_seconds", 0.0002, {"statement": 'SELECT "x"'})
+    sink.observe("statement_seconds", 0.3, {"statement": 'SELECT "x"'})
+    text = path.read_text()
+    assert "# TYPE bank_statement_seconds histogram" in text
+    assert 'bank_statement_seconds_bucket{statement="SELECT \\"x\\"",le="0.00025"} 1' in text
+    assert 'bank_statement_seconds_bucket{statement="SELECT \\"x\\"",le="+Inf"} 2' in text
+    assert 'bank_statement_seconds_count{statement="SELECT \\"x\\""} 2' in text
+    assert [name for name in tmp_path.iterdir() if name.suffix == ".tmp"] == []
+
+
+def test_params_are_described_by_type_only():
+    assert params_shape(("alice", 5, None)) == "(str, int, NoneType)"
+    assert params_shape({"name": "alice"}) == "{name: str}"
+    assert params_shape(None) == "()"
@@ -0,0 +1,117 @@
+import fcntl
+import os
+import threading
+from decimal import Decimal
+
+import pytest
+
+from practice.locking import AccountLocks, FileLock
+from practice.logStorage import LogStore
+from practice.repository import BankRepository
+from practice.transaction import TransactionOperation
+from practice.user import UserOperation, to_money
+
+
+def test_account_locks_exclude_overlapping_holders():
+    locks = AccountLocks()
+    inside = []
+    overlaps = []
+
+    def worker(first, second):
+        for _ in range(200):
+            with locks.hold(first, second):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                inside.pop()
+
+    # Opposite orders would deadlock without sorting
+    threads = [threading.Thread(target=worker, args=pair) for pair in [(1, 2), (2, 1)] * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert overlaps == []
+
+
+def test_disjoint_accounts_do_not_wait():
+    locks = AccountLocks()
+    with locks.hold(1, None, 1):
+        acquired = threading.Event()
+
+        def other():
+            with locks.hold(2):
+                acquired.set()
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        assert acquired.wait(5)
+        thread.join()
+
+
+def test_file_lock_is_shared_by_threads_and_excludes_other_holders(tmp_path):
+    path = str(tmp_path / "banks.json.lock")
+    lock = FileLock(path)
+    with lock:
+        with lock:
+            assert lock.held
+        fd = os.open(path, os.O_RDWR)
+        try:
+            # Another open file description, as another process would have
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        finally:
+            os.close(fd)
+    assert not lock.held
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+
+def test_concurrent_transfers_conserve_money(tmp_path):
+    path = str(tmp_path / "banks.json")
+    users = UserOperation(path)
+    transactions = TransactionOperation(path)
+    bank = users.create_bank("Bank", "City", "Main", "IFSC", "0", "bank@example.com", ["Savings"])["id"]
+    accounts = [users.create_user(bank, "Savings", f"u{n}", f"u{n}@example.com", "secret", 1)["id"]
+                for n in range(4)]
+    for account in accounts:
+        users.update_user(account, balance="100")
+
+    def worker(offset):
+        for n in range(25):
+            sender, receiver = accounts[(n + offset) % 4], accounts[(n + offset + 1) % 4]
+            transactions.transfer(bank, bank, "1.25", sender, receiver, 1, "x")
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    try:
+        assert not any(thread.is_alive() for thread in threads)
+        stored = transactions.repository.store.read_disk()[bank]["users"]
+        assert sum(to_money(user["balance"]) for user in stored.values()) == Decimal("400")
+    finally:
+        transactions.repository.store.close()
+
+
+def test_save_keeps_changes_written_by_another_process(tmp_path):
+    path = str(tmp_path / "banks.json")
+    # Two stores on one file stand in for two processes
+    first = LogStore(path)
+    first.save({"a": {"name": "A", "users": {"1": {"id": 1, "balance": "5"}}}})
+    second = LogStore(path)
+    try:
+        ours, theirs = BankRepository(path, first), BankRepository(path, second)
+        data = ours.snapshot()
+        with theirs.locked(2), theirs.lock:
+            theirs.banks["a"]["users"]["2"] = {"id": 2, "balance": "3"}
+            theirs.mark_user_dirty("a", 2)
+        data["a"]["name"] = "Renamed"
+        ours.save(data)
+        assert ours.store.read_disk()["a"] == {
+            "name": "Renamed", "users": {"1": {"id": 1, "balance": "5"}, "2": {"id": 2, "balance": "3"}}}
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from helpers import run_with_timeout
+from practice import logStorage
+from practice.logStorage import LogStore
+
+DOCUMENT = {"bank": {"name": "Bank", "users": {"1": {"id": 1, "balance": "10.50", "state": 1}}}}
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "banks.json")
+
+
+def test_log_store_replays_after_reopen(store_path):
+    store = LogStore(store_path)
+    store.save(DOCUMENT)
+    store.set(["bank", "users", "1", "balance"], "9.50")
+    store.delete(["bank", "name"])
+    store.close()
+
+    store = LogStore(store_path)
+    try:
+        assert store.read() == {"bank": {"users": {"1": {"id": 1, "balance": "9.50", "state": 1}}}}
+    finally:
+        store.close()
+
+
+def test_log_store_drops_a_torn_record(store_path):
+    store = LogStore(store_path)
+    store.save(DOCUMENT)
+    store.close()
+    with open(f"{store_path}.log", "a") as f:
+        f.write('{"op":"set","path":["bank","name"],"val')
+
+    store = LogStore(store_path)
+    try:
+        assert store.read() == DOCUMENT
+        with open(f"{store_path}.log", "rb") as f:
+            assert f.read().endswith(b"\n")
+    finally:
+        store.close()
+
+
+def test_writers_return_when_compaction_fails(store_path, monkeypatch):
+    store = LogStore(store_path, compact_bytes=1)
+    attempts = []
+
+    def broken_compact():
+        attempts.append(1)
+        raise RuntimeError("cannot encode state")
+
+    monkeypatch.setattr(store, "compact", broken_compact)
+    try:
+        errors = run_with_timeout(lambda: [store.set(["bank", "n"], n) for n in range(5)])
+        assert errors == []
+        assert attempts
+        assert store.read() == {"bank": {"n": 4}}
+    finally:
+        store.close()
+
+
+def test_failed_compaction_keeps_its_swapped_log(store_path, monkeypatch):
+    store = LogStore(store_path, compact_bytes=1 << 30)
+    store.save(DOCUMENT)
+
+    def failing_write_temp(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(logStorage, "write_temp", failing_write_temp)
+    with pytest.raises(OSError):
+        store.compact()
+    store.set(["bank", "name"], "Renamed")
+    # The retry must not replace the log left over from the first attempt
+    with pytest.raises(OSError):
+        store.compact()
+    store.close()
+
+    store = LogStore(store_path)
+    try:
+        assert store.read()["bank"]["name"] == "Renamed"
+        assert store.read()["bank"]["users"] == DOCUMENT["bank"]["users"]
+    finally:
+        store.close()
+
+
+def test_failed_fsync_makes_sync_raise(store_path, monkeypatch):
+    store = LogStore(store_path)
+    real_fsync = os.fsync
+
+    def failing_fsync(fd):
+        raise OSError("I/O error")
+
+    monkeypatch.setattr(logStorage.os, "fsync", failing_fsync)
+    errors = run_with_timeout(lambda: store.set(["bank"], {}))
+    assert len(errors) == 1 and isinstance(errors[0], OSError)
+    monkeypatch.setattr(logStorage.os, "fsync", real_fsync)
+    store.close()
@@ -0,0 +1,66 @@
+import sqlite3
+
+from BankApp.fileStorage import MIGRATIONS, DatabaseManager
+from BankApp.Transaction import TransactionOperations
+
+# The original schema: REAL balances and amounts, no indexes, no journal, user_version 0
+BASELINE_SCHEMA = """
+CREATE TABLE admin (admin_id INTEGER UNIQUE PRIMARY KEY, username TEXT UNIQUE, password TEXT,
+                    admin_name TEXT, created_at TEXT);
+CREATE TABLE banks (bank_registration_number INTEGER PRIMARY KEY, Bank_name TEXT UNIQUE, address TEXT,
+                    created_at TEXT, modified_at TEXT, location TEXT, branch TEXT, ifsc TEXT, contact TEXT,
+                    email TEXT, account_types TEXT, admin_id INTEGER);
+CREATE TABLE users (user_account_number INTEGER PRIMARY KEY, username TEXT UNIQUE, email TEXT, phone TEXT,
+                    password TEXT, first_name TEXT, last_name TEXT, bank_id INTEGER, created_at TEXT,
+                    updated_at TEXT, status TEXT, account_type TEXT, balance REAL);
+CREATE TABLE transactions (transaction_id TEXT PRIMARY KEY, user_id INTEGER, amount REAL, type TEXT,
+                           description TEXT, created_at TEXT);
+"""
+
+
+def _baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO banks (bank_registration_number, Bank_name) VALUES (1, 'Old Bank')")
+    conn.executemany(
+        "INSERT INTO users (user_account_number, username, bank_id, status, account_type, balance) "
+        "VALUES (?, ?, 1, 'active', 'saving', ?)",
+        [(1, "alice", 12.34), (2, "bob", 0.1 + 0.2), (3, "carol", None)])
+    conn.execute("INSERT INTO transactions VALUES ('t1', 1, 5.5, 'deposit', 'old', '2024-01-01')")
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_baseline_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    _baseline_db(path)
+    db_manager = DatabaseManager(path)
+    try:
+        assert db_manager.schema_version() == MIGRATIONS[-1][0]
+        balances = dict(db_manager._read_all("SELECT username, balance_minor FROM users"))
+        assert balances == {"alice": 1234, "bob": 30, "carol": 0}
+        assert db_manager._read_one("SELECT amount_minor FROM transactions")[0] == 550
+        columns = {row["name"] for row in db_manager._read_all("PRAGMA table_info(users)")}
+        assert "balance" not in columns
+        db_manager.check_hot_queries()
+
+        # Balances from before the journal are carried by the baseline checkpoints
+        operations = TransactionOperations(db_manager)
+        assert operations.get_balance_as_of(1, "9999-12-31") == 1234
+        operations.transfer_money(1, 2, "Old Bank", "2.34", "after migration")
+        assert operations.get_user_by_id(1)["balance_minor"] == 1000
+        assert operations.get_balance_as_of(2, "9999-12-31") == 264
+    finally:
+        db_manager.close()
+
+
+def test_migrations_are_idempotent(tmp_path):
+    path = str(tmp_path / "old.db")
+    _baseline_db(path)
+    DatabaseManager(path).close()
+    db_manager = DatabaseManager(path)
+    try:
+        assert db_manager.schema_version() == MIGRATIONS[-1][0]
+        assert db_manager._read_one("SELECT COUNT(*) FROM balance_checkpoints")[0] == 3
+    finally:
+        db_manager.close()
@@ -0,0 +1,86 @@
+import threading
+
+import bcrypt
+import pytest
+
+from BankApp import passwordHasher
+from BankApp.passwordHasher import HasherBusyError, PasswordHasher
+from BankApp.Transaction import TransactionOperations
+from helpers import open_account
+
+
+def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=1)
+    try:
+        hashed = hasher.hash("secret")
+        assert hasher.verify("secret", hashed)
+        assert hasher.verify("secret", hashed.encode("utf-8"))
+        assert not hasher.verify("wrong", hashed)
+        assert not hasher.verify("secret", None)
+    finally:
+        hasher.close()
+
+
+def test_full_queue_raises_busy_instead_of_waiting(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hashpw(password, rounds):
+        started.set()
+        release.wait(5)
+        return b"$2b$04$" + b"x" * 53
+
+    monkeypatch.setattr(passwordHasher, "_hashpw", slow_hashpw)
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=1, acquire_timeout=0.05)
+    worker = threading.Thread(target=hasher.hash, args=("first",))
+    worker.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(HasherBusyError):
+            hasher.hash("second")
+    finally:
+        release.set()
+        worker.join()
+    # The slot is released once the slow hash finishes
+    assert hasher.hash("third").startswith("$2b$04$")
+    hasher.close()
+
+
+def test_pending_limit_must_cover_the_workers():
+    with pytest.raises(ValueError):
+        PasswordHasher(max_workers=4, max_pending=2)
+
+
+def test_needs_rehash_compares_the_cost():
+    hasher = PasswordHasher(rounds=5, max_workers=1, max_pending=1)
+    try:
+        assert not hasher.needs_rehash(bcrypt.hashpw(b"secret", bcrypt.gensalt(5)))
+        assert hasher.needs_rehash(bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode("utf-8"))
+        assert hasher.needs_rehash("not a bcrypt hash")
+    finally:
+        hasher.close()
+
+
+def test_login_upgrades_an_old_cost(db_manager, operations):
+    account = open_account(operations)
+    username = operations.get_user_by_id(account)["username"]
+    stronger = PasswordHasher(rounds=5, max_workers=1, max_pending=1)
+    try:
+        upgraded = TransactionOperations(db_manager, password_hasher=stronger)
+        assert upgraded.login(username, "secret") is not None
+        stored = db_manager._read_one("SELECT password FROM users WHERE username = ?", (username,))[0]
+        assert not stronger.needs_rehash(stored)
+        assert upgraded.login(username, "secret") is not None
+    finally:
+        stronger.close()
+
+
+def test_busy_hasher_is_not_reported_as_bad_credentials(db_manager, operations, monkeypatch):
+    account = open_account(operations)
+    username = operations.get_user_by_id(account)["username"]
+
+    def busy(*args):
+        raise HasherBusyError("Too many password hashing requests in flight")
+
+    monkeypatch.setattr(operations.password_hasher, "_run", busy)
+    with pytest.raises(HasherBusyError):
+        operations.login(username, "secret")
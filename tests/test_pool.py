@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from BankApp.fileStorage import DatabaseManager, PoolTimeoutError
+
+
+@pytest.fixture
+def small_manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "bank.db"), pool_size=1, checkout_timeout=0.1)
+    yield manager
+    manager.close()
+
+
+def _in_other_thread(func):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = func()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return outcome
+
+
+def test_checkout_times_out_when_pool_is_exhausted(small_manager):
+    pool = small_manager.pool
+
+    def checkout():
+        with pool.item():
+            pass
+
+    with pool.item():
+        outcome = _in_other_thread(checkout)
+        assert isinstance(outcome.get("error"), PoolTimeoutError)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_nested_checkout_reuses_the_connection(small_manager):
+    with small_manager.pool.item() as outer:
+        with small_manager.pool.item() as inner:
+            assert inner is outer
+        assert small_manager.pool.stats()["in_use"] == 1
+
+
+def test_connection_is_returned_after_an_error(small_manager):
+    pool = small_manager.pool
+    with pytest.raises(RuntimeError):
+        with pool.item():
+            raise RuntimeError("boom")
+    assert pool.stats()["in_use"] == 0
+    outcome = _in_other_thread(lambda: small_manager._read_one("SELECT 1")[0])
+    assert outcome == {"result": 1}
+
+
+def test_read_pool_is_query_only(small_manager):
+    with small_manager.read_pool.item() as conn:
+        with pytest.raises(Exception, match="readonly"):
+            conn.execute("INSERT INTO banks (Bank_name) VALUES ('x')")
@@ -0,0 +1,83 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from helpers import run_with_timeout
+from practice.logStorage import LogStore
+from practice.serialization import load_file
+from practice.transaction import TransactionOperation
+from practice.user import AccountStateEncoder, UserOperation
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "banks.json")
+
+
+def _open_bank(users):
+    bank = users.create_bank("Bank", "City", "Main", "IFSC", "0", "bank@example.com", ["Savings"])
+    first = users.create_user(bank["id"], "Savings", "first", "f@example.com", "secret", 1)["id"]
+    second = users.create_user(bank["id"], "Savings", "second", "s@example.com", "secret", 1)["id"]
+    return bank["id"], first, second
+
+
+def _balances(users, *accounts):
+    return [json.loads(users.read_user(account))["balance"] for account in accounts]
+
+
+def test_decimal_balances_survive_a_reload(store_path):
+    users = UserOperation(store_path)
+    transactions = TransactionOperation(store_path)
+    bank, first, second = _open_bank(users)
+    users.update_user(first, balance=Decimal("100.10"))
+    # A float written by an older version
+    transactions.repository.store.set([bank, "users", str(second), "balance"], 100.2)
+    transactions.repository.store.close()
+
+    users = UserOperation(store_path)
+    transactions = TransactionOperation(store_path)
+    try:
+        assert transactions.transfer(bank, bank, Decimal("0.10"), first, second, 1, "x") \
+            .startswith("Transaction successful")
+        assert transactions.transfer(bank, bank, "0.30", second, first, 1, "x") \
+            .startswith("Transaction successful")
+        assert _balances(users, first, second) == ["100.30", "100.00"]
+        assert json.dumps(Decimal("1.10"), cls=AccountStateEncoder) == '"1.10"'
+    finally:
+        transactions.repository.store.close()
+
+
+def test_update_user_rejects_an_invalid_balance(store_path):
+    users = UserOperation(store_path)
+    try:
+        _, first, _ = _open_bank(users)
+        assert users.update_user(first, balance="lots") == "Invalid balance, must be a number"
+        users.update_user(first, balance=Decimal("1E+2"))
+        assert _balances(users, first) == ["100"]
+    finally:
+        users.repository.store.close()
+
+
+def test_compaction_after_account_changes(store_path):
+    # Compacting after every fsync encodes the live state each time
+    store = LogStore(store_path, compact_bytes=1)
+    users = UserOperation(store_path, backend=store)
+    transactions = TransactionOperation(store_path, backend=store)
+
+    def work():
+        bank, first, second = _open_bank(users)
+        users.update_user(first, balance="50")
+        transactions.transfer(bank, bank, "12.50", first, second, 1, "x")
+        transactions.withdraw("0.50", second, 1, "x")
+        store.compact()
+
+    try:
+        assert run_with_timeout(work) == []
+        assert store._worker.is_alive()
+    finally:
+        store.close()
+
+    snapshot = load_file(store_path)
+    balances = sorted(user["balance"] for bank in snapshot.values() for user in bank["users"].values())
+    assert balances == ["12.00", "37.50"]
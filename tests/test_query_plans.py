@@ -0,0 +1,34 @@
+import pytest
+
+from BankApp.fileStorage import COVERED_QUERIES, HOT_QUERIES, MIGRATIONS, FullScanError, UncoveredQueryError
+
+
+def test_migrations_applied(db_manager):
+    assert db_manager.schema_version() == MIGRATIONS[-1][0]
+
+
+@pytest.mark.parametrize("statement, params", HOT_QUERIES, ids=[statement for statement, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(db_manager, statement, params):
+    assert db_manager.assert_indexed(statement, params)
+
+
+@pytest.mark.parametrize("statement, params", COVERED_QUERIES, ids=[statement for statement, _ in COVERED_QUERIES])
+def test_covered_query_reads_only_the_index(db_manager, statement, params):
+    plan = db_manager.assert_indexed(statement, params, covering=True)
+    assert any("COVERING INDEX" in detail for detail in plan)
+
+
+def test_check_hot_queries(db_manager):
+    db_manager.check_hot_queries()
+
+
+def test_full_scan_is_rejected(db_manager):
+    with pytest.raises(FullScanError):
+        db_manager.assert_indexed("SELECT * FROM users WHERE first_name = ?", ("First",))
+
+
+def test_table_lookup_is_rejected_when_covering(db_manager):
+    statement = "SELECT email FROM users WHERE bank_id = ?"
+    db_manager.assert_indexed(statement, (1,))
+    with pytest.raises(UncoveredQueryError):
+        db_manager.assert_indexed(statement, (1,), covering=True)
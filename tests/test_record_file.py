@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from practice.fileStorage import DataHandler
+from practice.recordStorage import RecordFile
+from practice.serialization import dump_file
+
+DOCUMENT = {
+    "a": {"name": "A", "users": {"1": {"id": 1, "balance": "5"}, "2": {"id": 2, "balance": "7"}}},
+    "b": {"name": "B", "users": {}},
+    3: {"name": "C", "users": {4: {"id": 4, "balance": "1"}}},
+}
+
+
+@pytest.fixture
+def records(tmp_path):
+    path = str(tmp_path / "banks.json.rec")
+    RecordFile.write(path, DOCUMENT)
+    return RecordFile(path)
+
+
+def test_lookups_decode_single_records(records):
+    assert records.get_bank("a") == {"name": "A"}
+    assert records.get_bank("a", users=True) == DOCUMENT["a"]
+    assert records.get_account(2) == ("a", {"id": 2, "balance": "7"})
+    # Ids are strings, as JSON would load them
+    assert records.get_account("4") == ("3", {"id": 4, "balance": "1"})
+    assert records.get_bank("3", users=True) == {"name": "C", "users": {"4": {"id": 4, "balance": "1"}}}
+
+
+def test_missing_ids_are_not_found(records):
+    assert records.get_bank("z") is None
+    assert records.get_account(99) == (None, None)
+    # A bank id is not an account id, even where the strings match
+    assert records.get_account("a") == (None, None)
+
+
+def test_banks_are_listed_in_document_order(records):
+    assert list(records.iter_banks()) == [("a", {"name": "A"}), ("b", {"name": "B"}), ("3", {"name": "C"})]
+
+
+def test_readers_remap_after_a_rewrite(records):
+    assert records.get_account(1)[1]["balance"] == "5"
+    RecordFile.write(records.path, {"a": {"name": "A", "users": {"1": {"id": 1, "balance": "6"}}}})
+    assert records.get_account(1)[1]["balance"] == "6"
+    assert records.get_account(2) == (None, None)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "banks.json"
+    dump_file(path, DOCUMENT)
+    with pytest.raises(ValueError):
+        RecordFile(str(path)).get_bank("a")
+
+
+def test_data_handler_serves_reads_from_the_record_file(tmp_path):
+    handler = DataHandler(str(tmp_path / "bank.db"), str(tmp_path / "banks.json"), mmap_reads=True)
+    try:
+        handler.save({"a": {"name": "A", "users": {"1": {"id": 1, "balance": "5"}}}})
+        assert handler.read_account(1) == ("a", {"id": 1, "balance": "5"})
+        assert handler.list_banks() == [("a", "A")]
+        # A write that bypassed the handler makes the record file stale
+        dump_file(handler.json_file, {"b": {"name": "B", "users": {}}})
+        # Coarse file timestamps could make both files look equally new
+        stat = os.stat(handler.records.path)
+        os.utime(handler.json_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert handler.read_bank("b") == {"name": "B"}
+        assert handler.read_account(1) == (None, None)
+    finally:
+        handler.close()
@@ -0,0 +1,62 @@
+import pytest
+
+from practice.logStorage import LogStore
+from practice.repository import BankRepository
+
+
+def _document():
+    return {
+        "a": {"name": "A", "users": {"1": {"id": 1, "balance": "5"}, "2": {"id": 2, "balance": "7"}}},
+        "b": {"name": "B", "users": {"3": {"id": 3, "balance": "9"}}},
+    }
+
+
+@pytest.fixture
+def repository(tmp_path):
+    store = LogStore(str(tmp_path / "banks.json"))
+    store.save(_document())
+    yield BankRepository(str(tmp_path / "banks.json"), store)
+    store.close()
+
+
+def test_index_is_built_from_the_document(repository):
+    assert repository.find_account(1) == ("a", {"id": 1, "balance": "5"})
+    assert repository.find_account("3")[0] == "b"
+    assert repository.find_account(4) == (None, None)
+
+
+def test_renamed_bank_moves_its_accounts(repository):
+    data = repository.snapshot()
+    data["c"] = data.pop("a")
+    repository.save(data)
+    assert repository.find_account(1)[0] == "c"
+    assert repository.find_account(2)[0] == "c"
+    assert repository.find_account(3)[0] == "b"
+
+
+def test_deleted_user_and_bank_leave_the_index(repository):
+    with repository.locked(1), repository.lock:
+        del repository.banks["a"]["users"]["1"]
+        repository.mark_user_deleted("a", 1)
+    assert repository.find_account(1) == (None, None)
+    assert repository.find_account(2)[0] == "a"
+
+    with repository.locked(), repository.lock:
+        del repository.banks["b"]
+        repository.mark_bank_deleted("b")
+    assert repository.find_account(3) == (None, None)
+
+
+def test_rollback_restores_a_moved_account(repository):
+    with pytest.raises(RuntimeError):
+        with repository.locked(1), repository.lock:
+            account = repository.banks["a"]["users"].pop("1")
+            repository.mark_user_deleted("a", 1)
+            repository.banks["b"]["users"]["1"] = account
+            repository.mark_user_dirty("b", 1)
+            account["balance"] = "0"
+            raise RuntimeError("transfer failed")
+
+    assert repository.find_account(1) == ("a", {"id": 1, "balance": "5"})
+    assert "1" not in repository.banks["b"]["users"]
+    assert repository.store.read_disk() == _document()
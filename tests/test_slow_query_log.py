@@ -0,0 +1,50 @@
+import logging
+
+from helpers import open_account
+
+FULL_SCAN = "SELECT COUNT(*) FROM users WHERE last_name = ?"
+
+
+def test_statements_under_the_threshold_are_counted_not_logged(db_manager, operations, caplog):
+    slow_log = db_manager.enable_slow_query_log(threshold=60)
+    try:
+        with caplog.at_level(logging.WARNING, logger="BankApp.slow_queries"):
+            account = open_account(operations, balance=5)
+            operations.get_user_by_id(account)
+        assert caplog.records == []
+        report = slow_log.report(n=100)
+        assert report and all(entry["slow"] == 0 for entry in report)
+        lookup = next(entry for entry in report if entry["statement"] == "SELECT * FROM users WHERE user_account_number = ?")
+        assert lookup["count"] >= 1 and lookup["shapes"] == ["(int)"]
+    finally:
+        slow_log.close()
+
+
+def test_slow_statements_are_logged_with_their_plan(db_manager, caplog):
+    slow_log = db_manager.enable_slow_query_log(threshold=0)
+    try:
+        with caplog.at_level(logging.WARNING, logger="BankApp.slow_queries"):
+            db_manager._read_one(FULL_SCAN, ("Last",))
+        message = caplog.records[-1].getMessage()
+        assert message.startswith("Slow query ") and "params=(str)" in message
+        assert "plan: SCAN users" in message
+    finally:
+        slow_log.close()
+
+
+def test_report_ranks_statements_and_flags_full_scans(db_manager):
+    slow_log = db_manager.enable_slow_query_log(threshold=60)
+    try:
+        slow_log.statement(FULL_SCAN, 0.2, 1, ("Last",))
+        slow_log.statement("SELECT 1 FROM users WHERE username = ?", 0.001, 0, ("a",))
+        slow_log.statement("SELECT 1 FROM users WHERE username = ?", 0.001, 1, ("b",))
+        # The log's own EXPLAIN queries are not statistics
+        slow_log.statement(f"EXPLAIN QUERY PLAN {FULL_SCAN}", 5.0, 1, None)
+
+        by_total, by_count = slow_log.report(by="total"), slow_log.report(by="count")
+        assert [entry["statement"] for entry in by_total] == [FULL_SCAN, "SELECT 1 FROM users WHERE username = ?"]
+        assert by_count[0]["count"] == 2 and by_count[0]["full_scans"] == []
+        assert by_total[0]["full_scans"] == ["SCAN users"]
+        assert "FULL SCAN" in slow_log.format_report(n=1)
+    finally:
+        slow_log.close()
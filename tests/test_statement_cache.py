@@ -0,0 +1,42 @@
+import sqlite3
+
+from BankApp.fileStorage import DatabaseManager, StatementCache, StatementStats
+
+
+def test_hits_and_misses_are_counted():
+    stats = StatementStats()
+    cache = StatementCache(sqlite3.connect(":memory:"), 4, stats)
+    first = cache.cursor_for("SELECT 1")
+    assert cache.cursor_for("SELECT 1") is first
+    cache.cursor_for("SELECT 2")
+    assert stats.snapshot() == {"hits": 1, "misses": 2, "evictions": 0, "hit_rate": 1 / 3}
+
+
+def test_least_recently_used_cursor_is_evicted():
+    stats = StatementStats()
+    cache = StatementCache(sqlite3.connect(":memory:"), 2, stats)
+    one = cache.cursor_for("SELECT 1")
+    cache.cursor_for("SELECT 2")
+    # Touch "SELECT 1" so "SELECT 2" becomes the oldest
+    assert cache.cursor_for("SELECT 1") is one
+    cache.cursor_for("SELECT 3")
+    assert len(cache) == 2
+    assert stats.evictions == 1
+    assert cache.cursor_for("SELECT 1") is one
+    misses = stats.misses
+    cache.cursor_for("SELECT 2")
+    assert stats.misses == misses + 1
+
+
+def test_manager_reuses_statements_across_calls(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "bank.db"), pool_size=1, read_pool_size=1)
+    try:
+        before = db_manager.statement_stats()
+        for _ in range(5):
+            db_manager._read_one("SELECT COUNT(*) FROM banks")
+        after = db_manager.statement_stats()
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 4
+        assert db_manager._prepare_statement("SELECT 1") is db_manager._prepare_statement("SELECT 1")
+    finally:
+        db_manager.close()
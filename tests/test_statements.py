@@ -0,0 +1,111 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import BankApp.Transaction as transaction_module
+from BankApp.fileStorage import DatabaseManager
+from helpers import BANK, open_account
+
+
+@pytest.fixture
+def busy_account(operations):
+    """An account with interleaved deposits, withdrawals and transfers and several checkpoints."""
+    operations.CHECKPOINT_INTERVAL = 3
+    account, other = open_account(operations, 1000), open_account(operations, 1000)
+    for i in range(1, 13):
+        if i % 3 == 0:
+            operations.transfer_money(other, account, BANK, i, "in")
+        elif i % 3 == 1:
+            operations.deposit_money(account, i)
+        else:
+            operations.withdraw_money(account, i)
+    return account
+
+
+def _balance_before(db_manager, account, timestamp):
+    row = db_manager._read_one(
+        "SELECT COALESCE(SUM(amount_minor), 0) FROM account_statement WHERE account = ? AND created_at < ?",
+        (account, timestamp))
+    return row[0]
+
+
+def _check_statement(operations, db_manager, account, start, end):
+    statement = operations.get_statement(account, start, end)
+    assert statement["opening_balance_minor"] == _balance_before(db_manager, account, start)
+    assert statement["closing_balance_minor"] == _balance_before(db_manager, account, end)
+    assert statement["opening_balance_minor"] + sum(line["amount_minor"] for line in statement["lines"]) \
+        == statement["closing_balance_minor"]
+    return statement
+
+
+def test_statement_cut_at_checkpoint_timestamp(operations, db_manager, busy_account):
+    checkpoints = db_manager._read_all(
+        "SELECT created_at FROM balance_checkpoints WHERE account = ? ORDER BY created_at", (busy_account,))
+    assert len(checkpoints) >= 3
+    end = "9999-12-31"
+    for (created_at,) in checkpoints:
+        statement = _check_statement(operations, db_manager, busy_account, created_at, end)
+        # The entry the checkpoint was taken at opens the statement instead of the opening balance
+        assert statement["lines"][0]["created_at"] == created_at
+
+
+def test_statement_cut_at_every_entry_timestamp(operations, db_manager, busy_account):
+    entries = db_manager._read_all(
+        "SELECT created_at FROM account_statement WHERE account = ? ORDER BY created_at", (busy_account,))
+    timestamps = [created_at for (created_at,) in entries]
+    for start, end in zip(timestamps, timestamps[1:]):
+        statement = _check_statement(operations, db_manager, busy_account, start, end)
+        assert [line["created_at"] for line in statement["lines"]] == [start]
+
+
+def test_balance_as_of_excludes_entries_at_that_time(operations, db_manager, busy_account):
+    entries = db_manager._read_all(
+        "SELECT created_at, amount_minor FROM account_statement WHERE account = ? ORDER BY created_at", (busy_account,))
+    balance = 0
+    for created_at, amount_minor in entries:
+        assert operations.get_balance_as_of(busy_account, created_at) == balance
+        balance += amount_minor
+    assert db_manager._read_one(
+        "SELECT balance_minor FROM users WHERE user_account_number = ?", (busy_account,))[0] == balance
+
+
+def test_timestamps_on_whole_seconds_keep_their_microseconds(operations, db_manager, monkeypatch):
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(ticks)
+
+    ticks = iter([Clock(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc),
+                  Clock(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc),
+                  Clock(2024, 5, 1, 12, 0, 1, tzinfo=timezone.utc)])
+
+    account = open_account(operations)
+    monkeypatch.setattr(transaction_module, "datetime", Clock)
+    for amount in (1, 2, 3):
+        operations.deposit_money(account, amount)
+    monkeypatch.undo()
+
+    stamps = [row[0] for row in db_manager._read_all(
+        "SELECT created_at FROM journal WHERE credit_account = ? ORDER BY entry_id", (account,))]
+    assert stamps == ["2024-05-01T12:00:00.000000+00:00", "2024-05-01T12:00:00.500000+00:00",
+                      "2024-05-01T12:00:01.000000+00:00"]
+    assert operations.get_balance_as_of(account, datetime(2024, 5, 1, 12, 0, 0, 500000)) == 100
+    assert operations.get_balance_as_of(account, "2024-05-01T12:00:01Z") == 300
+    assert operations.get_statement(account, "2024-05-01T12:00:00", "2024-05-01T12:00:01")["closing_balance_minor"] == 300
+
+
+def test_migration_pads_whole_second_timestamps(tmp_path):
+    path = str(tmp_path / "bank.db")
+    DatabaseManager(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO journal (credit_account, amount_minor, kind, created_at) "
+                  "VALUES (1, 5, 'deposit', '2024-05-01T12:00:00+00:00')")
+    conn.execute("PRAGMA user_version = 5")
+    conn.commit()
+    conn.close()
+    db_manager = DatabaseManager(path)
+    try:
+        assert db_manager._read_one("SELECT created_at FROM journal")[0] == "2024-05-01T12:00:00.000000+00:00"
+    finally:
+        db_manager.close()
@@ -0,0 +1,72 @@
+import pytest
+
+from practice import streamStorage
+from practice.logStorage import LogStore
+from practice.streamStorage import StreamReader
+
+DOCUMENT = {
+    "a": {"name": "A", "users": {
+        "1": {"id": 1, "balance": "5", "transaction_history": [{"amount": "1"}]},
+        "2": {"id": 2, "balance": "7", "transaction_history": []},
+    }},
+    "b": {"name": "B", "users": {"3": {"id": 3, "balance": "9", "name": "Zoë \"q\""}}},
+    "c": {"name": "C", "users": {"4": {"id": 4, "balance": "1"}}},
+}
+
+
+def _without_history(document):
+    return {
+        bank_id: dict(bank, users={
+            key: {field: value for field, value in user.items() if field != "transaction_history"}
+            for key, user in bank["users"].items()
+        })
+        for bank_id, bank in document.items()
+    }
+
+
+@pytest.fixture(params=["json-pretty", "json", "record"])
+def store(request, tmp_path):
+    store = LogStore(str(tmp_path / "banks.json"), codec=request.param)
+    store.save(DOCUMENT)
+    store.compact()
+    # Records left in the log, for the reader to overlay on the snapshot
+    store.set(["a", "users", "1", "balance"], "4.50")
+    store.delete(["a", "users", "2"])
+    store.set(["a", "users", "5"], {"id": 5, "balance": "0"})
+    store.set(["b", "users"], {"6": {"id": 6, "balance": "2"}})
+    store.delete(["c"])
+    store.set(["d"], {"name": "D", "users": {"7": {"id": 7, "balance": "3"}}})
+    yield store
+    store.close()
+
+
+def test_banks_match_the_store(store):
+    reader = StreamReader(str(store.snapshot_file))
+    expected = store.read()
+    assert dict(reader.iter_banks(users=True, history=True)) == expected
+    assert dict(reader.iter_banks(users=True)) == _without_history(expected)
+    assert dict(reader.iter_banks()) == {key: {"name": bank["name"]} for key, bank in expected.items()}
+
+
+def test_accounts_match_the_store(store):
+    reader = StreamReader(str(store.snapshot_file))
+    expected = store.read()
+    accounts = {user["id"]: (bank_id, user) for bank_id, bank in expected.items() for user in bank["users"].values()}
+    assert {user["id"]: (bank_id, user) for bank_id, user in reader.iter_accounts(history=True)} == accounts
+    assert reader.get_account(1) == ("a", expected["a"]["users"]["1"])
+    assert reader.get_account(1, history=False)[1] == {"id": 1, "balance": "4.50"}
+    assert reader.get_account(6) == ("b", {"id": 6, "balance": "2"})
+    assert reader.get_account(2) == (None, None)
+    assert reader.get_account(4) == (None, None)
+
+
+def test_single_bank_lookups(store):
+    reader = StreamReader(str(store.snapshot_file))
+    assert reader.get_bank("d", users=True) == store.read()["d"]
+    assert reader.get_bank("c") is None
+
+
+def test_fallback_tokenizer_matches(store, monkeypatch):
+    monkeypatch.setattr(streamStorage, "ijson", None)
+    reader = StreamReader(str(store.snapshot_file))
+    assert dict(reader.iter_banks(users=True, history=True)) == store.read()
@@ -0,0 +1,134 @@
+import random
+import threading
+
+import pytest
+
+from helpers import BANK, balance, open_account, statement_sum
+
+
+@pytest.mark.parametrize("receiver_as", [int, str])
+def test_self_transfer_is_rejected(operations, receiver_as):
+    account = open_account(operations, 10)
+    with pytest.raises(ValueError, match="yourself"):
+        operations.transfer_money(account, receiver_as(account), BANK, 1, "self")
+    assert balance(operations, account) == 1000
+
+
+def test_amounts_are_stored_in_cents(operations):
+    account = open_account(operations)
+    operations.deposit_money(account, "0.10")
+    operations.deposit_money(account, "0.20")
+    assert balance(operations, account) == 30
+    for amount in ("0.001", "-1", "0", "abc", "nan"):
+        with pytest.raises(ValueError):
+            operations.deposit_money(account, amount)
+    assert balance(operations, account) == 30
+
+
+def test_insufficient_funds_are_rejected(operations):
+    sender, receiver = open_account(operations, 10), open_account(operations)
+    with pytest.raises(ValueError, match="Insufficient balance"):
+        operations.transfer_money(sender, receiver, BANK, 20, "too much")
+    assert balance(operations, sender) == 1000
+    assert balance(operations, receiver) == 0
+    assert operations.get_account_entries(receiver) == []
+
+
+def test_conditional_debit_rejects_a_stale_balance(operations, db_manager):
+    sender, receiver = open_account(operations, 10), open_account(operations)
+    with db_manager.pool.item() as conn:
+        with conn.cursor() as cursor:
+            conn.begin("IMMEDIATE")
+            stale = operations._get_user_details(cursor, sender)
+            receiver_row = operations._get_user_details(cursor, receiver)
+            cursor.execute("UPDATE users SET balance_minor = 0 WHERE user_account_number = ?", (sender,))
+            # The row read earlier still shows 1000, but the UPDATE checks the live balance
+            with pytest.raises(ValueError, match="Insufficient balance"):
+                operations._post_transfer(cursor, stale, receiver_row, 500, "stale")
+            conn.rollback()
+    assert balance(operations, sender) == 1000
+    assert balance(operations, receiver) == 0
+
+
+def test_concurrent_transfers_conserve_money(operations, db_manager):
+    accounts = [open_account(operations, 100) for _ in range(6)]
+    total = sum(balance(operations, account) for account in accounts)
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(40):
+            sender, receiver = rng.sample(accounts, 2)
+            try:
+                operations.transfer_money(sender, receiver, BANK, rng.randint(1, 60), "load")
+            except ValueError as e:
+                if str(e) != "Insufficient balance":
+                    errors.append(e)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    balances = [balance(operations, account) for account in accounts]
+    assert sum(balances) == total
+    assert min(balances) >= 0
+    for account, account_balance in zip(accounts, balances):
+        assert statement_sum(db_manager, account) == account_balance
+
+
+def test_transfer_many_reports_each_item(operations):
+    first, second, third = open_account(operations, 100), open_account(operations, 100), open_account(operations)
+    results = operations.transfer_many([
+        (first, third, BANK, 10, "ok"),
+        (first, third, BANK, "abc", "bad amount"),
+        (second, third, BANK, 500, "insufficient"),
+        (second, 999999, BANK, 1, "unknown receiver"),
+        (second, str(second), BANK, 1, "self"),
+        {"sender_id": second, "receiver_account_number": first, "receiver_bank_name": BANK, "amount": 5},
+    ], chunk_size=4)
+    assert [result["status"] for result in results] == ["ok", "error", "error", "error", "error", "ok"]
+    assert [result["index"] for result in results] == list(range(6))
+    assert results[2]["error"] == "Insufficient balance"
+    assert results[3]["error"] == "Receiver not found"
+    assert balance(operations, first) == 10000 - 1000 + 500
+    assert balance(operations, second) == 10000 - 500
+    assert balance(operations, third) == 1000
+
+
+def test_transfer_many_checkpoints_point_at_their_entries(operations, db_manager):
+    # Checkpoint ids come from MAX(entry_id) plus the position in the batch
+    operations.CHECKPOINT_INTERVAL = 1
+    accounts = [open_account(operations, 100) for _ in range(4)]
+    rng = random.Random(1)
+    batch = []
+    for _ in range(30):
+        sender, receiver = rng.sample(accounts, 2)
+        batch.append((sender, receiver, BANK, rng.randint(1, 5), "batch"))
+    assert all(result["status"] == "ok" for result in operations.transfer_many(batch, chunk_size=7))
+
+    for account in accounts:
+        checkpoint = db_manager._read_one(
+            "SELECT entry_id, balance_minor FROM balance_checkpoints WHERE account = ? ORDER BY entry_id DESC LIMIT 1",
+            (account,))
+        last_entry = db_manager._read_one(
+            "SELECT MAX(entry_id) FROM account_statement WHERE account = ?", (account,))[0]
+        assert checkpoint["entry_id"] == last_entry
+        assert checkpoint["balance_minor"] == balance(operations, account) == statement_sum(db_manager, account)
+
+
+def test_every_movement_is_journaled(operations, db_manager):
+    sender, receiver = open_account(operations, 100), open_account(operations)
+    operations.transfer_money(sender, receiver, BANK, "12.34", "rent")
+    operations.withdraw_money(receiver, "1.34")
+    entries = operations.get_account_entries(receiver)
+    assert [(entry["type"], entry["kind"], entry["amount_minor"]) for entry in entries] == [
+        ("debit", "withdrawal", -134), ("credit", "transfer", 1234)]
+    assert (entries[1]["counterparty"], entries[1]["description"]) == (sender, "rent")
+    assert entries[0]["counterparty"] is None
+    for account in (sender, receiver):
+        assert statement_sum(db_manager, account) == balance(operations, account)